@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import threading
+
+import librosa
+import numpy as np
+
+from peaks import PeakPyramid
+from perf_trace import perf
+
+# Cache lives next to the working directory the taggers are started from
+DEFAULT_CACHE_DIR = os.path.join(os.getcwd(), ".shloka_cache")
+DEFAULT_MAX_BYTES = 6 * 1024 ** 3  # room for the whole BrajaBeats corpus, native and analysis rate
+DEFAULT_ANALYSIS_SR = 16000  # rate of the mono signal used for display and analysis
+
+
+class DecodedAudioCache:
+    """On-disk cache of decoded float32 PCM stored as memory-mappable .npy files.
+
+    Entries are keyed by absolute path, size and mtime of the source file, so an
+    edited or replaced recording is decoded again. Every file belonging to an
+    entry shares the key as its name prefix; the mtime of the .npy file records
+    when the entry was last used (the newest file of an entry counts) and drives
+    LRU eviction once the total size of the cache exceeds max_bytes.
+
+    The native-rate signal keeps every channel of the file: shaped (frames,)
+    for mono recordings and (frames, channels) otherwise, so playback is
+    not down-mixed. Besides it, each entry holds a mono copy resampled to
+    analysis_sr. Display, peak computation and other analysis work on that
+    copy; playback uses the native signal.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 analysis_sr=DEFAULT_ANALYSIS_SR):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.analysis_sr = analysis_sr
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def cache_key(self, file_path):
+        """Build the cache key for a source file from its path, size and mtime"""
+        stat = os.stat(file_path)
+        raw = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key, suffix):
+        """Path of one file belonging to a cache entry (e.g. suffix='pcm.npy')"""
+        return os.path.join(self.cache_dir, f"{key}.{suffix}")
+
+    def load(self, file_path):
+        """Return (y, sr) of the native-rate signal with all its channels, decoding it only on a cache miss
+
+        The returned array is a read-only memory map, so the decoded signal is
+        shared through the page cache rather than copied into the process.
+        """
+        key = self.cache_key(file_path)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with perf.span("librosa.load", file=os.path.basename(file_path)):
+            y, sr = librosa.load(file_path, sr=None, mono=False)
+        y = y.T  # librosa returns (channels, frames); frames come first here, as in the loader
+        self.store(key, file_path, y, sr)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        return y, sr
+
+    def load_analysis(self, file_path):
+        """Return (y, sr) of the analysis-rate signal, resampling it only on a cache miss"""
+        key = self.cache_key(file_path)
+        analysis_path = self.entry_path(key, f"a{self.analysis_sr}.npy")
+        try:
+            y = np.load(analysis_path, mmap_mode="r")
+            os.utime(self.entry_path(key, "pcm.npy"))
+            return y, self.analysis_sr
+        except (OSError, ValueError):
+            pass
+
+        native, native_sr = self.load(file_path)
+        if native.ndim == 1 and native_sr == self.analysis_sr:
+            return native, native_sr
+
+        # Analysis works on a mono down-mix, as librosa.load would return it
+        y = np.asarray(native, dtype=np.float32)
+        if y.ndim > 1:
+            y = y.mean(axis=1, dtype=np.float32)
+        if native_sr != self.analysis_sr:
+            y = librosa.resample(y, orig_sr=native_sr, target_sr=self.analysis_sr)
+        self._write_array(analysis_path, y)
+        try:
+            return np.load(analysis_path, mmap_mode="r"), self.analysis_sr
+        except (OSError, ValueError):
+            return y, self.analysis_sr
+
+    def get(self, key):
+        """Return (y, sr) for a cached entry or None if it is not cached"""
+        pcm_path = self.entry_path(key, "pcm.npy")
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        try:
+            y = np.load(pcm_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        # Touch the entry so it counts as recently used
+        try:
+            os.utime(pcm_path)
+        except OSError:
+            pass
+        return y, meta["sr"]
+
+    def contains(self, file_path):
+        """Check whether file_path is already decoded in the cache, in an entry get() accepts"""
+        try:
+            key = self.cache_key(file_path)
+        except OSError:
+            return False
+        return self._read_meta(key) is not None and os.path.exists(self.entry_path(key, "pcm.npy"))
+
+    def _read_meta(self, key):
+        # Metadata of a usable entry, or None
+        try:
+            with open(self.entry_path(key, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if "channels" not in meta:
+            return None  # Written before channels were kept: a mono down-mix, decoded again for playback
+        return meta
+
+    def store(self, key, file_path, y, sr):
+        """Write a decoded signal to the cache and evict old entries if needed"""
+        pcm_path = self.entry_path(key, "pcm.npy")
+        meta_path = self.entry_path(key, "meta.json")
+        meta = {
+            "path": os.path.abspath(file_path),
+            "sr": int(sr),
+            "samples": int(len(y)),
+            "channels": 1 if np.ndim(y) == 1 else int(np.shape(y)[1]),
+        }
+
+        # Metadata goes first so a visible .npy always has its sample rate
+        tmp_path = self._tmp_path(meta_path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._write_array(pcm_path, y)
+
+        self.evict()
+
+    def _tmp_path(self, path):
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _write_array(self, path, y):
+        # Write to a temporary file first so readers never see a partial array
+        tmp_path = self._tmp_path(path)
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(y, dtype=np.float32))
+        os.replace(tmp_path, path)
+
+    def load_peaks(self, file_path, y, sr):
+        """Return the PeakPyramid of signal y for file_path, building and persisting it on a miss"""
+        pyramid = self.get_peaks(file_path, sr)
+        if pyramid is None:
+            pyramid = PeakPyramid.build(y, sr)
+            self.store_peaks(file_path, pyramid)
+        return pyramid
+
+    def get_peaks(self, file_path, sr):
+        """Return the cached PeakPyramid at sample rate sr, or None"""
+        try:
+            key = self.cache_key(file_path)
+            peaks_path = self.entry_path(key, f"peaks{int(sr)}.npz")
+            pyramid = PeakPyramid.load(peaks_path)
+            os.utime(peaks_path)
+            return pyramid
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store_peaks(self, file_path, pyramid):
+        """Persist a PeakPyramid for file_path"""
+        key = self.cache_key(file_path)
+        peaks_path = self.entry_path(key, f"peaks{int(pyramid.sr)}.npz")
+        tmp_path = self._tmp_path(peaks_path)
+        try:
+            pyramid.save(tmp_path)
+            os.replace(tmp_path, peaks_path)
+        except OSError:
+            pass  # The pyramid is still usable even if it cannot be persisted
+
+    def get_spectrogram_tile(self, key, sr, index):
+        """Return a cached spectrogram tile of entry key, or None"""
+        try:
+            return np.load(self.entry_path(key, f"spec{int(sr)}_{index}.npy"))
+        except (OSError, ValueError):
+            return None
+
+    def store_spectrogram_tile(self, key, sr, index, tile):
+        """Persist a spectrogram tile of entry key
+
+        Tiles are small and share the entry's name prefix, so they are counted
+        and evicted with it the next time a decoded file is stored.
+        """
+        tile_path = self.entry_path(key, f"spec{int(sr)}_{index}.npy")
+        tmp_path = self._tmp_path(tile_path)
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, tile)
+            os.replace(tmp_path, tile_path)
+        except OSError:
+            pass  # The tile is still usable even if it cannot be persisted
+
+    def total_bytes(self):
+        """Total size of all files in the cache directory"""
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                total += entry.stat().st_size
+        return total
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            entries = {}
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                key = entry.name.split(".", 1)[0]
+                if len(key) != 40:
+                    continue  # Not a cache entry, e.g. the corpus index and database kept alongside
+                stat = entry.stat()
+                info = entries.setdefault(key, {"bytes": 0, "last_used": 0, "files": []})
+                info["bytes"] += stat.st_size
+                info["files"].append(entry.path)
+                info["last_used"] = max(info["last_used"], stat.st_mtime)
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            # Oldest entries first; the entry just written is the newest
+            for key, info in sorted(entries.items(), key=lambda item: item[1]["last_used"]):
+                if total <= self.max_bytes:
+                    break
+                for path in info["files"]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= info["bytes"]
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self._lock:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file():
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
@@ -0,0 +1,249 @@
+import bisect
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+from audio_cache import DEFAULT_CACHE_DIR
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg')
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "corpus_index.json")
+
+# "1.6" in a file name: whole numbers only, so it never matches inside "1.60" or "11.6"
+_KEY_PATTERN = re.compile(r'(?<![\d.])(\d+)\.(\d+)(?![\d])')
+_VARIANT_PATTERN = re.compile(r'\s*#\s*(\w+)')
+
+AudioKey = namedtuple("AudioKey", ["chapter", "verse", "variant"])
+
+
+def parse_audio_key(file_path):
+    """Return the AudioKey of a file name such as "Bhagavad-gita 1.6#shorts.mp3", or None
+
+    The variant is the first hashtag after the verse number, lowercased
+    ("shorts"), or "" for the main recording, so "1.6.mp3" and
+    "1.6#shorts.mp3" are different keys for the same verse.
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    match = _KEY_PATTERN.search(name)
+    if not match:
+        return None
+    rest = name[match.end():]
+    tag = _VARIANT_PATTERN.match(rest)
+    variant = tag.group(1).lower() if tag else rest.strip().lower()
+    return AudioKey(int(match.group(1)), int(match.group(2)), variant)
+
+
+def sort_by_chapter_verse(file_path):
+    """Sort key function for audio files based on chapter, verse and variant"""
+    key = parse_audio_key(file_path)
+    if key:
+        return key
+    return (999, 999, "")  # Default for files that don't match pattern
+
+
+def discover_audio_files(audio_dir):
+    """Walk audio_dir and return its audio files sorted by chapter and verse"""
+    audio_files = []
+    for root, dirs, files in os.walk(audio_dir):
+        for file in files:
+            if file.lower().endswith(AUDIO_EXTENSIONS):
+                audio_files.append(os.path.join(root, file))
+    audio_files.sort(key=sort_by_chapter_verse)
+    return audio_files
+
+
+class AudioCatalog:
+    """Audio files of one directory scan, indexed by their parsed keys
+
+    Built once per scan: each file's AudioKey is parsed a single time, and
+    filtering, verse lookup and next/previous navigation are dictionary
+    lookups instead of regex or substring scans over every file name.
+    files is in chapter/verse/variant order; the main recording of a verse
+    comes before its variants. add(), remove() and rename() apply single
+    changes in place, parsing only the file that changed.
+    """
+
+    def __init__(self, files=(), keys=None):
+        # keys (path -> AudioKey or None) parsed earlier, e.g. stored in the corpus database
+        keys = keys or {}
+        self.keys = {path: keys[path] if path in keys else parse_audio_key(path)
+                     for path in files}  # path -> AudioKey or None
+        self.files = sorted(self.keys, key=self._sort_key)
+        self.rows = {path: row for row, path in enumerate(self.files)}  # path -> position in files
+        self.names = {path: os.path.basename(path).lower() for path in self.files}
+        self.by_verse = {}  # (chapter, verse) -> paths, main recording first
+        self.by_chapter = {}  # chapter -> paths
+        for path in self.files:
+            key = self.keys[path]
+            if key is not None:
+                self.by_verse.setdefault((key.chapter, key.verse), []).append(path)
+                self.by_chapter.setdefault(key.chapter, []).append(path)
+
+    @classmethod
+    def scan(cls, audio_dir):
+        """Catalog every audio file under audio_dir"""
+        return cls(discover_audio_files(audio_dir))
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, path):
+        return path in self.rows
+
+    def add(self, path):
+        """Insert a new file in sort order; returns False if it is already cataloged"""
+        if path in self.rows:
+            return False
+        key = parse_audio_key(path)
+        self.keys[path] = key
+        self.names[path] = os.path.basename(path).lower()
+        row = bisect.bisect_right(self.files, self._sort_key(path), key=self._sort_key)
+        self.files.insert(row, path)
+        self._renumber(row)
+        if key is not None:
+            for group in (self.by_verse.setdefault((key.chapter, key.verse), []),
+                          self.by_chapter.setdefault(key.chapter, [])):
+                group.insert(bisect.bisect_right(group, self._sort_key(path), key=self._sort_key), path)
+        return True
+
+    def remove(self, path):
+        """Drop a file from the catalog; returns False if it was not cataloged"""
+        row = self.rows.pop(path, None)
+        if row is None:
+            return False
+        del self.files[row]
+        self._renumber(row)
+        key = self.keys.pop(path)
+        del self.names[path]
+        if key is not None:
+            for index, group_key in ((self.by_verse, (key.chapter, key.verse)), (self.by_chapter, key.chapter)):
+                group = index[group_key]
+                group.remove(path)
+                if not group:
+                    del index[group_key]
+        return True
+
+    def rename(self, old_path, new_path):
+        """Move a file to its new name, which may sort it elsewhere"""
+        self.remove(old_path)
+        return self.add(new_path)
+
+    def _sort_key(self, path):
+        # Same order as sort_by_chapter_verse, from the already parsed key
+        return self.keys[path] or (999, 999, "")
+
+    def _renumber(self, first_row):
+        # Rows before an insertion or removal keep their position
+        for row in range(first_row, len(self.files)):
+            self.rows[self.files[row]] = row
+
+    def row(self, path):
+        """Position of path in files, or None if it is not in the catalog"""
+        return self.rows.get(path)
+
+    def neighbour(self, path, offset):
+        """File offset rows away from path (e.g. -1 for the previous one), or None"""
+        row = self.rows.get(path)
+        if row is None or not 0 <= row + offset < len(self.files):
+            return None
+        return self.files[row + offset]
+
+    def find(self, chapter, verse, variant=""):
+        """Return the file for a verse, preferring the given variant, or None"""
+        try:
+            paths = self.by_verse.get((int(chapter), int(verse)))
+        except (TypeError, ValueError):
+            return None
+        if not paths:
+            return None
+        for path in paths:
+            if self.keys[path].variant == variant:
+                return path
+        return paths[0]
+
+    def filter(self, text="", chapter="", verse="", within=None):
+        """Return files whose name contains text and whose key matches chapter and verse
+
+        chapter and verse are the strings typed in the filter fields; empty
+        means any. Files without a parsable key only match when both are empty.
+        within is an earlier result for the same chapter and verse and a
+        text contained in this one; only its files are searched again, so
+        typing more of a query narrows the last result instead of
+        rescanning the catalog.
+        """
+        if within is not None:
+            candidates = within
+        elif chapter or verse:
+            try:
+                chapter = int(chapter) if chapter else None
+                verse = int(verse) if verse else None
+            except ValueError:
+                return []
+            if chapter is not None and verse is not None:
+                candidates = self.by_verse.get((chapter, verse), [])
+            elif chapter is not None:
+                candidates = self.by_chapter.get(chapter, [])
+            else:
+                candidates = [path for path in self.files
+                              if self.keys[path] is not None and self.keys[path].verse == verse]
+        else:
+            candidates = self.files
+
+        text = text.lower()
+        if text:
+            candidates = [path for path in candidates if text in self.names[path]]
+        return list(candidates)
+
+
+class CorpusIndex:
+    """Per-file metadata (duration, sample rate, channels) gathered by preprocessing
+
+    Stored as JSON next to the decoded audio cache and keyed by absolute path.
+    Each record keeps the size and mtime it was computed from, so stale
+    records are detected the same way stale cache entries are.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.records = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Read the index from disk, starting empty if it is missing or corrupt"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.records = json.load(f)
+        except (OSError, ValueError):
+            self.records = {}
+
+    def save(self):
+        """Write the index to disk atomically"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.records, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+    def get(self, file_path):
+        """Return the record for file_path if it is still up to date, else None"""
+        record = self.records.get(os.path.abspath(file_path))
+        if record is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if record.get("size") != stat.st_size or record.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+        return record
+
+    def update(self, file_path, **fields):
+        """Store fields for file_path, stamped with its current size and mtime"""
+        stat = os.stat(file_path)
+        record = dict(fields, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        with self._lock:
+            self.records[os.path.abspath(file_path)] = record
+        return record
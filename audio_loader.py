@@ -0,0 +1,238 @@
+import os
+import queue
+import threading
+import time
+
+import librosa
+import numpy as np
+
+from audio_stream import (
+    BLOCK_SECONDS,
+    STREAMING_MIN_DURATION,
+    StreamingAudioSource,
+    iter_decoded_blocks,
+    native_format,
+    probe_duration,
+)
+from peaks import PeakPyramidBuilder
+from perf_trace import perf
+
+PROGRESS_INTERVAL = 0.25  # minimum seconds between progress updates
+POLL_MS = 30  # how often the Tk thread checks for loader messages
+
+
+class _GrowableBuffer:
+    """float32 buffer of frames that grows geometrically; views handed out earlier stay valid
+
+    Frames are single samples, or rows of channels if the first block appended is 2-D.
+    """
+
+    def __init__(self, capacity, channels=()):
+        self.data = np.empty((max(1, int(capacity)), *channels), dtype=np.float32)
+        self.filled = 0
+
+    def append(self, block):
+        needed = self.filled + len(block)
+        if needed > len(self.data):
+            grown = np.empty((max(2 * len(self.data), needed), *self.data.shape[1:]), dtype=np.float32)
+            grown[:self.filled] = self.data[:self.filled]
+            self.data = grown
+        self.data[self.filled:needed] = block
+        self.filled = needed
+
+    def view(self):
+        return self.data[:self.filled]
+
+
+class AsyncAudioLoader:
+    """Decode audio files in a worker thread and report back on the Tk thread
+
+    Only one load is active at a time: starting a new load cancels the previous
+    one, and messages from stale loads are dropped. While decoding, on_progress
+    receives the analysis-rate samples decoded so far (with a peak pyramid
+    built from them) so the waveform can fill in progressively, and the
+    native-rate samples decoded so far, so playback can start before the
+    file is finished. on_done receives the whole native-rate signal, so the
+    file is decoded once for display and playback.
+
+    source is a DecodedAudioCache or AudioPrefetcher; files it already holds
+    are handed over in one step without streaming.
+
+    Recordings longer than streaming_min_duration, in a format libsndfile
+    can seek in, are never decoded whole: they are scanned once for their
+    peak pyramid and handed over as a StreamingAudioSource that decodes
+    windows on demand.
+    """
+
+    def __init__(self, root, cache, source=None, streaming_min_duration=STREAMING_MIN_DURATION):
+        self.root = root
+        self.cache = cache
+        self.source = source if source is not None else cache
+        self.streaming_min_duration = streaming_min_duration
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._cancel_event = None
+        self._callbacks = None
+        self._polling = False
+
+    def load(self, file_path, on_progress, on_done, on_error):
+        """Start loading file_path, cancelling any load still in progress
+
+        on_progress(y, sr, peaks, expected_duration, playback) and on_done(y,
+        sr, peaks, playback) receive the analysis-rate signal; playback is a
+        (samples, sr) pair of the native-rate signal, or in progress reports
+        a (samples, sr, complete=False) triple; it is None in progress reports
+        of streamed recordings. on_error(exception) is called if
+        decoding fails.
+        """
+        self.cancel()
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        self._callbacks = (on_progress, on_done, on_error)
+
+        worker = threading.Thread(
+            target=self._run,
+            args=(self._generation, file_path, self._cancel_event),
+            name="audio-loader",
+            daemon=True,
+        )
+        worker.start()
+
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        """Abort the active load, if any"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        self._cancel_event = None
+        self._callbacks = None
+
+    def is_loading(self):
+        """Check whether a load is in progress"""
+        return self._callbacks is not None
+
+    def _run(self, generation, file_path, cancel_event):
+        with perf.span("load_audio", file=os.path.basename(file_path)):
+            self._load(generation, file_path, cancel_event)
+
+    def _load(self, generation, file_path, cancel_event):
+        try:
+            expected_duration = probe_duration(file_path)
+            if (expected_duration and expected_duration >= self.streaming_min_duration
+                    and native_format(file_path)[2]):
+                self._run_streaming(generation, file_path, cancel_event, expected_duration)
+                return
+
+            if self.source.contains(file_path):
+                y, sr = self.source.load_analysis(file_path)
+                peaks = self.source.load_peaks(file_path, y, sr)
+                playback = self.cache.load(file_path)
+                self._queue.put((generation, "done", (y, sr, peaks, playback)))
+                return
+
+            key = self.cache.cache_key(file_path)
+            analysis_sr = self.cache.analysis_sr
+            native = None
+            analysis = _GrowableBuffer((expected_duration or BLOCK_SECONDS) * analysis_sr)
+            builder = PeakPyramidBuilder(analysis_sr)  # fed block by block, never rescanning decoded audio
+            sr = None
+            last_progress = 0.0
+
+            # Playback gets every channel; display and analysis a mono down-mix
+            for block, sr in iter_decoded_blocks(file_path, mono=False):
+                if cancel_event.is_set():
+                    return
+
+                if block.shape[1] == 1:
+                    block = block[:, 0]  # Mono stays 1-D, as in the cache
+                if native is None:
+                    native = _GrowableBuffer((expected_duration or BLOCK_SECONDS) * sr + len(block), block.shape[1:])
+                native.append(block)
+                if block.ndim > 1:
+                    block = block.mean(axis=1, dtype=np.float32)
+                if sr != analysis_sr:
+                    block = librosa.resample(block, orig_sr=sr, target_sr=analysis_sr)
+                analysis.append(block)
+                builder.add(block)
+
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = now
+                    progress = (analysis.view(), analysis_sr, builder.build(), expected_duration,
+                                (native.view(), sr, False))
+                    self._queue.put((generation, "progress", progress))
+
+            if cancel_event.is_set():
+                return
+            if native is None:
+                raise ValueError("No audio data could be decoded")
+
+            # Persist the decoded signal, then hand over the memory-mapped
+            # analysis copy (resampled from the whole signal, not per block)
+            self.cache.store(key, file_path, native.view(), sr)
+            playback = self.cache.get(key) or (native.view(), sr)
+            y, sr = self.source.load_analysis(file_path)
+            peaks = self.source.load_peaks(file_path, y, sr)
+            self._queue.put((generation, "done", (y, sr, peaks, playback)))
+        except Exception as e:
+            if not cancel_event.is_set():
+                self._queue.put((generation, "error", (e,)))
+
+    def _run_streaming(self, generation, file_path, cancel_event, expected_duration):
+        analysis_sr = self.cache.analysis_sr
+        source = StreamingAudioSource(file_path, analysis_sr)
+
+        # The peaks of an earlier scan are all that is needed to reopen the file
+        pyramid = self.cache.get_peaks(file_path, analysis_sr)
+        if pyramid is None:
+            def report(builder):
+                progress = (source, analysis_sr, builder.build(), expected_duration, None)
+                self._queue.put((generation, "progress", progress))
+
+            pyramid = source.scan(cancel_event, report, PROGRESS_INTERVAL)
+            if pyramid is None:
+                return  # Cancelled
+            self.cache.store_peaks(file_path, pyramid)
+
+        source.num_samples = pyramid.num_samples
+
+        # Playback streams the same file at its native rate, with all its channels
+        native_sr = source.native_sr
+        playback = StreamingAudioSource(
+            file_path, native_sr, int(round(pyramid.num_samples * native_sr / analysis_sr)), mono=False
+        )
+        self._queue.put((generation, "done", (source, analysis_sr, pyramid, (playback, native_sr))))
+
+    def _poll(self):
+        latest_progress = None
+        finished = None
+        while True:
+            try:
+                generation, kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation or self._callbacks is None:
+                continue  # Message from a cancelled load
+            if kind == "progress":
+                latest_progress = payload  # Only the newest progress matters
+            else:
+                finished = (kind, payload)
+
+        if self._callbacks is not None:
+            on_progress, on_done, on_error = self._callbacks
+            if finished is not None:
+                self._callbacks = None
+                kind, payload = finished
+                if kind == "done":
+                    on_done(*payload)
+                else:
+                    on_error(*payload)
+            elif latest_progress is not None:
+                on_progress(*latest_progress)
+
+        if self._callbacks is not None:
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
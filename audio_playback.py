@@ -0,0 +1,409 @@
+import threading
+import time
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):  # Not installed, or PortAudio is missing
+    sd = None
+
+BLOCK_FRAMES = 1024  # frames per sounddevice callback
+READ_AHEAD_SECONDS = 5.0  # how far ahead streamed sources are decoded during playback
+FALLBACK_CHUNK_SECONDS = 2.0  # length of each Sound the pygame fallback queues
+
+_SILENCE = np.zeros(0, dtype=np.float32)
+
+
+class PlaybackEngine:
+    """Play a decoded signal with sample-accurate start, stop and seek
+
+    The signal is any float32 array-like of frames, shaped (frames,) or
+    (frames, channels): the memory-mapped native-rate copy from
+    DecodedAudioCache, which keeps the file's channels, or a
+    StreamingAudioSource of the native signal for long recordings. The
+    file is never opened a second time for playback, and seeking only moves
+    the read position. While a file is still decoding, the part decoded so
+    far can already be played and grows with extend_source().
+
+    Output goes through sounddevice when it is installed; its callback copies
+    frames straight from the signal, and position() follows the device clock:
+    the frames the device has actually played, corrected for its output
+    latency. Without it, pygame.mixer plays the signal as a queue of short
+    Sound chunks and position() follows the chunk clock: the start of the
+    chunk playing plus the wall-clock time into it, so it may be off by a few
+    milliseconds but does not drift. clock names the one in use.
+    """
+
+    def __init__(self):
+        self.samples = None
+        self.sr = None
+        self._position = 0  # next frame handed to the output
+        self._end_frame = 0  # playback stops before this frame
+        self._end_wanted = None  # frame the current play range was asked to end at; None for the end of the signal
+        self._complete = True  # False while the signal is still growing as the file decodes
+        self._playing = False
+        self._generation = 0  # bumped on every start, pause and seek
+        self._lock = threading.Lock()
+        self._output = _SoundDeviceOutput(self) if sd is not None else _PygameOutput(self)
+
+    @property
+    def backend(self):
+        """Name of the audio output in use"""
+        return self._output.name
+
+    @property
+    def clock(self):
+        """Name of the clock position() follows, e.g. for the status bar"""
+        return self._output.clock
+
+    @property
+    def duration(self):
+        """Length of the current signal in seconds"""
+        if self.samples is None:
+            return 0.0
+        return len(self.samples) / self.sr
+
+    def set_source(self, samples, sr, complete=True):
+        """Switch to a new decoded signal, stopping playback
+
+        complete=False marks a signal that extend_source() will grow as the
+        rest of the file is decoded.
+        """
+        self.pause()
+        with self._lock:
+            self.samples = samples
+            self.sr = sr
+            self._position = 0
+            self._end_wanted = None
+            self._end_frame = len(samples)
+            self._complete = complete
+        self._output.open(sr, 1 if np.ndim(samples) == 1 else samples.shape[1])
+
+    def extend_source(self, samples, sr, complete=True):
+        """Continue with a longer copy of the current signal, e.g. as more of a file is decoded
+
+        Position and playback carry on into the new samples. While the
+        signal is incomplete, playback that reaches its end waits there for
+        more instead of stopping. Anything other than the current signal at
+        the same rate is switched to with set_source().
+        """
+        with self._lock:
+            if self.samples is not None and self.sr == sr and np.shape(self.samples)[1:] == np.shape(samples)[1:]:
+                self.samples = samples
+                self._end_frame = self._clamp_end()
+                self._complete = complete
+                return
+        self.set_source(samples, sr, complete)
+
+    def clear(self):
+        """Drop the current signal, e.g. while the next file is loading"""
+        self.pause()
+        with self._lock:
+            self.samples = None
+            self._position = 0
+            self._end_frame = 0
+
+    def play(self, start=None, end=None):
+        """Play from start (default: current position) to end seconds (default: end of signal)
+
+        Returns False if there is nothing to play.
+        """
+        if self.samples is None:
+            return False
+        self.pause()
+        with self._lock:
+            if start is not None:
+                self._position = self._to_frame(start)
+            # Only the decoded part can be played; the rest of the range once it arrives
+            self._end_wanted = None if end is None else max(0, int(round(end * self.sr)))
+            self._end_frame = self._clamp_end()
+            if self._position >= self._end_frame and not self._waits_for_more():
+                return False
+            self._generation += 1
+            generation = self._generation
+            # The output knows where this play starts before its callback can hand out a frame
+            self._output.prepare(generation, self._position)
+            self._playing = True
+        self._output.start(generation)
+        return True
+
+    def pause(self):
+        """Stop playback, keeping the position"""
+        position = self._output.position() if self.is_playing() else None
+        self._output.stop()
+        with self._lock:
+            if position is not None:
+                self._position = min(int(position), self._end_frame)
+            self._playing = False
+            self._generation += 1
+
+    def stop(self):
+        """Stop playback and rewind to the beginning"""
+        self.pause()
+        with self._lock:
+            self._position = 0
+
+    def seek(self, seconds):
+        """Move the play position; playback continues from there if it was running"""
+        if self.samples is None:
+            return
+        was_playing = self.is_playing()
+        end = self._end_wanted
+        self.pause()
+        with self._lock:
+            self._position = self._to_frame(seconds)
+        if was_playing:
+            self.play(end=None if end is None else end / self.sr)
+
+    def is_playing(self):
+        """Check whether audio is still being played"""
+        return self._output.is_active()
+
+    def position(self):
+        """Position of the sample being heard right now, in seconds
+
+        Cheap enough to call on demand, e.g. when a mark is placed, instead of
+        relying on the last value a UI poll saw.
+        """
+        if self.samples is None:
+            return 0.0
+        if self.is_playing():
+            frame = min(self._output.position(), self._end_frame)
+        else:
+            frame = self._position
+        return frame / self.sr
+
+    def close(self):
+        """Stop playback and release the audio device"""
+        self.pause()
+        self._output.close()
+
+    def _to_frame(self, seconds):
+        return max(0, min(len(self.samples), int(round(seconds * self.sr))))
+
+    def _clamp_end(self):
+        if self._end_wanted is None:
+            return len(self.samples)
+        return min(len(self.samples), self._end_wanted)
+
+    def _waits_for_more(self):
+        # The play range goes on past the samples decoded so far
+        return not self._complete and (self._end_wanted is None or self._end_wanted > self._end_frame)
+
+    def _read_block(self, frames):
+        """Hand the next frames of the play range to the output (called from its thread)"""
+        with self._lock:
+            if not self._playing:
+                return _SILENCE, self._position, self._generation
+            samples = self.samples
+            start = self._position
+            stop = min(start + frames, self._end_frame)
+            generation = self._generation
+
+        # Read outside the lock: streamed sources may have to decode
+        block = np.asarray(samples[start:stop], dtype=np.float32)
+
+        with self._lock:
+            if generation != self._generation:
+                return _SILENCE, start, self._generation  # Paused or seeked meanwhile
+            self._position = stop
+            if stop >= self._end_frame and not self._waits_for_more():
+                self._playing = False
+
+        if hasattr(samples, "prefetch"):
+            samples.prefetch(stop, stop + int(READ_AHEAD_SECONDS * self.sr))
+        return block, start, generation
+
+
+class _SoundDeviceOutput:
+    """Output stream pulling frames from the engine in its callback
+
+    The play position comes from the stream's own clock: each callback
+    records when the first frame of its block reaches the DAC, and the
+    position is that frame plus the stream time elapsed since.
+    """
+
+    name = "sounddevice"
+    clock = "device clock"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.stream = None
+        self._generation = None
+        self._start_frame = 0
+        self._anchor = None  # (first frame of newest block, stream time it reaches the DAC)
+
+    def open(self, sr, channels):
+        if self.stream is not None and self.stream.samplerate == sr and self.stream.channels == channels:
+            return
+        self.close()
+        # The stream keeps running between plays (outputting silence), so
+        # starting playback never waits for the device
+        self.stream = sd.OutputStream(
+            samplerate=sr, channels=channels, dtype="float32",
+            blocksize=BLOCK_FRAMES, callback=self._callback,
+        )
+        self.stream.start()
+
+    def prepare(self, generation, start_frame):
+        self._anchor = None
+        self._start_frame = start_frame
+        self._generation = generation
+
+    def start(self, generation):
+        pass  # The stream is already running and picks the frames up in its next callback
+
+    def stop(self):
+        self._generation = None
+        self._anchor = None
+
+    def position(self):
+        anchor = self._anchor
+        if anchor is None or self.stream is None:
+            return self._start_frame
+        frame, dac_time = anchor
+        frame += (self.stream.time - dac_time) * self.engine.sr
+        # Never before the start of playback or past the frames handed over
+        return max(self._start_frame, min(frame, self.engine._position))
+
+    def is_active(self):
+        if self._generation is None:
+            return False
+        if self.engine._playing:
+            return True
+        # The last block is still in the device buffer until the clock passes it
+        return self.position() < self.engine._position
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def _callback(self, outdata, frames, time_info, status):
+        block, start, generation = self.engine._read_block(frames)
+        outdata[:len(block)] = block.reshape(len(block), -1)
+        outdata[len(block):] = 0
+        if len(block) and generation == self._generation:
+            # Some host APIs report no DAC time; fall back to the stream latency
+            dac_time = time_info.outputBufferDacTime or time_info.currentTime + self.stream.latency
+            self._anchor = (start, dac_time)
+
+
+class _PygameOutput:
+    """Fallback output queueing short pygame Sounds on mixer channel 0
+
+    The mixer is opened at the signal's rate and channel count, so chunks go
+    out unconverted and each lasts exactly its frame count. pygame reports no
+    output position, so the position is anchored to the chunk boundaries:
+    the first frame of the chunk playing now, plus the wall-clock time since
+    it started, at most the chunk's length. Timing errors stay within one
+    chunk instead of adding up over a recording.
+    """
+
+    name = "pygame"
+    clock = "chunk clock"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.channel = None
+        self._generation = None
+        self._start_frame = 0
+        self._anchor = None  # (first frame of the chunk playing, its frames, time it started)
+
+    def open(self, sr, channels):
+        import pygame
+        channels = channels if channels in (1, 2, 4, 6) else 2  # Layouts SDL can open
+        if pygame.mixer.get_init() == (sr, -16, channels):
+            return
+        self.close()
+        pygame.mixer.quit()
+        # No changes allowed: SDL converts to the device format itself, with proper resampling
+        pygame.mixer.init(frequency=sr, size=-16, channels=channels, allowedchanges=0)
+        self.channel = pygame.mixer.Channel(0)
+
+    def prepare(self, generation, start_frame):
+        self._generation = generation
+        self._start_frame = start_frame
+        self._anchor = None
+
+    def start(self, generation):
+        threading.Thread(target=self._feed, args=(generation,), name="playback-feed", daemon=True).start()
+
+    def stop(self):
+        self._generation = None
+        if self.channel is not None:
+            self.channel.stop()
+
+    def position(self):
+        anchor = self._anchor
+        if anchor is None:
+            return self._start_frame
+        frame, frames, started = anchor
+        # Never past the chunk playing, e.g. while waiting for a file to decode
+        return frame + min((time.monotonic() - started) * self.engine.sr, frames)
+
+    def is_active(self):
+        if self._generation is None:
+            return False
+        if self.engine._playing:
+            return True
+        return self.channel is not None and self.channel.get_busy()
+
+    def close(self):
+        self.stop()
+
+    def _feed(self, generation):
+        import pygame
+        chunk_frames = int(FALLBACK_CHUNK_SECONDS * self.engine.sr)
+        channel = self.channel
+        queued = None  # (first frame, frames) of the chunk waiting behind the one playing
+        while self._generation == generation:
+            queued = self._follow(channel, queued)
+            block, start, block_generation = self.engine._read_block(chunk_frames)
+            if block_generation != generation:
+                return
+            if not len(block):
+                if not self.engine._playing:
+                    break
+                time.sleep(0.05)  # Caught up with a file still being decoded
+                continue
+            sound = pygame.sndarray.make_sound(self._to_mixer_format(block))
+
+            if self._anchor is None:
+                channel.play(sound)
+                self._anchor = (start, len(block), time.monotonic())
+                continue
+
+            # Keep one chunk queued behind the one playing
+            while self._generation == generation and channel.get_queue() is not None:
+                time.sleep(0.01)
+            queued = self._follow(channel, queued)
+            if self._generation == generation:
+                channel.queue(sound)  # Starts at once if the channel ran dry
+                queued = (start, len(block))
+
+        # The last chunk still has to play; keep the position moving through it
+        while self._generation == generation and queued is not None:
+            time.sleep(0.01)
+            queued = self._follow(channel, queued)
+
+    def _follow(self, channel, queued):
+        # Re-anchor the position once the queued chunk has started playing
+        if queued is not None and channel.get_queue() is None:
+            self._anchor = (*queued, time.monotonic())
+            return None
+        return queued
+
+    def _to_mixer_format(self, block):
+        import pygame
+        _, _, channels = pygame.mixer.get_init()
+        block = block.reshape(len(block), -1)
+        if block.shape[1] != channels:
+            # Down-mix to the mixer's mono, or copy mono to each of its channels
+            mono = block.mean(axis=1, keepdims=True)
+            block = mono if channels == 1 else np.repeat(mono, channels, axis=1)
+        pcm = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+        if channels == 1:
+            pcm = pcm[:, 0]
+        return np.ascontiguousarray(pcm)
@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_stream import STREAMING_MIN_DURATION, StreamingAudioSource, probe_duration
+
+DEFAULT_PREFETCH_DEPTH = 2  # files before and after the current one
+DEFAULT_MEMORY_BUDGET = 512 * 1024 ** 2  # bytes of decoded PCM kept resident
+
+
+class AudioPrefetcher:
+    """Decode neighbouring audio files in background threads
+
+    Decoding goes through the DecodedAudioCache, so prefetched files also end
+    up on disk. The most recently prefetched analysis-rate signals are kept
+    resident (their pages touched so the memory map is backed by RAM) up to
+    memory_budget bytes.
+
+    Long recordings that are only ever streamed get their peak pyramid
+    prepared instead of a full decode.
+    """
+
+    def __init__(self, cache, depth=DEFAULT_PREFETCH_DEPTH,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, workers=2):
+        self.cache = cache
+        self.depth = depth
+        self.memory_budget = memory_budget
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        # Reentrant: a job that is already finished runs its done-callback
+        # inside prefetch() while the lock is held
+        self._lock = threading.RLock()
+        self._pending = {}  # path -> Future
+        self._resident = OrderedDict()  # path -> (y, sr), oldest first
+        self._peaks = {}  # path -> PeakPyramid for resident files
+        self._resident_bytes = 0
+
+    def prefetch(self, paths):
+        """Queue paths for background decoding, dropping stale queued work"""
+        wanted = [p for p in dict.fromkeys(paths) if p]
+        with self._lock:
+            # Cancel queued jobs the annotator has moved away from
+            for path, future in list(self._pending.items()):
+                if path not in wanted and future.cancel():
+                    del self._pending[path]
+
+            for path in wanted:
+                if path in self._resident or path in self._pending:
+                    continue
+                future = self._executor.submit(self._decode, path)
+                self._pending[path] = future
+                future.add_done_callback(lambda f, p=path: self._on_done(p, f))
+
+    def load_analysis(self, path):
+        """Return the analysis-rate (y, sr), using resident or in-flight prefetch results"""
+        with self._lock:
+            if path in self._resident:
+                self._resident.move_to_end(path)
+                return self._resident[path]
+            future = self._pending.get(path)
+
+        if future is not None and not future.cancelled():
+            try:
+                result = future.result()
+                if result is not None:
+                    return result
+            except Exception:
+                pass  # Fall through and report the error from a direct load
+
+        y, sr = self.cache.load_analysis(path)
+        self._make_resident(path, y, sr)
+        return y, sr
+
+    def load_peaks(self, path, y, sr):
+        """Return the peak pyramid for a loaded file, reusing a prefetched one"""
+        with self._lock:
+            pyramid = self._peaks.get(path)
+        if pyramid is None:
+            pyramid = self.cache.load_peaks(path, y, sr)
+        return pyramid
+
+    def warm(self, paths):
+        """Queue paths for decoding into the disk cache only, e.g. files that just appeared
+
+        Unlike prefetch() this leaves other queued work alone and keeps
+        nothing resident, so it never displaces the neighbours of the open file.
+        """
+        for path in dict.fromkeys(paths):
+            self._executor.submit(self._prepare, path)
+
+    def contains(self, path):
+        """Check whether a file can be loaded without decoding it here"""
+        with self._lock:
+            if path in self._resident or path in self._pending:
+                return True
+        return self.cache.contains(path)
+
+    def is_ready(self, path):
+        """Check whether a file is resident in memory"""
+        with self._lock:
+            return path in self._resident
+
+    def shutdown(self):
+        """Stop the worker threads, discarding queued work"""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _decode(self, path):
+        prepared = self._prepare(path)
+        if prepared is None:
+            return None
+        y, sr, pyramid = prepared
+        # Touch one sample per page so the memory map is read in now
+        if len(y):
+            float(y[::1024].sum())
+        with self._lock:
+            self._peaks[path] = pyramid
+        return y, sr
+
+    def _prepare(self, path):
+        # Decode into the cache and build peaks; streamed recordings only get their peaks
+        duration = probe_duration(path)
+        if duration and duration >= STREAMING_MIN_DURATION:
+            if self.cache.get_peaks(path, self.cache.analysis_sr) is None:
+                source = StreamingAudioSource(path, self.cache.analysis_sr)
+                self.cache.store_peaks(path, source.scan())
+            return None
+
+        y, sr = self.cache.load_analysis(path)
+        return y, sr, self.cache.load_peaks(path, y, sr)
+
+    def _on_done(self, path, future):
+        with self._lock:
+            self._pending.pop(path, None)
+        if future.cancelled() or future.exception() is not None or future.result() is None:
+            return
+        y, sr = future.result()
+        self._make_resident(path, y, sr)
+
+    def _make_resident(self, path, y, sr):
+        with self._lock:
+            if path in self._resident:
+                self._resident.move_to_end(path)
+                return
+            self._resident[path] = (y, sr)
+            self._resident_bytes += y.nbytes
+
+            # Drop the oldest signals once over budget, but always keep the newest
+            while self._resident_bytes > self.memory_budget and len(self._resident) > 1:
+                old_path, (old_y, _) = self._resident.popitem(last=False)
+                self._resident_bytes -= old_y.nbytes
+                self._peaks.pop(old_path, None)
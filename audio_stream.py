@@ -0,0 +1,281 @@
+import threading
+import time
+from collections import OrderedDict
+
+import audioread
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+
+from mp3_probe import probe_audio
+from peaks import PeakPyramidBuilder
+
+BLOCK_SECONDS = 2.0  # decoded audio handed over per block
+STREAMING_MIN_DURATION = 15 * 60  # seconds; longer recordings are never decoded whole
+WINDOW_SECONDS = 10.0  # analysis audio decoded per on-demand window
+MAX_WINDOWS = 12  # decoded windows kept per streaming source
+WINDOW_OVERLAP_SECONDS = 0.1  # extra audio resampled on each side of a window, then trimmed
+
+
+def probe_duration(file_path):
+    """Return the duration reported by the file header in seconds, or None"""
+    info = probe_audio(file_path)
+    return info.duration if info else None
+
+
+def native_format(file_path):
+    """Return (sr, channels, seekable) of a file without decoding it
+
+    seekable is True when libsndfile reads the format, so any window of it
+    can be decoded directly; other formats go through audioread, which can
+    only decode from the start.
+    """
+    try:
+        info = sf.info(file_path)
+        return info.samplerate, info.channels, True
+    except Exception:
+        pass
+    with audioread.audio_open(file_path) as f:
+        return f.samplerate, f.channels, False
+
+
+def iter_decoded_blocks(file_path, block_seconds=BLOCK_SECONDS, mono=True):
+    """Yield (block, sr) pairs of float32 audio decoded block by block
+
+    Uses libsndfile when it can read the format and falls back to audioread
+    (ffmpeg/gstreamer) otherwise, the same backends librosa.load uses. Blocks
+    are down-mixed to mono by averaging channels, matching librosa.load; with
+    mono=False they keep every channel and are shaped (frames, channels).
+    """
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        info = None
+
+    if info is not None:
+        blocksize = max(1, int(info.samplerate * block_seconds))
+        for block in sf.blocks(file_path, blocksize=blocksize, dtype="float32", always_2d=True):
+            yield (block.mean(axis=1, dtype=np.float32) if mono else block), info.samplerate
+        return
+
+    with audioread.audio_open(file_path) as f:
+        sr, channels = f.samplerate, f.channels
+        block_frames = max(1, int(sr * block_seconds))
+        pending = []
+        pending_frames = 0
+        for buf in f:
+            frames = librosa.util.buf_to_float(buf, n_bytes=2, dtype=np.float32)
+            frames = frames.reshape(-1, channels)
+            if mono:
+                frames = frames.mean(axis=1, dtype=np.float32)
+            pending.append(frames)
+            pending_frames += len(frames)
+            if pending_frames >= block_frames:
+                yield np.concatenate(pending), sr
+                pending = []
+                pending_frames = 0
+        if pending:
+            yield np.concatenate(pending), sr
+
+
+def read_native_window(file_path, start_time, end_time):
+    """Decode [start_time, end_time) of a file at its native rate and channel count
+
+    Returns (data, sr) with data shaped (frames, channels). Formats libsndfile
+    reads are decoded from start_time on; others are decoded from the start
+    of the file through audioread, up to end_time.
+    """
+    try:
+        f = sf.SoundFile(file_path)
+    except Exception:
+        return _read_decoded_window(file_path, start_time, end_time)
+    with f:
+        sr = f.samplerate
+        start = max(0, int(round(start_time * sr)))
+        frames = max(0, int(round(end_time * sr)) - start)
+        f.seek(start)
+        return f.read(frames, dtype="float32", always_2d=True), sr
+
+
+def _read_decoded_window(file_path, start_time, end_time):
+    parts = []
+    position = 0
+    sr = None
+    for block, sr in iter_decoded_blocks(file_path, mono=False):
+        start = max(0, int(round(start_time * sr)))
+        stop = int(round(end_time * sr))
+        lo, hi = max(start, position), min(stop, position + len(block))
+        if hi > lo:
+            parts.append(block[lo - position:hi - position])
+        position += len(block)
+        if position >= stop:
+            break
+    if sr is None:
+        raise ValueError("No audio data could be decoded")
+    if not parts:
+        return np.zeros((0, block.shape[1]), dtype=np.float32), sr
+    return np.concatenate(parts), sr
+
+
+def export_segment(file_path, start_time, end_time, out_path):
+    """Write [start_time, end_time) of file_path to out_path at native quality"""
+    data, sr = read_native_window(file_path, start_time, end_time)
+    sf.write(out_path, data, sr)
+
+
+class StreamingAudioSource:
+    """Analysis-rate view of a long recording, decoded window by window
+
+    Behaves like the 1-D float32 signal of a fully loaded file for len() and
+    slicing, so the taggers can use it as self.y, but only the windows that are
+    actually looked at are decoded, and at most MAX_WINDOWS of them are kept.
+    The whole file is never held in memory. Created with the native sample
+    rate as analysis_sr and mono=False, it keeps every channel, shaped
+    (frames, channels) like the cached signal, and serves as the playback
+    signal of a long recording.
+    """
+
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, file_path, analysis_sr, num_samples=0, mono=True):
+        native_sr, channels, _ = native_format(file_path)
+        self.file_path = file_path
+        self.sr = analysis_sr
+        self.native_sr = native_sr
+        self.channels = 1 if mono else channels
+        self.ndim = 1 if self.channels == 1 else 2
+        self.num_samples = num_samples
+        self.window_samples = int(WINDOW_SECONDS * analysis_sr)
+        self._windows = OrderedDict()  # window index -> analysis samples
+        self._prefetching = set()  # window indices being decoded in the background
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.num_samples
+
+    @property
+    def shape(self):
+        return (self.num_samples,) if self.ndim == 1 else (self.num_samples, self.channels)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.num_samples)
+            data = self.read(start, stop)
+            return data[::step] if step != 1 else data
+        index = int(key)
+        if index < 0:
+            index += self.num_samples
+        if not 0 <= index < self.num_samples:
+            raise IndexError("sample index out of range")
+        return self.read(index, index + 1)[0]
+
+    def read(self, start, stop):
+        """Return analysis samples [start, stop) as a new array"""
+        start = max(0, start)
+        stop = min(self.num_samples, stop)
+        if stop <= start:
+            return np.zeros((0, *self.shape[1:]), dtype=np.float32)
+
+        out = np.empty((stop - start, *self.shape[1:]), dtype=np.float32)
+        first = start // self.window_samples
+        last = (stop - 1) // self.window_samples
+        for index in range(first, last + 1):
+            window = self._window(index)
+            window_start = index * self.window_samples
+            lo = max(start, window_start)
+            hi = min(stop, window_start + self.window_samples)
+            out[lo - start:hi - start] = window[lo - window_start:hi - window_start]
+        return out
+
+    def prefetch(self, start, stop):
+        """Decode the windows covering samples [start, stop) in the background
+
+        Lets playback read ahead without ever waiting for a decode.
+        """
+        stop = min(self.num_samples, stop)
+        if stop <= start:
+            return
+        with self._lock:
+            missing = [
+                index for index in range(start // self.window_samples, (stop - 1) // self.window_samples + 1)
+                if index not in self._windows and index not in self._prefetching
+            ]
+            self._prefetching.update(missing)
+        if missing:
+            threading.Thread(target=self._prefetch_windows, args=(missing,),
+                             name="stream-prefetch", daemon=True).start()
+
+    def read_native(self, start_time, end_time):
+        """Decode a time range at the native rate, e.g. for segment export"""
+        return read_native_window(self.file_path, start_time, end_time)
+
+    def scan(self, cancel_event=None, on_progress=None, progress_interval=0.25):
+        """Decode the whole file once, building its peak pyramid with bounded memory
+
+        Sets the length of the source as it goes and calls on_progress(builder)
+        at most every progress_interval seconds. Returns the finished
+        PeakPyramid, or None if cancel_event was set.
+        """
+        builder = PeakPyramidBuilder(self.sr)
+        resampler = None  # one stream for the whole file, so block edges leave no artifacts
+        last_progress = 0.0
+        for block, native_sr in iter_decoded_blocks(self.file_path):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if native_sr != self.sr:
+                if resampler is None:
+                    resampler = soxr.ResampleStream(native_sr, self.sr, 1, dtype="float32")
+                block = resampler.resample_chunk(block)
+            builder.add(block)
+            self.num_samples = builder.num_samples
+
+            now = time.monotonic()
+            if on_progress is not None and now - last_progress >= progress_interval:
+                last_progress = now
+                on_progress(builder)
+        if resampler is not None:
+            builder.add(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+            self.num_samples = builder.num_samples
+        return builder.build()
+
+    def _window(self, index):
+        with self._lock:
+            if index in self._windows:
+                self._windows.move_to_end(index)
+                return self._windows[index]
+
+        window = self._decode_window(index)
+
+        with self._lock:
+            self._windows[index] = window
+            while len(self._windows) > MAX_WINDOWS:
+                self._windows.popitem(last=False)
+        return window
+
+    def _prefetch_windows(self, indices):
+        try:
+            for index in indices:
+                self._window(index)
+        finally:
+            with self._lock:
+                self._prefetching.difference_update(indices)
+
+    def _decode_window(self, index):
+        start_time = index * self.window_samples / self.sr
+        end_time = start_time + self.window_samples / self.sr
+        # Windows are resampled with some audio of their neighbours, trimmed
+        # afterwards, so there are no filter edge effects at window borders
+        read_start = max(0.0, start_time - WINDOW_OVERLAP_SECONDS)
+        data, native_sr = read_native_window(self.file_path, read_start, end_time + WINDOW_OVERLAP_SECONDS)
+        if self.ndim == 1:
+            data = data.mean(axis=1, dtype=np.float32) if len(data) else np.zeros(0, dtype=np.float32)
+        if native_sr != self.sr and len(data):
+            data = librosa.resample(data, orig_sr=native_sr, target_sr=self.sr, axis=0)
+        offset = int(round((start_time - read_start) * self.sr))
+
+        # Resampling may be off by a sample or two; pin the window length
+        window = np.zeros((self.window_samples, *self.shape[1:]), dtype=np.float32)
+        data = data[offset:offset + self.window_samples]
+        window[:len(data)] = data
+        return window
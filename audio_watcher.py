@@ -0,0 +1,236 @@
+import os
+import queue
+import threading
+import time
+
+from audio_catalog import AUDIO_EXTENSIONS
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Without watchdog the directory is rescanned periodically
+    FileSystemEventHandler = object
+    Observer = None
+
+POLL_SECONDS = 2.0  # rescan interval when no native watcher is available
+SETTLE_SECONDS = 1.0  # a new file is reported once its size and mtime stop changing this long
+SETTLE_CHECK_SECONDS = 0.5  # how often files still being written are checked
+DELIVER_MS = 250  # how often the Tk thread picks up changes
+
+
+def is_audio_file(path):
+    """Check whether path has one of the audio extensions the taggers read"""
+    return path.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def file_signature(path):
+    """(size, mtime_ns) of a file, or None if it is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def snapshot(audio_dir):
+    """{path: (size, mtime_ns)} of every audio file under audio_dir"""
+    files = {}
+    for root, dirs, names in os.walk(audio_dir):
+        for name in names:
+            if is_audio_file(name):
+                path = os.path.join(root, name)
+                signature = file_signature(path)
+                if signature is not None:
+                    files[path] = signature
+    return files
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events for audio files to a DirectoryWatcher"""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher._candidate(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher._candidate(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.watcher._gone(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher._moved(event.src_path, event.dest_path)
+
+
+class DirectoryWatcher:
+    """Reports audio files added, removed or renamed under a directory
+
+    Uses watchdog (inotify on Linux) when it is installed and otherwise
+    rescans the directory every poll_seconds, matching a vanished file
+    with a new one of the same size and mtime as a rename. Either way the
+    files already cataloged are reconciled with the directory when
+    watching starts.
+
+    A new file is only reported once it has stopped changing for
+    SETTLE_SECONDS, so a download still being written is not picked up
+    half-finished. Changes are delivered in order on the Tk thread as
+    on_changes(events), with events ("added", path), ("removed", path),
+    ("modified", path) and ("moved", old_path, new_path).
+    """
+
+    def __init__(self, root, audio_dir, on_changes, poll_seconds=POLL_SECONDS):
+        self.root = root
+        self.audio_dir = audio_dir
+        self.on_changes = on_changes
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._known = {}  # path -> signature of every file reported or cataloged
+        self._settling = {}  # path -> (signature, time it last changed, event) of changes not reported yet
+        self._events = queue.Queue()
+        self._stop = threading.Event()
+        self._observer = None
+
+    @property
+    def native(self):
+        """Whether changes come from OS notifications rather than rescans"""
+        return self._observer is not None
+
+    def start(self, known_files=()):
+        """Start watching; known_files are the files the caller has already cataloged
+
+        known_files may map paths to the (size, mtime_ns) they were cataloged
+        with, and files whose signature differs are then reported as modified.
+        """
+        if hasattr(known_files, "items"):
+            self._known = dict(known_files)
+        else:
+            self._known = dict.fromkeys(known_files)
+        if Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_EventHandler(self), self.audio_dir, recursive=True)
+                observer.start()
+                self._observer = observer
+            except OSError:
+                self._observer = None  # e.g. out of inotify watches; rescanning still works
+        threading.Thread(target=self._run, name="directory-watch", daemon=True).start()
+        self.root.after(DELIVER_MS, self._deliver)
+
+    def stop(self):
+        """Stop watching; changes not delivered yet are dropped"""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _run(self):
+        # Catch up with changes made since the caller's scan, then keep watching
+        self._scan()
+        last_scan = time.monotonic()
+        while not self._stop.wait(SETTLE_CHECK_SECONDS):
+            if self._observer is None and time.monotonic() - last_scan >= self.poll_seconds:
+                self._scan()
+                last_scan = time.monotonic()
+            self._settle()
+
+    def _scan(self):
+        current = snapshot(self.audio_dir)
+        now = time.monotonic()
+        with self._lock:
+            gone = [path for path in self._known if path not in current]
+            fresh = {path: signature for path, signature in current.items()
+                     if path not in self._known and path not in self._settling}
+
+            # A file that disappeared while one with the same size and mtime appeared was renamed
+            by_signature = {}
+            for path, signature in fresh.items():
+                by_signature.setdefault(signature, []).append(path)
+            for old_path in gone:
+                matches = by_signature.get(self._known[old_path])
+                if matches:
+                    new_path = matches.pop(0)
+                    del fresh[new_path]
+                    self._known[new_path] = self._known.pop(old_path)
+                    self._events.put(("moved", old_path, new_path))
+                else:
+                    del self._known[old_path]
+                    self._events.put(("removed", old_path))
+
+            for path, signature in fresh.items():
+                self._settling[path] = (signature, now, "added")
+            for path, known in self._known.items():
+                signature = current.get(path)
+                if signature is None or signature == known:
+                    continue
+                if known is None:
+                    self._known[path] = signature  # Cataloged without a signature
+                elif path not in self._settling:
+                    self._settling[path] = (signature, now, "modified")
+
+    def _settle(self):
+        now = time.monotonic()
+        with self._lock:
+            candidates = list(self._settling.items())
+        for path, (signature, since, event) in candidates:
+            current = file_signature(path)
+            with self._lock:
+                if self._settling.get(path) != (signature, since, event):
+                    continue  # Changed by an event meanwhile
+                if current is None:
+                    del self._settling[path]
+                elif current != signature:
+                    self._settling[path] = (current, now, event)
+                elif now - since >= SETTLE_SECONDS:
+                    del self._settling[path]
+                    known = self._known.get(path)
+                    self._known[path] = current
+                    if event == "added" or known not in (None, current):
+                        self._events.put((event, path))
+
+    def _candidate(self, path):
+        if not is_audio_file(path):
+            return
+        with self._lock:
+            event = "modified" if path in self._known else "added"
+            self._settling[path] = (None, time.monotonic(), event)
+
+    def _gone(self, path):
+        with self._lock:
+            self._settling.pop(path, None)
+            if path in self._known:
+                del self._known[path]
+                self._events.put(("removed", path))
+
+    def _moved(self, old_path, new_path):
+        with self._lock:
+            known = old_path in self._known
+            self._settling.pop(old_path, None)
+            if known and is_audio_file(new_path):
+                self._known[new_path] = self._known.pop(old_path)
+                self._events.put(("moved", old_path, new_path))
+                return
+            if known:
+                del self._known[old_path]
+                self._events.put(("removed", old_path))
+        # e.g. a finished download renamed from its temporary name
+        if not known:
+            self._candidate(new_path)
+
+    def _deliver(self):
+        if self._stop.is_set():
+            return
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        if events:
+            self.on_changes(events)
+        self.root.after(DELIVER_MS, self._deliver)
@@ -0,0 +1,300 @@
+import tkinter as tk
+
+import numpy as np
+
+WAVEFORM_COLOR = '#1f77b4'
+RMS_COLOR = '#6baed6'
+SELECTION_COLOR = '#4CAF50'
+CURSOR_COLOR = 'red'
+BACKGROUND_COLOR = '#ffffff'
+SPECTROGRAM_HEIGHT = 96  # pixels of the spectrogram lane at the bottom
+
+# Colour map for spectrogram levels 0-255, interpolated between magma-like anchors
+_SPECTROGRAM_LUT = np.stack([
+    np.interp(np.linspace(0, 1, 256), np.linspace(0, 1, 5), channel)
+    for channel in zip((0, 0, 4), (81, 18, 124), (183, 55, 121), (252, 137, 97), (252, 253, 191))
+], axis=1).astype(np.uint8)
+
+
+def _blend(color, alpha, background=BACKGROUND_COLOR):
+    """Opaque colour that looks like color drawn with alpha over background
+
+    Tk canvas items have no transparency, so translucent fills are faked
+    by drawing them underneath the waveform in a lightened colour.
+    """
+    fg = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+    bg = [int(background[i:i + 2], 16) for i in (1, 3, 5)]
+    return '#%02x%02x%02x' % tuple(round(f * alpha + b * (1 - alpha)) for f, b in zip(fg, bg))
+
+
+class CanvasWaveformView:
+    """Waveform, tagged regions, selection and playback cursor as tk.Canvas items
+
+    A lighter alternative to MatplotlibWaveformView with the same interface
+    that never imports matplotlib. The envelope is one polygon built from
+    the per-pixel min/max buckets of the peak pyramid, and every other
+    element is a single canvas item, so any update is a coords() call and
+    Tk only repaints what changed.
+    """
+
+    def __init__(self, master, on_press=None, on_drag=None, on_release=None, on_resize=None, on_zoom=None):
+        self.on_press = on_press
+        self.on_drag = on_drag
+        self.on_release = on_release
+        self.on_resize = on_resize
+        self.on_zoom = on_zoom
+
+        self.canvas = tk.Canvas(master, background=BACKGROUND_COLOR, highlightthickness=0, height=400)
+        self.widget = self.canvas
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        # View range and the data currently shown
+        self.start = 0.0
+        self.end = 1.0
+        self.y_max = 1.0
+        self._envelope = None  # (times, mins, maxs, rms) from PeakPyramid.envelope
+        self._regions = []
+        self._region_items = []
+        self._selection = (None, None)
+        self._drag_region = (None, None)
+        self._cursor = (0.0, False)
+        self._spectrogram = None  # (image, start, end) shown in the lane
+        self._spectrogram_visible = False
+        self._photo = None  # Tk keeps no reference to images itself
+        self._width = 0
+
+        # Items in stacking order: regions are inserted below the selection
+        c = self.canvas
+        self.drag_rect = c.create_rectangle(0, 0, 0, 0, width=2, state=tk.HIDDEN)
+        self.selection_rect = c.create_rectangle(
+            0, 0, 0, 0, fill=_blend(SELECTION_COLOR, 0.2), width=0, state=tk.HIDDEN
+        )
+        self.zero_line = c.create_line(0, 0, 0, 0, fill='#d0d0d0')
+        self.envelope_poly = c.create_polygon(0, 0, 0, 0, 0, 0, fill=WAVEFORM_COLOR, outline='', state=tk.HIDDEN)
+        self.rms_poly = c.create_polygon(0, 0, 0, 0, 0, 0, fill=RMS_COLOR, outline='', state=tk.HIDDEN)
+        self.sample_line = c.create_line(0, 0, 0, 0, fill=WAVEFORM_COLOR, state=tk.HIDDEN)
+        self.selection_start_line = c.create_line(0, 0, 0, 0, fill=SELECTION_COLOR, dash=(4, 2), state=tk.HIDDEN)
+        self.selection_end_line = c.create_line(0, 0, 0, 0, fill=SELECTION_COLOR, dash=(4, 2), state=tk.HIDDEN)
+        self.cursor_line = c.create_line(0, 0, 0, 0, fill=CURSOR_COLOR, width=2, state=tk.HIDDEN)
+        self.spectrogram_item = c.create_image(0, 0, anchor=tk.NW, state=tk.HIDDEN)
+        self.placeholder = c.create_text(0, 0, text='No audio loaded', font=("Arial", 14), fill='#808080')
+
+        c.bind('<Configure>', self._on_configure)
+        c.bind('<ButtonPress-1>', self._on_press)
+        c.bind('<B1-Motion>', self._on_motion)
+        c.bind('<ButtonRelease-1>', self._on_release)
+        # Windows and macOS report wheel deltas; X11 reports buttons 4 and 5
+        c.bind('<MouseWheel>', self._on_wheel)
+        c.bind('<Button-4>', lambda event: self._zoom(event, 1))
+        c.bind('<Button-5>', lambda event: self._zoom(event, -1))
+
+    def pixel_width(self):
+        """Width of the plotting area in pixels"""
+        width = self.canvas.winfo_width()
+        if width <= 1:  # Not mapped yet
+            width = self.canvas.winfo_reqwidth()
+        return max(1, width)
+
+    def set_waveform(self, times, mins, maxs, rms, start, end, y_max):
+        """Show an envelope from PeakPyramid.envelope over the time range [start, end]"""
+        self.start, self.end, self.y_max = start, max(end, start + 1e-9), y_max
+        self._envelope = (times, mins, maxs, rms)
+        self.canvas.itemconfigure(self.placeholder, state=tk.HIDDEN)
+        self._layout()
+
+    def set_regions(self, regions):
+        """Show tagged regions given as (start, end, label, tag, color) tuples"""
+        regions = list(regions)
+        if regions == self._regions:
+            return
+        self._regions = regions
+
+        c = self.canvas
+        for items in self._region_items:
+            for item in items:
+                c.delete(item)
+        self._region_items = []
+
+        for start, end, label, tag, color in regions:
+            rect = c.create_rectangle(0, 0, 0, 0, fill=_blend(color, 0.3), width=0)
+            c.tag_lower(rect, self.selection_rect)
+            tag_text = c.create_text(0, 0, text=tag, font=("Arial", 7), anchor=tk.N)
+            label_text = c.create_text(0, 0, text=label, font=("Arial", 8), anchor=tk.N)
+            for text in (tag_text, label_text):
+                c.tag_lower(text, self.selection_start_line)
+            self._region_items.append((rect, tag_text, label_text))
+        self._layout_regions()
+
+    def set_spectrogram_visible(self, visible):
+        """Show or hide the spectrogram lane under the waveform"""
+        self._spectrogram_visible = visible
+        self._layout()
+
+    def set_spectrogram(self, image, start, end):
+        """Show a uint8 (mels, columns) spectrogram image over [start, end]; None blanks the lane"""
+        self._spectrogram = None if image is None else (image, start, end)
+        self._layout_spectrogram()
+
+    def set_selection(self, start, end):
+        """Move the selection overlay; None for either end hides it"""
+        self._selection = (start, end)
+        self._layout_selection()
+
+    def set_drag_region(self, start, end, color=None):
+        """Move the overlay of a region being resized; None for either end hides it"""
+        self._drag_region = (start, end)
+        if color is not None:
+            self.canvas.itemconfigure(self.drag_rect, fill=_blend(color, 0.3), outline=color)
+        self._layout_drag_region()
+
+    def set_cursor(self, position, visible=True):
+        """Move the playback cursor"""
+        self._cursor = (position, visible)
+        self._layout_cursor()
+
+    def redraw(self):
+        """Canvas items repaint themselves; nothing to render"""
+
+    def blit_overlays(self):
+        """Canvas items repaint themselves; nothing to blit"""
+
+    def _x(self, t):
+        return (np.asarray(t, dtype=np.float64) - self.start) * (self._width / (self.end - self.start))
+
+    def _wave_height(self):
+        """Height of the waveform area above the spectrogram lane"""
+        height = self.canvas.winfo_height()
+        return max(1, height - SPECTROGRAM_HEIGHT) if self._spectrogram_visible else height
+
+    def _y(self, value):
+        half = self._wave_height() / 2
+        return half - np.asarray(value, dtype=np.float64) * (half / self.y_max)
+
+    def _coords(self, item, xs, ys):
+        points = np.empty(2 * len(xs))
+        points[0::2] = xs
+        points[1::2] = ys
+        self.canvas.coords(item, *points.tolist())
+
+    def _layout(self):
+        self._width = self.pixel_width()
+        height = self._wave_height()
+        self.canvas.coords(self.placeholder, self._width / 2, height / 2)
+        self.canvas.coords(self.zero_line, 0, height / 2, self._width, height / 2)
+        self._layout_waveform()
+        self._layout_regions()
+        self._layout_selection()
+        self._layout_drag_region()
+        self._layout_cursor()
+        self._layout_spectrogram()
+
+    def _layout_waveform(self):
+        c = self.canvas
+        for item in (self.envelope_poly, self.rms_poly, self.sample_line):
+            c.itemconfigure(item, state=tk.HIDDEN)
+        if self._envelope is None or len(self._envelope[0]) < 2:
+            return
+
+        times, mins, maxs, rms = self._envelope
+        xs = self._x(times)
+        if rms is None:
+            # Zoomed in to individual samples
+            self._coords(self.sample_line, xs, self._y(mins))
+            c.itemconfigure(self.sample_line, state=tk.NORMAL)
+            return
+
+        band_x = np.concatenate([xs, xs[::-1]])
+        self._coords(self.envelope_poly, band_x, self._y(np.concatenate([maxs, mins[::-1]])))
+        self._coords(self.rms_poly, band_x, self._y(np.concatenate([rms, -rms[::-1]])))
+        c.itemconfigure(self.envelope_poly, state=tk.NORMAL)
+        c.itemconfigure(self.rms_poly, state=tk.NORMAL)
+
+    def _layout_regions(self):
+        height = self._wave_height()
+        for (start, end, _, _, _), (rect, tag_text, label_text) in zip(self._regions, self._region_items):
+            x0, x1 = self._x([start, end])
+            self.canvas.coords(rect, x0, 0, x1, height)
+            self.canvas.coords(tag_text, (x0 + x1) / 2, 2)
+            self.canvas.coords(label_text, (x0 + x1) / 2, 14)
+
+    def _layout_selection(self):
+        c = self.canvas
+        start, end = self._selection
+        items = (self.selection_rect, self.selection_start_line, self.selection_end_line)
+        if start is None or end is None:
+            for item in items:
+                c.itemconfigure(item, state=tk.HIDDEN)
+            return
+
+        height = self._wave_height()
+        x0, x1 = self._x([min(start, end), max(start, end)])
+        c.coords(self.selection_rect, x0, 0, x1, height)
+        c.coords(self.selection_start_line, x0, 0, x0, height)
+        c.coords(self.selection_end_line, x1, 0, x1, height)
+        for item in items:
+            c.itemconfigure(item, state=tk.NORMAL)
+
+    def _layout_drag_region(self):
+        start, end = self._drag_region
+        if start is None or end is None:
+            self.canvas.itemconfigure(self.drag_rect, state=tk.HIDDEN)
+            return
+        x0, x1 = self._x([min(start, end), max(start, end)])
+        self.canvas.coords(self.drag_rect, x0, 0, x1, self._wave_height())
+        self.canvas.itemconfigure(self.drag_rect, state=tk.NORMAL)
+
+    def _layout_cursor(self):
+        position, visible = self._cursor
+        x = float(self._x(position))
+        self.canvas.coords(self.cursor_line, x, 0, x, self._wave_height())
+        self.canvas.itemconfigure(self.cursor_line, state=tk.NORMAL if visible else tk.HIDDEN)
+
+    def _layout_spectrogram(self):
+        if not self._spectrogram_visible or self._spectrogram is None:
+            self.canvas.itemconfigure(self.spectrogram_item, state=tk.HIDDEN)
+            return
+
+        image, start, end = self._spectrogram
+        x0, x1 = (int(round(x)) for x in self._x([start, end]))
+        width = max(1, x1 - x0)
+        # Nearest-neighbour scaling to the lane, low frequencies at the bottom
+        rows = (len(image) - 1) - np.arange(SPECTROGRAM_HEIGHT) * len(image) // SPECTROGRAM_HEIGHT
+        cols = np.arange(width) * image.shape[1] // width
+        rgb = _SPECTROGRAM_LUT[image[rows][:, cols]]
+        ppm = b'P6 %d %d 255\n' % (width, SPECTROGRAM_HEIGHT) + rgb.tobytes()
+        self._photo = tk.PhotoImage(data=ppm, format='PPM')
+        self.canvas.itemconfigure(self.spectrogram_item, image=self._photo, state=tk.NORMAL)
+        self.canvas.coords(self.spectrogram_item, x0, self._wave_height())
+
+    def _time_at(self, x):
+        return self.start + x * (self.end - self.start) / max(1, self._width)
+
+    def _on_configure(self, event):
+        resized = event.width != self._width
+        self._layout()
+        if resized and self.on_resize:
+            # Let the owner fetch an envelope with one bucket per new pixel
+            self.on_resize()
+
+    def _on_press(self, event):
+        if self._envelope is not None and self.on_press:
+            self.on_press(self._time_at(event.x), bool(event.state & 0x0001))
+
+    def _on_motion(self, event):
+        if self._envelope is not None and self.on_drag:
+            self.on_drag(self._time_at(event.x))
+
+    def _on_release(self, event):
+        if self._envelope is not None and self.on_release:
+            self.on_release(self._time_at(event.x))
+
+    def _on_wheel(self, event):
+        if not event.delta:
+            return
+        # Windows reports multiples of 120 per notch, macOS small counts
+        steps = event.delta / 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self._zoom(event, steps)
+
+    def _zoom(self, event, steps):
+        if self._envelope is not None and self.on_zoom:
+            self.on_zoom(self._time_at(event.x), steps)
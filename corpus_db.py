@@ -0,0 +1,428 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from audio_cache import DEFAULT_CACHE_DIR
+from audio_catalog import AudioKey, parse_audio_key
+
+DEFAULT_DB_PATH = os.path.join(DEFAULT_CACHE_DIR, "corpus.sqlite3")
+
+# Tagging status of a verse
+STATUS_UNTAGGED = "untagged"
+STATUS_PARTIAL = "partial"  # some of its words have a segment
+STATUS_COMPLETE = "complete"  # every word has a segment
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio_files (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    duration REAL,
+    chapter INTEGER,
+    verse INTEGER,
+    variant TEXT
+);
+CREATE INDEX IF NOT EXISTS audio_files_directory ON audio_files (directory, chapter, verse, variant);
+CREATE TABLE IF NOT EXISTS verse_sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verses (
+    source TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    shloka TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (source, chapter, shloka)
+);
+CREATE INDEX IF NOT EXISTS verses_position ON verses (source, position);
+CREATE TABLE IF NOT EXISTS tag_status (
+    source TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    shloka TEXT NOT NULL,
+    status TEXT NOT NULL,
+    segments INTEGER NOT NULL,
+    synonyms_tagged INTEGER NOT NULL,
+    synonyms_total INTEGER NOT NULL,
+    filename TEXT,
+    updated REAL,
+    PRIMARY KEY (source, chapter, shloka)
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+# A changed file keeps its row but loses the duration and hash computed from its old contents
+_UPSERT_AUDIO_FILE = (
+    "INSERT INTO audio_files (path, directory, size, mtime_ns, chapter, verse, variant) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (path) DO UPDATE SET directory = excluded.directory, "
+    "chapter = excluded.chapter, verse = excluded.verse, variant = excluded.variant, "
+    "duration = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN duration END, "
+    "content_hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN content_hash END, "
+    "size = excluded.size, mtime_ns = excluded.mtime_ns"
+)
+
+
+def content_hash(path):
+    """BLAKE2b digest of a file's contents as hex"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def verse_tag_status(verse):
+    """Return (status, segments, synonyms_tagged, synonyms_total) of a verse dict
+
+    A word counts as tagged when a segment refers to it (word_ref or label)
+    or it still has a legacy synonym timestamp.
+    """
+    segments = verse.get("segments") or []
+    synonyms = verse.get("synonyms") or {}
+    covered = {segment.get("word_ref") or segment.get("label") for segment in segments}
+    tagged = sum(1 for word, data in synonyms.items()
+                 if word in covered or (isinstance(data, dict) and data.get("timestamp")))
+
+    if synonyms:
+        if tagged == len(synonyms):
+            status = STATUS_COMPLETE
+        else:
+            status = STATUS_PARTIAL if tagged or segments else STATUS_UNTAGGED
+    else:
+        status = STATUS_COMPLETE if segments else STATUS_UNTAGGED
+    return status, len(segments), tagged, len(synonyms)
+
+
+def verse_numbers(shloka):
+    """Verse numbers covered by a shloka field, e.g. [16, 17, 18] for "16-18"; [] if it is not numeric"""
+    first, _, last = str(shloka).partition("-")
+    try:
+        first = int(first)
+        last = int(last) if last else first
+    except ValueError:
+        return []
+    return list(range(first, last + 1))
+
+
+def carry_tagging(old, verse):
+    """Fill in the segments and legacy timestamps of a stored verse where a newly read copy of it has none
+
+    The verse file is the source of truth: a verse with any segment or
+    timestamp in the file keeps exactly those.
+    """
+    synonyms = verse.get("synonyms") or {}
+    if verse.get("segments") or any(isinstance(data, dict) and data.get("timestamp") for data in synonyms.values()):
+        return
+    if old.get("segments"):
+        verse["segments"] = old["segments"]
+    old_synonyms = old.get("synonyms") or {}
+    for word, data in synonyms.items():
+        # List-style files store a synonym as a plain meaning string
+        old_data = old_synonyms.get(word)
+        if isinstance(old_data, dict) and old_data.get("timestamp") and isinstance(data, dict):
+            data["timestamp"] = old_data["timestamp"]
+
+
+class CorpusDatabase:
+    """SQLite catalog of audio files, verse data and per-verse tagging status
+
+    Audio rows hold path, size, mtime, content hash, duration and the parsed
+    chapter/verse/variant of every file of a directory, so opening a known
+    directory is one indexed query instead of a walk, a regex per file and a
+    header probe per file. Rows are kept in sync one file at a time as the
+    directory watcher reports changes.
+
+    Verses are imported from each verse JSON file (gita.json, tags.json, ...)
+    once per version of that file and kept per file; after that they are
+    read from the database. The file stays the source of truth: saving
+    writes the verses back to it, and the database only fills in segments
+    for verses that have none in a new version of the file. Edits that are
+    not saved only update the tagging status, so they are gone, and the
+    status recomputed, the next time the file is opened. Status rows are
+    kept per verse file as well.
+
+    One connection is shared between threads and serialized with a lock.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ====== Audio files ======
+
+    def audio_files(self, directory):
+        """Return [(path, AudioKey or None, duration or None, (size, mtime_ns))] of a directory"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, chapter, verse, variant, duration, size, mtime_ns "
+                "FROM audio_files WHERE directory = ?", (os.path.abspath(directory),)
+            ).fetchall()
+        return [
+            (path, AudioKey(chapter, verse, variant) if chapter is not None else None,
+             duration, (size, mtime_ns))
+            for path, chapter, verse, variant, duration, size, mtime_ns in rows
+        ]
+
+    def replace_directory(self, directory, files):
+        """Catalog the files of a full scan of directory, keeping durations and hashes of unchanged files"""
+        directory = os.path.abspath(directory)
+        rows = [row for row in (self._file_row(directory, path) for path in files) if row is not None]
+        with self._lock, self._db:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS scanned (path TEXT PRIMARY KEY)")
+            self._db.execute("DELETE FROM scanned")
+            self._db.executemany("INSERT OR IGNORE INTO scanned VALUES (?)", [(row[0],) for row in rows])
+            self._db.execute(
+                "DELETE FROM audio_files WHERE directory = ? AND path NOT IN (SELECT path FROM scanned)",
+                (directory,)
+            )
+            self._db.executemany(_UPSERT_AUDIO_FILE, rows)
+
+    def add_file(self, directory, path):
+        """Catalog a new or changed file; a changed file loses its duration and hash"""
+        row = self._file_row(os.path.abspath(directory), path)
+        if row is None:
+            return
+        with self._lock, self._db:
+            self._db.execute(_UPSERT_AUDIO_FILE, row)
+
+    def remove_file(self, path):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM audio_files WHERE path = ?", (path,))
+            self._db.execute("DELETE FROM fingerprints WHERE path = ?", (path,))
+
+    def rename_file(self, old_path, new_path):
+        """Move a row to a file's new name; its content, and so duration and hash, are unchanged"""
+        key = parse_audio_key(new_path)
+        chapter, verse, variant = key if key is not None else (None, None, None)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM audio_files WHERE path = ?", (new_path,))
+            self._db.execute(
+                "UPDATE audio_files SET path = ?, chapter = ?, verse = ?, variant = ? WHERE path = ?",
+                (new_path, chapter, verse, variant, old_path)
+            )
+            self._db.execute("DELETE FROM fingerprints WHERE path = ?", (new_path,))
+            self._db.execute("UPDATE fingerprints SET path = ? WHERE path = ?", (new_path, old_path))
+
+    def set_durations(self, durations):
+        """Store {path: seconds} read from file headers"""
+        with self._lock, self._db:
+            self._db.executemany("UPDATE audio_files SET duration = ? WHERE path = ?",
+                                 [(duration, path) for path, duration in durations.items()])
+
+    def hash_missing(self, directory):
+        """Compute the content hash of every file of directory that has none (slow; run in a thread)
+
+        Files cataloged while this runs are hashed before it returns.
+        """
+        skipped = set()
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT path, size, mtime_ns FROM audio_files WHERE directory = ? AND content_hash IS NULL",
+                    (os.path.abspath(directory),)
+                ).fetchall()
+            rows = [row for row in rows if row[0] not in skipped]
+            if not rows:
+                return
+            for path, size, mtime_ns in rows:
+                try:
+                    digest = content_hash(path)
+                except OSError:
+                    skipped.add(path)
+                    continue
+                with self._lock, self._db:
+                    # Only if the file was not replaced while it was read
+                    updated = self._db.execute(
+                        "UPDATE audio_files SET content_hash = ? WHERE path = ? AND size = ? AND mtime_ns = ?",
+                        (digest, path, size, mtime_ns)
+                    ).rowcount
+                if not updated:
+                    skipped.add(path)  # Changed meanwhile; hashed once the watcher reports it
+
+    # ====== Fingerprints ======
+
+    def fingerprints(self, paths):
+        """Return {path: (duration, fingerprint)} for the paths whose fingerprint is up to date"""
+        wanted = set(paths)
+        with self._lock:
+            rows = self._db.execute("SELECT path, size, mtime_ns, duration, data FROM fingerprints").fetchall()
+        result = {}
+        for path, size, mtime_ns, duration, data in rows:
+            if path in wanted and self._signature(path) == (size, mtime_ns):
+                result[path] = (duration, np.frombuffer(data, dtype=np.uint32).reshape(2, -1))
+        return result
+
+    def files_without_fingerprint(self, paths):
+        """Return the paths that have no fingerprint or one of an older version of the file"""
+        with self._lock:
+            stored = {path: (size, mtime_ns) for path, size, mtime_ns in
+                      self._db.execute("SELECT path, size, mtime_ns FROM fingerprints")}
+        return [path for path in paths if stored.get(path) is None or stored[path] != self._signature(path)]
+
+    def store_fingerprint(self, path, duration, fingerprint, signature=None):
+        """Store the (2, pairs) uint32 fingerprint of a file, stamped with the size and mtime it was computed from"""
+        signature = signature or self._signature(path)
+        if signature is None:
+            return
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                (path, *signature, float(duration), np.ascontiguousarray(fingerprint, dtype=np.uint32).tobytes())
+            )
+
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _file_row(self, directory, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = parse_audio_key(path)
+        chapter, verse, variant = key if key is not None else (None, None, None)
+        return path, directory, stat.st_size, stat.st_mtime_ns, chapter, verse, variant
+
+    # ====== Verses and tagging status ======
+
+    def verses(self, json_file):
+        """Return the verses of json_file, importing it only if it changed since the last import
+
+        The tagging status of the returned verses is recomputed from them,
+        dropping the status of edits that were never saved.
+        """
+        source = os.path.abspath(json_file)
+        stat = os.stat(source)
+        with self._lock, self._db:
+            row = self._db.execute("SELECT size, mtime_ns FROM verse_sources WHERE path = ?", (source,)).fetchone()
+            if row is not None and tuple(row) == (stat.st_size, stat.st_mtime_ns):
+                rows = self._db.execute("SELECT data FROM verses WHERE source = ? ORDER BY position",
+                                        (source,)).fetchall()
+                verses = [json.loads(data) for data, in rows]
+                self._store_tag_status(source, verses)
+                return verses
+
+        with open(source, 'r', encoding='utf-8') as f:
+            verses = json.load(f)
+        self._import_verses(source, (stat.st_size, stat.st_mtime_ns), verses)
+        return verses
+
+    def save_verses(self, json_file, verses):
+        """Write verses back to json_file and store them as its current version
+
+        The file is replaced atomically, so a failed save leaves the old version in place.
+        """
+        source = os.path.abspath(json_file)
+        tmp_path = f"{source}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(verses, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, source)
+        stat = os.stat(source)
+        with self._lock, self._db:
+            self._store_verses(source, (stat.st_size, stat.st_mtime_ns), verses)
+
+    def record_tag_status(self, json_file, verse, filename=""):
+        """Update the tagging status of a verse of json_file, e.g. after an edit; returns the status tuple"""
+        status = verse_tag_status(verse)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tag_status VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(json_file), str(verse.get("chapter", "")), str(verse.get("shloka", "")),
+                 *status, filename, time.time())
+            )
+        return status
+
+    def tag_status(self, json_file, chapter, shloka):
+        """Return (status, segments, synonyms_tagged, synonyms_total) of a verse of json_file, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, segments, synonyms_tagged, synonyms_total FROM tag_status "
+                "WHERE source = ? AND chapter = ? AND shloka = ?",
+                (os.path.abspath(json_file), str(chapter), str(shloka))
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def file_tag_status(self, directory, json_file):
+        """Return {path: (status, segments, synonyms_tagged, synonyms_total)} of the files of a directory
+
+        A file takes the status of the verse of json_file its name was parsed
+        as; the files of a combined shloka such as 1.16-18 all share its
+        status. Files without a parsed verse, or whose verse is not imported,
+        are left out.
+        """
+        with self._lock:
+            statuses = self._db.execute(
+                "SELECT chapter, shloka, status, segments, synonyms_tagged, synonyms_total FROM tag_status "
+                "WHERE source = ?", (os.path.abspath(json_file),)
+            ).fetchall()
+            files = self._db.execute(
+                "SELECT path, chapter, verse FROM audio_files WHERE directory = ? AND chapter IS NOT NULL",
+                (os.path.abspath(directory),)
+            ).fetchall()
+        by_verse = {}
+        for chapter, shloka, *status in statuses:
+            try:
+                chapter = int(chapter)
+            except ValueError:
+                continue
+            for verse in verse_numbers(shloka):
+                by_verse[(chapter, verse)] = tuple(status)
+        return {path: by_verse[(chapter, verse)] for path, chapter, verse in files if (chapter, verse) in by_verse}
+
+    def _import_verses(self, source, signature, verses):
+        with self._lock, self._db:
+            # Tagging done in the tagger outlives a new version of the same verse file
+            stored = {(chapter, shloka): json.loads(data) for chapter, shloka, data in self._db.execute(
+                "SELECT chapter, shloka, data FROM verses WHERE source = ?", (source,)
+            )}
+            for verse in verses:
+                old = stored.get((str(verse.get("chapter", "")), str(verse.get("shloka", ""))))
+                if old is not None:
+                    carry_tagging(old, verse)
+            self._store_verses(source, signature, verses)
+
+    def _store_verses(self, source, signature, verses):
+        # Replace the stored version of a verse file; the caller holds the lock
+        self._store_tag_status(source, verses)
+        self._db.execute("DELETE FROM verses WHERE source = ?", (source,))
+        self._db.executemany(
+            "INSERT OR REPLACE INTO verses VALUES (?, ?, ?, ?, ?)",
+            [(source, str(verse.get("chapter", "")), str(verse.get("shloka", "")), position,
+              json.dumps(verse, ensure_ascii=False))
+             for position, verse in enumerate(verses)]
+        )
+        self._db.execute("INSERT OR REPLACE INTO verse_sources VALUES (?, ?, ?)", (source, *signature))
+
+    def _store_tag_status(self, source, verses):
+        # Status rows computed from the verse data itself; the caller holds the lock
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO tag_status VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+            [(source, str(verse.get("chapter", "")), str(verse.get("shloka", "")), *verse_tag_status(verse), now)
+             for verse in verses]
+        )
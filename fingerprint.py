@@ -0,0 +1,177 @@
+import os
+
+import librosa
+import numpy as np
+from scipy.ndimage import maximum_filter
+
+from audio_catalog import parse_audio_key
+from audio_stream import STREAMING_MIN_DURATION, probe_duration
+
+# Spectral peaks are taken from a log-magnitude STFT of the analysis-rate signal
+N_FFT = 1024
+HOP_LENGTH = 256  # 16 ms at the 16 kHz analysis rate
+MAX_BIN = 256  # peaks above this bin (4 kHz at 16 kHz) are ignored; fits in 8 bits
+PEAK_NEIGHBOURHOOD = (15, 9)  # (bins, frames) a peak has to be the maximum of
+PEAKS_PER_SECOND = 10  # strongest peaks kept
+FAN_OUT = 3  # later peaks each peak is paired with
+MAX_DELTA_FRAMES = 63  # pairs further apart than this are dropped; fits in 6 bits
+
+# Two recordings are duplicates when this fraction of their peak pairs line up at one time offset
+DUPLICATE_SIMILARITY = 0.1
+DURATION_TOLERANCE = 0.05  # and their lengths differ by at most this fraction
+OFFSET_SLACK_FRAMES = 1  # alignment error allowed between matching pairs
+CANDIDATE_SHARED = 0.3  # fraction of hashes two files must share to be compared in full
+MAX_POSTING = 32  # hashes found in more files than this are ignored when looking for candidates
+
+
+def compute_fingerprint(y, sr):
+    """Spectral peak pairs of a mono signal as a uint32 array (2, pairs)
+
+    Row 0 holds the hashes, sorted, and row 1 the frame of each pair's
+    first peak. A hash packs the frequency bins of two nearby peaks and the
+    number of frames between them, so it does not depend on where in the
+    file the pair occurs, on the overall gain or on the encoder's noise
+    floor; the frames let similarity() check that matching pairs also
+    occur in the same order.
+    """
+    if len(y) < N_FFT:
+        return np.zeros((2, 0), dtype=np.uint32)
+    spectrum = np.abs(librosa.stft(np.asarray(y, dtype=np.float32), n_fft=N_FFT, hop_length=HOP_LENGTH))
+    spectrum = librosa.amplitude_to_db(spectrum[:MAX_BIN], ref=np.max)
+
+    # Local maxima that stand out from the quiet parts of the file
+    is_peak = (spectrum == maximum_filter(spectrum, size=PEAK_NEIGHBOURHOOD)) & (spectrum > np.median(spectrum))
+    bins, frames = np.nonzero(is_peak)
+    strengths = spectrum[bins, frames]
+    keep = int(PEAKS_PER_SECOND * len(y) / sr)
+    if len(strengths) > keep:
+        strongest = np.argpartition(strengths, -keep)[-keep:]
+        bins, frames = bins[strongest], frames[strongest]
+
+    order = np.lexsort((bins, frames))
+    bins, frames = bins[order].astype(np.uint32), frames[order].astype(np.int64)
+    hashes, anchors = [], []
+    for offset in range(1, FAN_OUT + 1):
+        delta = frames[offset:] - frames[:-offset]
+        valid = (delta > 0) & (delta <= MAX_DELTA_FRAMES)
+        hashes.append((bins[:-offset][valid] << 14) | (bins[offset:][valid] << 6) | delta[valid].astype(np.uint32))
+        anchors.append(frames[:-offset][valid])
+    hashes, anchors = np.concatenate(hashes), np.concatenate(anchors)
+    order = np.argsort(hashes, kind="stable")
+    return np.stack([hashes[order], anchors[order].astype(np.uint32)])
+
+
+def similarity(a, b):
+    """Fraction of the peak pairs of the smaller fingerprint that match the other at one time offset
+
+    Unrelated recitations share plenty of hashes by chance, but at
+    scattered offsets; copies of one recording share them at the same
+    offset, which is how the two are told apart.
+    """
+    if a.shape[1] == 0 or b.shape[1] == 0:
+        return 0.0
+    _, in_a, in_b = np.intersect1d(a[0], b[0], return_indices=True)
+    if len(in_a) == 0:
+        return 0.0
+    offsets = b[1, in_b].astype(np.int64) - a[1, in_a].astype(np.int64)
+    votes = np.bincount(offsets - offsets.min())
+    votes = np.convolve(votes, np.ones(2 * OFFSET_SLACK_FRAMES + 1, dtype=np.int64), mode="same")
+    return votes.max() / min(len(np.unique(a[0])), len(np.unique(b[0])))
+
+
+def duplicate_groups(fingerprints):
+    """Group recordings with near-identical fingerprints
+
+    fingerprints maps path -> (duration, fingerprint). Candidate pairs come
+    from an inverted index of hashes, so only recordings that share a good
+    part of their hashes are compared in full, instead of every pair in
+    the corpus. Returns lists of at least two paths, canonical file first.
+    """
+    paths = sorted(fingerprints)
+    parent = list(range(len(paths)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in _candidate_pairs([np.unique(fingerprints[path][1][0]) for path in paths]):
+        (duration_i, fingerprint_i), (duration_j, fingerprint_j) = fingerprints[paths[i]], fingerprints[paths[j]]
+        if abs(duration_i - duration_j) > DURATION_TOLERANCE * max(duration_i, duration_j):
+            continue  # e.g. a short excerpt of a longer recording
+        if find(i) != find(j) and similarity(fingerprint_i, fingerprint_j) >= DUPLICATE_SIMILARITY:
+            parent[find(j)] = find(i)
+
+    groups = {}
+    for i, path in enumerate(paths):
+        groups.setdefault(find(i), []).append(path)
+    return [sorted(group, key=canonical_order) for group in groups.values() if len(group) > 1]
+
+
+def canonical_order(path):
+    """Sort key putting the file to keep first: a main recording with a parsable verse, then the shortest name"""
+    key = parse_audio_key(path)
+    return key is None, key is not None and key.variant != "", len(os.path.basename(path)), path
+
+
+def _candidate_pairs(hash_sets):
+    # Every (file, hash) entry sorted by hash; entries of one hash are adjacent
+    counts = np.array([len(hashes) for hashes in hash_sets], dtype=np.int64)
+    if len(hash_sets) < 2:
+        return []
+    hashes = np.concatenate(hash_sets)
+    files = np.repeat(np.arange(len(hash_sets)), counts)
+    order = np.argsort(hashes, kind="stable")
+    hashes, files = hashes[order], files[order]
+
+    # Hashes that nearly every recitation contains say nothing and are skipped
+    starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+    sizes = np.diff(np.r_[starts, len(hashes)])
+    common = np.repeat(sizes > MAX_POSTING, sizes)
+    counts = np.bincount(files[~common], minlength=len(hash_sets))
+
+    pairs = []
+    for distance in range(1, min(MAX_POSTING, len(hashes))):
+        same = (hashes[distance:] == hashes[:-distance]) & ~common[distance:]
+        if not same.any():
+            break
+        pairs.append(files[:-distance][same] * len(hash_sets) + files[distance:][same])
+    if not pairs:
+        return []
+    pairs, shared = np.unique(np.concatenate(pairs), return_counts=True)
+    first, second = np.divmod(pairs, len(hash_sets))
+    enough = shared >= CANDIDATE_SHARED * np.minimum(counts[first], counts[second])
+    return list(zip(first[enough].tolist(), second[enough].tolist()))
+
+
+def split_duplicates(groups):
+    """Return ({redundant path: canonical path}, groups that span several verses)
+
+    A copy filed under the same verse as the canonical recording (or under
+    no verse at all) is redundant. A group whose files are named after
+    different verses points at a misnamed file, so none of it is hidden.
+    """
+    redundant = {}
+    conflicts = []
+    for group in groups:
+        verses = {(key.chapter, key.verse) for key in map(parse_audio_key, group) if key is not None}
+        if len(verses) > 1:
+            conflicts.append(group)
+            continue
+        for path in group[1:]:
+            redundant[path] = group[0]
+    return redundant, conflicts
+
+
+def fingerprint_file(file_path, cache):
+    """Return (duration, fingerprint) of a file, decoding it through the cache
+
+    Recordings long enough to be streamed are not decoded whole and get an
+    empty fingerprint.
+    """
+    duration = probe_duration(file_path)
+    if duration and duration >= STREAMING_MIN_DURATION:
+        return duration, np.zeros((2, 0), dtype=np.uint32)
+    y, sr = cache.load_analysis(file_path)
+    return len(y) / sr, compute_fingerprint(y, sr)
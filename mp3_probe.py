@@ -0,0 +1,161 @@
+import os
+from collections import namedtuple
+
+import soundfile as sf
+
+AudioInfo = namedtuple("AudioInfo", ["duration", "bitrate", "sample_rate", "channels", "vbr"])
+
+# Bitrates in kbps indexed by [version_family][layer][bitrate_index]
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates indexed by the header's version bits
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],   # MPEG 2.5
+}
+
+_HEADER_SEARCH_BYTES = 64 * 1024  # how far past the ID3 tag to look for the first frame
+
+
+def _parse_frame_header(header):
+    """Decode a 4-byte MPEG audio frame header, or return None if it is invalid"""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sr_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sr_index == 3:
+        return None  # Reserved values, or free-format bitrate we cannot size
+
+    layer = 4 - layer_bits
+    family = 1 if version_bits == 3 else 2
+    bitrate = _BITRATES[(family, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sr_index]
+    padding = (header[2] >> 1) & 0x01
+    channels = 1 if (header[3] >> 6) == 3 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and family == 2:
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+
+    return {
+        "family": family,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "samples_per_frame": samples_per_frame,
+        "frame_length": frame_length,
+    }
+
+
+def _skip_id3v2(f):
+    """Return the offset of the first byte after any ID3v2 tags"""
+    offset = 0
+    while True:
+        f.seek(offset)
+        tag = f.read(10)
+        if len(tag) < 10 or tag[:3] != b"ID3":
+            return offset
+        size = (tag[6] << 21) | (tag[7] << 14) | (tag[8] << 7) | tag[9]
+        footer = 10 if tag[5] & 0x10 else 0
+        offset += 10 + size + footer
+
+
+def probe_mp3(file_path):
+    """Read duration and bitrate of an MP3 from its frame headers and Xing/VBRI tag
+
+    Only the first frame (plus any ID3 tags) is read, never the audio data.
+    Returns an AudioInfo, or None if no valid frame header is found.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        audio_start = _skip_id3v2(f)
+        f.seek(audio_start)
+        data = f.read(_HEADER_SEARCH_BYTES)
+
+        # First sync word whose following frame also starts with a valid header
+        frame = None
+        pos = data.find(b"\xff")
+        while 0 <= pos < len(data) - 4:
+            frame = _parse_frame_header(data[pos:pos + 4])
+            if frame is not None:
+                following = data[pos + frame["frame_length"]:pos + frame["frame_length"] + 4]
+                if len(following) < 4 or _parse_frame_header(following) is not None:
+                    break
+            frame = None
+            pos = data.find(b"\xff", pos + 1)
+        if frame is None:
+            return None
+
+        f.seek(file_size - 128)
+        has_id3v1 = file_size >= 128 and f.read(3) == b"TAG"
+
+    # Xing/Info tag sits after the side information of the first frame
+    if frame["family"] == 1:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    xing = data[pos + 4 + side_info:pos + 4 + side_info + 16]
+    vbri = data[pos + 36:pos + 36 + 18]
+
+    num_frames = None
+    num_bytes = None
+    if xing[:4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(xing[4:8], "big")
+        field = 8
+        if flags & 0x01:
+            num_frames = int.from_bytes(xing[field:field + 4], "big")
+            field += 4
+        if flags & 0x02:
+            num_bytes = int.from_bytes(xing[field:field + 4], "big")
+    elif vbri[:4] == b"VBRI":
+        num_bytes = int.from_bytes(vbri[10:14], "big")
+        num_frames = int.from_bytes(vbri[14:18], "big")
+
+    audio_bytes = file_size - audio_start - pos - (128 if has_id3v1 else 0)
+    if num_frames:
+        duration = num_frames * frame["samples_per_frame"] / frame["sample_rate"]
+        bitrate = int((num_bytes or audio_bytes) * 8 / duration) if duration > 0 else frame["bitrate"]
+        vbr = xing[:4] != b"Info"
+    else:
+        # No tag: assume constant bitrate
+        duration = audio_bytes * 8 / frame["bitrate"]
+        bitrate = frame["bitrate"]
+        vbr = False
+
+    return AudioInfo(duration, bitrate, frame["sample_rate"], frame["channels"], vbr)
+
+
+def probe_audio(file_path):
+    """Return AudioInfo for any supported file without decoding audio, or None
+
+    MP3s are probed from their headers; other formats through libsndfile's
+    header parsing.
+    """
+    try:
+        if file_path.lower().endswith(".mp3"):
+            info = probe_mp3(file_path)
+            if info is not None:
+                return info
+        info = sf.info(file_path)
+        bitrate = int(os.path.getsize(file_path) * 8 / info.duration) if info.duration else 0
+        return AudioInfo(info.duration, bitrate, info.samplerate, info.channels, False)
+    except Exception:
+        return None
@@ -0,0 +1,162 @@
+import tkinter as tk
+
+import numpy as np
+
+ENVELOPE_COLOR = (31, 119, 180)
+BACKGROUND_COLOR = (255, 255, 255)
+SEGMENT_ALPHA = 0.45
+VIEWPORT_COLOR = '#333333'
+CURSOR_COLOR = 'red'
+DEFAULT_HEIGHT = 40
+
+
+def _rgb(color):
+    """(r, g, b) of a '#rrggbb' colour"""
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+class OverviewStrip:
+    """Thin strip with the whole file's envelope and every tagged segment
+
+    The envelope and segments are rendered once into a bitmap, kept for
+    the current width, and only painted again when the file, its segments or the strip
+    width change. The viewport rectangle and playback cursor are single
+    canvas items on top, so moving them is a coords() call and never
+    touches the bitmap or the main waveform view.
+
+    Clicking or dragging calls on_navigate(time).
+    """
+
+    def __init__(self, master, on_navigate=None, height=DEFAULT_HEIGHT):
+        self.on_navigate = on_navigate
+        self.canvas = tk.Canvas(master, height=height, background='#ffffff', highlightthickness=0)
+        self.widget = self.canvas
+
+        self.duration = 0.0
+        self._y = None
+        self._peaks = None
+        self._segments = []  # (start, end, color)
+        self._envelopes = {}  # width -> RGB bitmap of the envelope alone
+        self._photo = None  # Tk keeps no reference to images itself
+        self._viewport = (None, None)
+        self._cursor = (0.0, False)
+        self._width = 0
+
+        c = self.canvas
+        self.image_item = c.create_image(0, 0, anchor=tk.NW)
+        self.viewport_rect = c.create_rectangle(0, 0, 0, 0, outline=VIEWPORT_COLOR, width=2, state=tk.HIDDEN)
+        self.cursor_line = c.create_line(0, 0, 0, 0, fill=CURSOR_COLOR, state=tk.HIDDEN)
+
+        c.bind('<Configure>', self._on_configure)
+        c.bind('<ButtonPress-1>', self._on_click)
+        c.bind('<B1-Motion>', self._on_click)
+
+    def set_audio(self, y, peaks, duration):
+        """Show a new or grown signal, rendering its envelope once"""
+        self._y, self._peaks, self.duration = y, peaks, duration
+        self._envelopes = {}
+        self._render()
+
+    def clear(self):
+        """Show nothing, e.g. while the next file is loading"""
+        self._y = self._peaks = None
+        self.duration = 0.0
+        self._segments = []
+        self._envelopes = {}
+        self._render()
+
+    def set_segments(self, segments):
+        """Show tagged segments given as (start, end, '#rrggbb') tuples"""
+        segments = list(segments)
+        if segments == self._segments:
+            return
+        self._segments = segments
+        self._render()
+
+    def set_viewport(self, start, end):
+        """Outline the part of the file shown in the main view; None for either end hides it"""
+        self._viewport = (start, end)
+        self._layout_viewport()
+
+    def set_cursor(self, position, visible=True):
+        """Move the playback cursor"""
+        self._cursor = (position, visible)
+        self._layout_cursor()
+
+    def _x(self, t):
+        return t * self._width / self.duration if self.duration > 0 else 0
+
+    def _envelope_bitmap(self, width, height):
+        bitmap = self._envelopes.get(width)
+        if bitmap is not None and bitmap.shape[0] == height:
+            return bitmap
+
+        bitmap = np.empty((height, width, 3), dtype=np.uint8)
+        bitmap[:] = BACKGROUND_COLOR
+        if self._peaks is not None and len(self._y):
+            _, mins, maxs, _ = self._peaks.envelope(self._y, 0, len(self._y), width)
+            # Exactly one column per pixel
+            edges = np.linspace(0, len(mins), width + 1).astype(int)
+            if len(mins) >= width:
+                mins = np.minimum.reduceat(mins, edges[:-1])
+                maxs = np.maximum.reduceat(maxs, edges[:-1])
+            else:
+                columns = np.minimum(edges[:-1], len(mins) - 1)
+                mins, maxs = mins[columns], maxs[columns]
+            scale = (height / 2) / max(1e-6, self._peaks.peak())
+            top = np.floor(height / 2 - maxs * scale)
+            bottom = np.ceil(height / 2 - mins * scale)
+            rows = np.arange(height)[:, None]
+            bitmap[(rows >= top) & (rows <= bottom)] = ENVELOPE_COLOR
+        self._envelopes = {width: bitmap}
+        return bitmap
+
+    def _render(self):
+        width = self._width
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1 or self.duration <= 0:
+            self.canvas.itemconfigure(self.image_item, state=tk.HIDDEN)
+            self._layout_viewport()
+            self._layout_cursor()
+            return
+
+        bitmap = self._envelope_bitmap(width, height).copy()
+        for start, end, color in self._segments:
+            x0 = max(0, int(self._x(start)))
+            x1 = min(width, max(x0 + 1, int(round(self._x(end)))))
+            # Translucent band, so the envelope shows through
+            band = bitmap[:, x0:x1].astype(np.float32)
+            bitmap[:, x0:x1] = (band * (1 - SEGMENT_ALPHA) + np.array(_rgb(color)) * SEGMENT_ALPHA).astype(np.uint8)
+
+        ppm = b'P6 %d %d 255\n' % (width, height) + bitmap.tobytes()
+        self._photo = tk.PhotoImage(data=ppm, format='PPM')
+        self.canvas.itemconfigure(self.image_item, image=self._photo, state=tk.NORMAL)
+        self._layout_viewport()
+        self._layout_cursor()
+
+    def _layout_viewport(self):
+        start, end = self._viewport
+        if start is None or end is None or self.duration <= 0:
+            self.canvas.itemconfigure(self.viewport_rect, state=tk.HIDDEN)
+            return
+        x0 = self._x(start)
+        x1 = max(x0 + 2, self._x(end))
+        self.canvas.coords(self.viewport_rect, x0 + 1, 1, x1 - 1, self.canvas.winfo_height() - 1)
+        self.canvas.itemconfigure(self.viewport_rect, state=tk.NORMAL)
+
+    def _layout_cursor(self):
+        position, visible = self._cursor
+        x = self._x(position)
+        self.canvas.coords(self.cursor_line, x, 0, x, self.canvas.winfo_height())
+        self.canvas.itemconfigure(
+            self.cursor_line, state=tk.NORMAL if visible and self.duration > 0 else tk.HIDDEN
+        )
+
+    def _on_configure(self, event):
+        self._width = event.width
+        self._render()
+
+    def _on_click(self, event):
+        if self.duration > 0 and self.on_navigate:
+            t = max(0.0, min(self.duration, event.x * self.duration / max(1, self._width)))
+            self.on_navigate(t)
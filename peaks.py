@@ -0,0 +1,180 @@
+import numpy as np
+
+BASE_BLOCK = 256  # samples per bucket at the finest pyramid level
+MIN_TOP_BUCKETS = 512  # stop halving once a level has fewer buckets than this
+
+
+class PeakPyramid:
+    """Min/max/RMS summaries of a signal at power-of-two decimation levels
+
+    Similar to Audacity's summary blocks: level i holds one bucket per
+    BASE_BLOCK * 2**i samples, so a view of any width can be drawn from the
+    level that gives roughly one bucket per pixel.
+    """
+
+    def __init__(self, sr, num_samples, block_sizes, mins, maxs, rms):
+        self.sr = sr
+        self.num_samples = num_samples
+        self.block_sizes = list(block_sizes)
+        self.mins = mins
+        self.maxs = maxs
+        self.rms = rms
+
+    @classmethod
+    def build(cls, y, sr, base_block=BASE_BLOCK):
+        """Build the pyramid from a mono signal in one pass over the samples"""
+        builder = PeakPyramidBuilder(sr, base_block)
+        builder.add(y)
+        return builder.build()
+
+    @classmethod
+    def from_base_level(cls, sr, num_samples, base_block, mins, maxs, rms):
+        """Build the coarser levels on top of the finest level's buckets"""
+        mins, maxs, rms = [mins], [maxs], [rms]
+        block_sizes = [base_block]
+
+        # Coarser levels by combining neighbouring bucket pairs
+        while len(mins[-1]) >= MIN_TOP_BUCKETS:
+            prev_min, prev_max, prev_rms = mins[-1], maxs[-1], rms[-1]
+            if len(prev_min) % 2:
+                prev_min = np.append(prev_min, prev_min[-1])
+                prev_max = np.append(prev_max, prev_max[-1])
+                prev_rms = np.append(prev_rms, prev_rms[-1])
+            mins.append(prev_min.reshape(-1, 2).min(axis=1))
+            maxs.append(prev_max.reshape(-1, 2).max(axis=1))
+            pairs = prev_rms.astype(np.float64).reshape(-1, 2)
+            rms.append(np.sqrt((pairs ** 2).mean(axis=1)).astype(np.float32))
+            block_sizes.append(block_sizes[-1] * 2)
+
+        return cls(sr, num_samples, block_sizes, mins, maxs, rms)
+
+    def save(self, path):
+        """Persist the pyramid as an .npz file"""
+        arrays = {}
+        for i in range(len(self.block_sizes)):
+            arrays[f"min_{i}"] = self.mins[i]
+            arrays[f"max_{i}"] = self.maxs[i]
+            arrays[f"rms_{i}"] = self.rms[i]
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                sr=np.int64(self.sr),
+                num_samples=np.int64(self.num_samples),
+                block_sizes=np.asarray(self.block_sizes, dtype=np.int64),
+                **arrays
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Load a pyramid written by save()"""
+        with np.load(path) as data:
+            block_sizes = data["block_sizes"].tolist()
+            levels = range(len(block_sizes))
+            return cls(
+                int(data["sr"]),
+                int(data["num_samples"]),
+                block_sizes,
+                [data[f"min_{i}"] for i in levels],
+                [data[f"max_{i}"] for i in levels],
+                [data[f"rms_{i}"] for i in levels],
+            )
+
+    def peak(self):
+        """Largest absolute sample value in the whole signal"""
+        top = len(self.block_sizes) - 1
+        return float(max(abs(self.mins[top].min()), abs(self.maxs[top].max())))
+
+    def choose_level(self, samples_per_pixel):
+        """Index of the coarsest level whose buckets are no wider than one pixel, or -1"""
+        level = -1
+        for i, block in enumerate(self.block_sizes):
+            if block <= samples_per_pixel:
+                level = i
+        return level
+
+    def envelope(self, y, start_sample, end_sample, width):
+        """Return (times, mins, maxs, rms) covering a sample range at about one bucket per pixel
+
+        When zoomed in past the finest level, buckets are computed from the raw
+        samples in y. When zoomed in to less than two samples per pixel, the
+        raw samples are returned with mins == maxs and rms set to None.
+        """
+        start_sample = max(0, int(start_sample))
+        end_sample = min(self.num_samples, int(end_sample))
+        width = max(1, int(width))
+        span = end_sample - start_sample
+        if span <= 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty, None
+
+        samples_per_pixel = span / width
+        if samples_per_pixel < 2:
+            samples = np.asarray(y[start_sample:end_sample])
+            times = np.arange(start_sample, end_sample) / self.sr
+            return times, samples, samples, None
+
+        level = self.choose_level(samples_per_pixel)
+        if level < 0:
+            # Finer than the pyramid: bucket the raw samples for this view only
+            block = max(1, int(samples_per_pixel))
+            count = span // block
+            blocks = np.asarray(y[start_sample:start_sample + count * block]).reshape(count, block)
+            mins = blocks.min(axis=1)
+            maxs = blocks.max(axis=1)
+            rms = np.sqrt((blocks.astype(np.float64) ** 2).mean(axis=1)).astype(np.float32)
+            times = (start_sample + np.arange(count) * block + block / 2) / self.sr
+            return times, mins, maxs, rms
+
+        block = self.block_sizes[level]
+        first = start_sample // block
+        last = min(len(self.mins[level]), -(-end_sample // block))
+        times = (np.arange(first, last) * block + block / 2) / self.sr
+        return times, self.mins[level][first:last], self.maxs[level][first:last], self.rms[level][first:last]
+
+
+class PeakPyramidBuilder:
+    """Accumulate the finest pyramid level block by block
+
+    Lets a pyramid be built while streaming a file, holding only the finest
+    level's buckets and a partial bucket instead of the whole signal.
+    """
+
+    def __init__(self, sr, base_block=BASE_BLOCK):
+        self.sr = sr
+        self.base_block = base_block
+        self.num_samples = 0
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._mins = []
+        self._maxs = []
+        self._rms = []
+
+    def add(self, block):
+        """Add the next block of samples"""
+        block = np.asarray(block, dtype=np.float32)
+        self.num_samples += len(block)
+        data = np.concatenate([self._carry, block]) if len(self._carry) else block
+
+        full = len(data) // self.base_block * self.base_block
+        if full:
+            buckets = data[:full].reshape(-1, self.base_block)
+            self._mins.append(buckets.min(axis=1))
+            self._maxs.append(buckets.max(axis=1))
+            sumsq = (buckets.astype(np.float64) ** 2).mean(axis=1)
+            self._rms.append(np.sqrt(sumsq).astype(np.float32))
+        self._carry = data[full:].copy()
+
+    def build(self):
+        """Return a PeakPyramid of all samples added so far"""
+        mins, maxs, rms = list(self._mins), list(self._maxs), list(self._rms)
+
+        # The trailing partial bucket, or a silent one for an empty signal
+        tail = self._carry if len(self._carry) or mins else np.zeros(1, dtype=np.float32)
+        if len(tail):
+            mins.append(np.array([tail.min()], dtype=np.float32))
+            maxs.append(np.array([tail.max()], dtype=np.float32))
+            rms.append(np.array([np.sqrt((tail.astype(np.float64) ** 2).mean())], dtype=np.float32))
+
+        return PeakPyramid.from_base_level(
+            self.sr, self.num_samples, self.base_block,
+            np.concatenate(mins), np.concatenate(maxs), np.concatenate(rms)
+        )
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+# Log lives next to the working directory the taggers are started from, like the cache
+DEFAULT_LOG_PATH = os.path.join(os.getcwd(), ".shloka_logs", "perf.log")
+LOG_MAX_BYTES = 1024 ** 2  # per log file before it is rotated
+LOG_BACKUPS = 5  # rotated files kept
+HISTORY = 512  # most recent durations kept per span for percentiles
+SLOW_SPAN_MS = 100.0  # spans at least this slow are logged one by one
+SUMMARY_INTERVAL = 60.0  # seconds between percentile summaries in the log
+
+
+class PerfMonitor:
+    """Timing spans around hot paths, with latency percentiles and a rotating log
+
+    Wrap work in span(name) and the duration is added to that span's
+    recent history, from any thread. snapshot() gives count and
+    p50/p95/p99/max per span for the on-screen overlay.
+
+    Once enable_log() is called, slow spans and a periodic percentile
+    summary are written as JSON lines to a size-rotated log, tagged with the
+    host and a session id so logs collected from several annotator machines
+    can be compared.
+    """
+
+    def __init__(self, history=HISTORY, slow_ms=SLOW_SPAN_MS, summary_interval=SUMMARY_INTERVAL):
+        self.slow_ms = slow_ms
+        self.summary_interval = summary_interval
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: deque(maxlen=history))  # span -> recent ms
+        self._counts = defaultdict(int)  # span -> spans recorded since startup
+        self._logger = None
+        self._last_summary = time.monotonic()
+        self.host = platform.node()
+        self.session = f"{os.getpid()}-{int(time.time())}"
+
+    def enable_log(self, path=DEFAULT_LOG_PATH, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        """Start writing slow spans and summaries to a rotating JSON-lines log at path"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        except OSError:
+            return  # Timings still work without a log
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger(f"shloka.perf.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._logger = logger
+        self._write({"event": "session_start", "python": platform.python_version(), "os": platform.platform()})
+
+    @contextmanager
+    def span(self, name, **fields):
+        """Time the enclosed block as span name; fields are added to its log record if it is slow"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, **fields)
+
+    def record(self, name, ms, **fields):
+        """Add a duration in milliseconds measured elsewhere, e.g. input-to-frame latency"""
+        with self._lock:
+            self._durations[name].append(ms)
+            self._counts[name] += 1
+            summary_due = time.monotonic() - self._last_summary >= self.summary_interval
+            if summary_due:
+                self._last_summary = time.monotonic()
+
+        if self._logger is not None:
+            if ms >= self.slow_ms:
+                self._write({"event": "slow_span", "span": name, "ms": round(ms, 2), **fields})
+            if summary_due:
+                self.log_summary()
+
+    def snapshot(self):
+        """Return {span: {"count", "p50", "p95", "p99", "max"}} over the recent history"""
+        with self._lock:
+            histories = {name: np.array(values) for name, values in self._durations.items() if values}
+            counts = dict(self._counts)
+
+        stats = {}
+        for name, values in histories.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stats[name] = {
+                "count": counts[name],
+                "p50": round(float(p50), 2),
+                "p95": round(float(p95), 2),
+                "p99": round(float(p99), 2),
+                "max": round(float(values.max()), 2),
+            }
+        return stats
+
+    def log_summary(self):
+        """Write the current percentiles of every span to the log"""
+        if self._logger is not None:
+            self._write({"event": "summary", "spans": self.snapshot()})
+
+    def _write(self, record):
+        record = {"ts": round(time.time(), 3), "host": self.host, "session": self.session, **record}
+        self._logger.info(json.dumps(record, default=str))
+
+
+# Shared by the taggers and the modules they use
+perf = PerfMonitor()
@@ -0,0 +1,162 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import soundfile as sf
+
+from audio_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DecodedAudioCache
+from audio_catalog import CorpusIndex, discover_audio_files
+from audio_stream import STREAMING_MIN_DURATION, StreamingAudioSource, probe_duration
+from corpus_db import CorpusDatabase
+from fingerprint import compute_fingerprint, duplicate_groups, split_duplicates
+
+# Directory containing the MP3 files
+DEFAULT_AUDIO_DIR = "BrajaBeats_Gita_MP3"
+ANALYSIS_SR = 16000
+
+
+def preprocess_file(file_path, cache_dir, max_bytes, analysis_sr):
+    """Decode one file into the cache and return its index record and fingerprint (runs in a worker)
+
+    Streamed recordings are never decoded whole and get an empty
+    fingerprint, so they are never grouped as duplicates.
+    """
+    cache = DecodedAudioCache(cache_dir, max_bytes=max_bytes, analysis_sr=analysis_sr)
+    info = sf.info(file_path)
+    duration = probe_duration(file_path)
+
+    if duration and duration >= STREAMING_MIN_DURATION:
+        # Long recordings are streamed by the taggers; only their peaks are prepared
+        pyramid = cache.get_peaks(file_path, analysis_sr)
+        if pyramid is None:
+            pyramid = StreamingAudioSource(file_path, analysis_sr).scan()
+            cache.store_peaks(file_path, pyramid)
+        analysis_samples = pyramid.num_samples
+        duration = analysis_samples / analysis_sr
+        fingerprint = np.zeros((2, 0), dtype=np.uint32)
+    else:
+        y, sr = cache.load(file_path)
+        duration = len(y) / sr
+        y_analysis, sr_analysis = cache.load_analysis(file_path)
+        cache.load_peaks(file_path, y_analysis, sr_analysis)
+        analysis_samples = len(y_analysis)
+        fingerprint = compute_fingerprint(y_analysis, sr_analysis)
+
+    record = {
+        "duration": duration,
+        "sr": info.samplerate,
+        "channels": info.channels,
+        "analysis_samples": analysis_samples,
+    }
+    return record, fingerprint
+
+
+def is_warm(cache, index, file_path):
+    """Check whether a file is unchanged since it was last preprocessed"""
+    record = index.get(file_path)
+    if record is None:
+        return False
+    if cache.get_peaks(file_path, cache.analysis_sr) is None:
+        return False
+    return record["duration"] >= STREAMING_MIN_DURATION or cache.contains(file_path)
+
+
+def report_duplicates(db, audio_files):
+    """Print groups of recordings whose fingerprints match"""
+    redundant, conflicts = split_duplicates(duplicate_groups(db.fingerprints(audio_files)))
+    for path, canonical in sorted(redundant.items()):
+        print(f"Duplicate: {os.path.basename(path)} is a copy of {os.path.basename(canonical)}")
+    for group in conflicts:
+        print(f"Same recording under different verses: {', '.join(os.path.basename(p) for p in group)}")
+    if redundant or conflicts:
+        print(f"{len(redundant)} redundant copies, {len(conflicts)} recordings under more than one verse")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Decode every audio file into the tagger cache and build peak pyramids"
+    )
+    parser.add_argument("audio_dir", nargs="?", default=DEFAULT_AUDIO_DIR,
+                        help="directory with audio files (default: %(default)s)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="decoded audio cache directory (default: %(default)s)")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help="cache size cap in bytes (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true",
+                        help="reprocess files even if they are unchanged")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.audio_dir):
+        print(f"Directory '{args.audio_dir}' does not exist!")
+        return 1
+
+    cache = DecodedAudioCache(args.cache_dir, max_bytes=args.max_bytes, analysis_sr=ANALYSIS_SR)
+    index = CorpusIndex(os.path.join(args.cache_dir, "corpus_index.json"))
+    db = CorpusDatabase(os.path.join(args.cache_dir, "corpus.sqlite3"))
+
+    audio_files = discover_audio_files(args.audio_dir)
+    unfingerprinted = set(db.files_without_fingerprint(audio_files))
+    todo = [f for f in audio_files if args.force or f in unfingerprinted or not is_warm(cache, index, f)]
+    print(f"Found {len(audio_files)} audio files, {len(audio_files) - len(todo)} already up to date")
+    if not todo:
+        report_duplicates(db, audio_files)
+        return 0
+
+    started = time.monotonic()
+    processed = 0
+    failed = 0
+    audio_seconds = 0.0
+    source_bytes = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(preprocess_file, f, args.cache_dir, args.max_bytes, ANALYSIS_SR): f
+            for f in todo
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                record, fingerprint = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error processing {os.path.basename(file_path)}: {e}")
+                continue
+
+            index.update(file_path, **record)
+            db.store_fingerprint(file_path, record["duration"], fingerprint)
+            processed += 1
+            audio_seconds += record["duration"]
+            source_bytes += os.path.getsize(file_path)
+
+            elapsed = time.monotonic() - started
+            print(f"[{processed + failed}/{len(todo)}] {os.path.basename(file_path)} "
+                  f"({record['duration']:.1f}s, {processed / elapsed:.2f} files/s)")
+
+            # Save periodically so an interrupted run keeps its progress
+            if processed % 20 == 0:
+                index.save()
+
+    index.save()
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(f"\nCompleted! {processed} files processed, {failed} failed in {elapsed:.1f}s")
+    print(f"Throughput: {processed / elapsed:.2f} files/s, "
+          f"{audio_seconds / elapsed:.1f}x realtime, "
+          f"{source_bytes / elapsed / 1024 ** 2:.2f} MB/s of source audio")
+
+    report_duplicates(db, audio_files)
+
+    total = cache.total_bytes()
+    if total >= args.max_bytes * 0.95:
+        print(f"Warning: cache holds {total / 1024 ** 3:.2f} GB and is at its size cap; "
+              f"raise --max-bytes to keep the whole corpus warm")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
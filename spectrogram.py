@@ -0,0 +1,195 @@
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import librosa
+import numpy as np
+
+from perf_trace import perf
+
+TILE_SECONDS = 5.0  # audio covered by one tile
+N_FFT = 512
+HOP_LENGTH = 160  # 10 ms at the 16 kHz analysis rate
+N_MELS = 80
+DB_RANGE = 80.0  # tiles store the top DB_RANGE dB, quantized to 0-255
+REF_POWER = 400.0  # mel power shown as 0 dB, about the peak of a full-scale 440 Hz sine
+DEFAULT_MEMORY_BUDGET = 64 * 1024 ** 2  # bytes of tiles kept in memory
+MAX_VIEW_SECONDS = 10 * 60  # wider views are not drawn, so zooming out never computes a whole file
+POLL_MS = 50  # how often the Tk thread checks for finished tiles
+
+
+def tile_frames(sr):
+    """Number of spectrogram frames in one tile"""
+    return int(TILE_SECONDS * sr) // HOP_LENGTH
+
+
+def compute_tile(y, sr, index):
+    """Mel spectrogram of tile index of signal y as uint8 (N_MELS, frames)
+
+    Frames are centred on multiples of HOP_LENGTH from the start of the
+    signal, and the analysis windows reach into the neighbouring tiles, so
+    consecutive tiles line up without seams.
+    """
+    frames_per_tile = tile_frames(sr)
+    start = index * frames_per_tile * HOP_LENGTH
+    frames = min(frames_per_tile, -(-(len(y) - start) // HOP_LENGTH))
+
+    # Samples under every window of this tile, zero beyond the signal
+    seg_start = start - N_FFT // 2
+    seg_len = (frames - 1) * HOP_LENGTH + N_FFT
+    segment = np.zeros(seg_len, dtype=np.float32)
+    lo, hi = max(0, seg_start), min(len(y), seg_start + seg_len)
+    segment[lo - seg_start:hi - seg_start] = y[lo:hi]
+
+    mel = librosa.feature.melspectrogram(
+        y=segment, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS, center=False
+    )
+    db = librosa.power_to_db(mel, ref=REF_POWER, top_db=None)
+    return np.clip((db + DB_RANGE) * (255 / DB_RANGE), 0, 255).astype(np.uint8)
+
+
+class SpectrogramTiles:
+    """Mel spectrogram of the loaded file, computed as fixed-duration tiles
+
+    Tiles are computed by background workers, kept in memory up to
+    memory_budget bytes (least recently used dropped first) and persisted
+    next to the decoded audio in the DecodedAudioCache, so scrolling and
+    zooming, or opening the file again later, reuse tiles instead of running
+    the STFT again.
+
+    image() assembles a view from the tiles it has and queues the missing
+    ones; on_tile_ready() is called on the Tk thread as they arrive.
+    """
+
+    def __init__(self, root, cache, on_tile_ready=None,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, workers=2):
+        self.root = root
+        self.cache = cache
+        self.on_tile_ready = on_tile_ready
+        self.memory_budget = memory_budget
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spectrogram")
+        self._lock = threading.Lock()
+        self._tiles = OrderedDict()  # (entry key, index) -> tile, oldest first
+        self._tile_bytes = 0
+        self._pending = {}  # (entry key, index) -> Future
+        self._ready = queue.Queue()
+        self._polling = False
+        self.key = None
+        self.y = None
+        self.sr = None
+
+    def set_source(self, file_path, y, sr):
+        """Switch to the analysis-rate signal of file_path, dropping queued work for the old one"""
+        self.key = self.cache.cache_key(file_path)
+        self.y = y
+        self.sr = sr
+        self._cancel_pending(set())
+
+    def clear(self):
+        """Forget the current signal, e.g. while the next file is loading"""
+        self.key = None
+        self.y = None
+        self._cancel_pending(set())
+
+    def image(self, start, end, columns):
+        """Return a uint8 (N_MELS, columns) image of [start, end] seconds, or None
+
+        Missing tiles are queued and show as silence until they are ready.
+        Returns None for views wider than MAX_VIEW_SECONDS.
+        """
+        if self.y is None or end <= start or columns < 1 or end - start > MAX_VIEW_SECONDS:
+            return None
+
+        frames_per_tile = tile_frames(self.sr)
+        first_frame = int(start * self.sr / HOP_LENGTH)
+        last_frame = max(first_frame + 1, int(np.ceil(end * self.sr / HOP_LENGTH)))
+        first_tile = first_frame // frames_per_tile
+        last_tile = (last_frame - 1) // frames_per_tile
+        num_tiles = -(-len(self.y) // (frames_per_tile * HOP_LENGTH))
+
+        wanted = [index for index in range(first_tile, last_tile + 1) if index < num_tiles]
+        self._request(wanted)
+
+        frames = np.zeros((N_MELS, (last_tile - first_tile + 1) * frames_per_tile), dtype=np.uint8)
+        with self._lock:
+            for index in wanted:
+                tile = self._tiles.get((self.key, index))
+                if tile is not None:
+                    self._tiles.move_to_end((self.key, index))
+                    offset = (index - first_tile) * frames_per_tile
+                    frames[:, offset:offset + tile.shape[1]] = tile
+        frames = frames[:, first_frame - first_tile * frames_per_tile:last_frame - first_tile * frames_per_tile]
+
+        # One column per pixel: loudest frame when zoomed out, repeated frames when zoomed in
+        edges = np.linspace(0, frames.shape[1], columns + 1).astype(int)
+        if frames.shape[1] >= columns:
+            return np.maximum.reduceat(frames, edges[:-1], axis=1)
+        return frames[:, np.minimum(edges[:-1], frames.shape[1] - 1)]
+
+    def shutdown(self):
+        """Cancel queued tiles and stop the workers"""
+        self._cancel_pending(set())
+        self._executor.shutdown(wait=False)
+
+    def _request(self, indices):
+        wanted = {(self.key, index) for index in indices}
+        self._cancel_pending(wanted)
+        with self._lock:
+            missing = [k for k in wanted if k not in self._tiles and k not in self._pending]
+            for tile_key in sorted(missing):
+                future = self._executor.submit(self._compute, tile_key, self.y, self.sr)
+                self._pending[tile_key] = future
+        if missing and not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def _cancel_pending(self, keep):
+        # Tiles the view has moved away from are not worth computing any more
+        with self._lock:
+            for tile_key, future in list(self._pending.items()):
+                if tile_key not in keep and future.cancel():
+                    del self._pending[tile_key]
+
+    def _compute(self, tile_key, y, sr):
+        key, index = tile_key
+        try:
+            tile = self.cache.get_spectrogram_tile(key, sr, index)
+            if tile is None:
+                with perf.span("spectrogram.tile"):
+                    tile = compute_tile(y, sr, index)
+                self.cache.store_spectrogram_tile(key, sr, index, tile)
+        except Exception:
+            with self._lock:
+                self._pending.pop(tile_key, None)
+            raise
+
+        with self._lock:
+            if tile_key not in self._tiles:
+                self._tiles[tile_key] = tile
+                self._tile_bytes += tile.nbytes
+            while self._tile_bytes > self.memory_budget and len(self._tiles) > 1:
+                _, dropped = self._tiles.popitem(last=False)
+                self._tile_bytes -= dropped.nbytes
+            # Announced before leaving _pending so the poll loop cannot stop in between
+            self._ready.put(tile_key)
+            self._pending.pop(tile_key, None)
+
+    def _poll(self):
+        arrived = False
+        while True:
+            try:
+                key, _ = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            arrived = arrived or key == self.key
+
+        if arrived and self.on_tile_ready:
+            self.on_tile_ready()
+
+        with self._lock:
+            busy = bool(self._pending)
+        if busy or not self._ready.empty():
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
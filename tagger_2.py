@@ -1,35 +1,111 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, scrolledtext
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.patches as patches
-import librosa
-import librosa.display
+import argparse
 import numpy as np
-import pygame
-import matplotlib.lines as mlines
 import math
 import json
 import os
-import re
 import time
+import queue
+import threading
+
+from audio_cache import DecodedAudioCache
+from audio_catalog import AudioCatalog, CorpusIndex, parse_audio_key
+from audio_loader import AsyncAudioLoader
+from audio_playback import PlaybackEngine
+from audio_prefetch import AudioPrefetcher
+from audio_watcher import DirectoryWatcher
+from corpus_db import STATUS_COMPLETE, STATUS_PARTIAL, STATUS_UNTAGGED, CorpusDatabase, verse_numbers
+from fingerprint import duplicate_groups, fingerprint_file, split_duplicates
+from audio_stream import export_segment
+from mp3_probe import probe_audio
+from overview_strip import OverviewStrip
+from perf_trace import perf
+from spectrogram import SpectrogramTiles
+from virtual_list import VirtualFileList
+
+# Sample rate of the mono signal used for display and analysis (playback uses the file)
+ANALYSIS_SR = 16000
+
+# Background prefetch of neighbouring files while annotating
+PREFETCH_DEPTH = 2  # files before and after the current one
+PREFETCH_MEMORY_BUDGET = 512 * 1024 * 1024  # bytes of decoded audio kept resident
+FILTER_DEBOUNCE_MS = 120  # the files list is filtered once typing pauses this long
+# Coverage filter of the files list: choice -> tagging statuses shown (None shows every file)
+COVERAGE_FILTERS = {
+    "All": None,
+    "Untagged": (STATUS_UNTAGGED,),
+    "Partial": (STATUS_PARTIAL,),
+    "Not complete": (STATUS_UNTAGGED, STATUS_PARTIAL),
+    "Complete": (STATUS_COMPLETE,),
+}
+STATUS_MARKS = {STATUS_PARTIAL: "◐ ", STATUS_COMPLETE: "✓ "}  # shown before the file name
+# Waveform renderers selectable at startup; "canvas" never imports matplotlib
+WAVEFORM_RENDERERS = ("matplotlib", "canvas")
+
+# Display layers handlers mark dirty; render_frame repaints only those
+LAYER_WAVEFORM = "waveform"
+LAYER_REGIONS = "regions"
+LAYER_SELECTION = "selection"
+LAYER_CURSOR = "cursor"
+LAYER_TIME_SCALE = "time_scale"
+LAYER_SPECTROGRAM = "spectrogram"
+ALL_LAYERS = (LAYER_WAVEFORM, LAYER_REGIONS, LAYER_SELECTION, LAYER_CURSOR, LAYER_TIME_SCALE, LAYER_SPECTROGRAM)
+FRAME_INTERVAL_MS = 16  # frames are rendered at most this often (~60 fps)
+PERF_HUD_REFRESH_MS = 500  # how often the performance overlay is updated
+
+# Zooming: from the whole file down to a few milliseconds
+MIN_VIEW_WINDOW = 0.01  # seconds visible at the closest zoom
+WHEEL_ZOOM_FACTOR = 1.25  # per mouse wheel notch
+BUTTON_ZOOM_FACTOR = 2.0  # per zoom button or key press
+TIME_SCALE_TICK_PIXELS = 80  # rough spacing of time scale ticks
+
+JUMP_SECONDS = 5.0  # how far the jump back/forward buttons and arrow keys move the playhead
+
+# Dragging the edges of tagged regions
+EDGE_GRAB_PIXELS = 5  # how close to an edge a press has to be to grab it
+MIN_REGION_SECONDS = 0.01  # a dragged edge never gets closer than this to the other one
 
 class AudacityInspiredGitaTagger:
-    def __init__(self, root):
+    def __init__(self, root, renderer="matplotlib"):
         self.root = root
+        self.renderer = renderer
         self.root.title("Gita Audio Tagger - Audacity Style")
         self.root.geometry("1600x900")
         
-        # Initialize pygame for audio
-        pygame.init()
-        pygame.mixer.init()
+        # Playback straight from the decoded signal
+        self.playback = PlaybackEngine()
+        
+        # Decoded PCM cache shared with the other tagger
+        self.audio_cache = DecodedAudioCache(analysis_sr=ANALYSIS_SR)
+        self.prefetcher = AudioPrefetcher(
+            self.audio_cache, depth=PREFETCH_DEPTH, memory_budget=PREFETCH_MEMORY_BUDGET
+        )
+        self.audio_loader = AsyncAudioLoader(self.root, self.audio_cache, self.prefetcher)
+        self.spectrogram = SpectrogramTiles(
+            self.root, self.audio_cache, on_tile_ready=lambda: self.invalidate(LAYER_SPECTROGRAM)
+        )
+        self.show_spectrogram = tk.BooleanVar(value=False)
+        self.corpus_index = CorpusIndex()
+        # Audio files, verses and tagging status carried over from earlier sessions
+        self.corpus_db = CorpusDatabase()
+        self._hash_thread = None
+        # Copies of a recording are hidden from the files list, keeping one canonical file
+        self.hide_duplicates = tk.BooleanVar(value=True)
+        self.duplicate_of = {}  # hidden path -> canonical path
+        self._duplicate_result = ({}, [])  # (redundant, conflicts) of the last duplicate scan
+        self._duplicate_queue = queue.Queue()
+        self._duplicate_generation = 0
+        self._duplicate_scans = 0  # scan threads whose result has not been picked up
         
         # Initialize variables
         self.audio_file = None
-        self.y = None  # Audio time series
-        self.sr = None  # Sample rate
+        self.y = None  # Analysis-rate audio time series
+        self.sr = None  # Analysis sample rate
+        self.peaks = None  # Min/max/RMS peak pyramid for the loaded file
         self.verse_data = None
         self.all_verses = []
+        self.verses_file = None  # verse JSON file all_verses was loaded from
         self.current_verse_index = 0
         self.current_word = None
         self.current_position = 0
@@ -37,12 +113,33 @@ class AudacityInspiredGitaTagger:
         self.current_selection = [None, None]  # [start, end] in seconds
         self.audio_directory = None
         self.audio_files = []
+        self.audio_catalog = AudioCatalog()  # parsed keys and lookups for audio_files
+        self.audio_durations = {}  # file path -> duration in seconds from header probing
+        self._filter_job = None  # after id of the pending debounced filter
+        self._filter_result = None  # ((text, chapter, verse, coverage), files) of the last filter
+        self.file_tag_status = {}  # file path -> (status, segments, synonyms tagged, synonyms total) of its verse
+        self._probe_queue = queue.Queue()
+        self._probe_generation = 0
+        self._probe_running = 0  # probe threads of the current generation still running
+        self._probe_polling = False
+        self.directory_watcher = None  # DirectoryWatcher of audio_directory
         self.zoom_level = 1.0
         self.view_start = 0  # start position for zoomed view in seconds
         self.audio_duration = 0  # total duration in seconds
         self.view_window = 10  # visible window in seconds
-        self.waveform_patches = []  # Store references to colored patches
         self.tagged_regions = {}  # Store already tagged regions
+        self._dirty_layers = set()  # display layers waiting for the next frame
+        self._render_pending = None  # after/after_idle id of the scheduled frame
+        self._last_frame_time = 0.0
+        self.region_list = []  # (start, end, label, tag, color, source) for each region shown
+        self.region_drag = None  # region whose edge is being dragged
+        self._pending_action = None  # (name, start time) of the input waiting for its frame
+        self.show_perf_hud = tk.BooleanVar(value=False)
+        self._perf_hud_job = None  # after id of the next overlay refresh
+        
+        # Slow spans and latency percentiles go to a rotating log
+        perf.enable_log()
+        self._updating_scrollbar = False
         
         # Setup UI
         self.setup_ui()
@@ -127,6 +224,7 @@ class AudacityInspiredGitaTagger:
         file_menu.add_command(label="Load Gita Data", command=self.load_gita_data)
         file_menu.add_separator()
         file_menu.add_command(label="Save Tags", command=self.save_tagged_data, accelerator="Ctrl+S")
+        file_menu.add_command(label="Export Selection Audio", command=self.export_selection_audio)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         menubar.add_cascade(label="File", menu=file_menu)
@@ -145,6 +243,13 @@ class AudacityInspiredGitaTagger:
         view_menu.add_command(label="Zoom Out", command=self.zoom_out, accelerator="-")
         view_menu.add_command(label="Reset Zoom", command=self.reset_zoom, accelerator="0")
         view_menu.add_separator()
+        view_menu.add_checkbutton(label="Show Spectrogram", variable=self.show_spectrogram,
+                                  command=self.toggle_spectrogram)
+        view_menu.add_checkbutton(label="Hide Duplicate Recordings", variable=self.hide_duplicates,
+                                  command=self.toggle_hide_duplicates)
+        view_menu.add_checkbutton(label="Show Performance Overlay", variable=self.show_perf_hud,
+                                  command=self.toggle_perf_hud, accelerator="F12")
+        view_menu.add_separator()
         view_menu.add_command(label="Show All Tags", command=self.show_all_tags)
         menubar.add_cascade(label="View", menu=view_menu)
         
@@ -196,30 +301,59 @@ class AudacityInspiredGitaTagger:
         self.file_info_var = tk.StringVar(value="No file loaded")
         tk.Label(info_frame, textvariable=self.file_info_var, anchor=tk.E).pack(side=tk.RIGHT)
     
+    def toggle_perf_hud(self):
+        """Show or hide the overlay with frame and action latency percentiles"""
+        if self._perf_hud_job is not None:
+            self.root.after_cancel(self._perf_hud_job)
+            self._perf_hud_job = None
+        if self.show_perf_hud.get():
+            self.perf_hud.place(relx=1.0, x=-10, y=50, anchor=tk.NE)
+            self.update_perf_hud()
+        else:
+            self.perf_hud.place_forget()
+    
+    def flip_perf_hud(self):
+        """Toggle the performance overlay from the keyboard"""
+        self.show_perf_hud.set(not self.show_perf_hud.get())
+        self.toggle_perf_hud()
+    
+    def update_perf_hud(self):
+        """Refresh the performance overlay while it is shown"""
+        self._perf_hud_job = None
+        if not self.show_perf_hud.get():
+            return
+            
+        stats = perf.snapshot()
+        # Whole frames and user actions first, then the spans inside them
+        names = sorted(stats, key=lambda n: (n != "frame", not n.startswith("action."), n))
+        lines = [f"{'span (ms)':<24}{'p50':>7}{'p95':>7}{'p99':>7}{'max':>8}{'n':>7}"]
+        for name in names:
+            st = stats[name]
+            lines.append(f"{name:<24}{st['p50']:>7.1f}{st['p95']:>7.1f}{st['p99']:>7.1f}{st['max']:>8.1f}{st['count']:>7}")
+        self.perf_hud.config(text="\n".join(lines) if len(lines) > 1 else "No timings yet")
+        self.perf_hud.lift()
+        
+        self._perf_hud_job = self.root.after(PERF_HUD_REFRESH_MS, self.update_perf_hud)
+    
     def setup_waveform_display(self):
         """Set up the waveform display area"""
-        # Create matplotlib figure and axes
-        self.fig, self.ax = plt.subplots(figsize=(14, 4), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.waveform_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Whole-file overview above the waveform; clicking it moves the view
+        self.overview = OverviewStrip(self.waveform_frame, on_navigate=self.on_overview_navigate)
+        self.overview.widget.pack(fill=tk.X, padx=5, pady=(0, 5))
         
-        # Configure axes for waveform display
-        self.ax.set_xlabel('Time (s)')
-        self.ax.set_ylabel('Amplitude')
-        self.ax.grid(True, alpha=0.3)
-        
-        # Placeholder text
-        self.ax.text(0.5, 0.5, 'No audio loaded', 
-                     ha='center', va='center', transform=self.ax.transAxes, 
-                     fontsize=14, alpha=0.7)
-        
-        # Set up mouse events
-        self.canvas.mpl_connect('button_press_event', self.on_waveform_click)
-        self.canvas.mpl_connect('button_release_event', self.on_waveform_release)
-        self.canvas.mpl_connect('motion_notify_event', self.on_waveform_motion)
-        
-        # Initialize playback position line
-        self.playback_line = self.ax.axvline(x=0, color='r', linewidth=1.5, visible=False)
+        # Waveform view; the renderer module is only imported when chosen
+        if self.renderer == "canvas":
+            from canvas_waveform_view import CanvasWaveformView as view_class
+        else:
+            from waveform_view import MatplotlibWaveformView as view_class
+        self.waveform_view = view_class(
+            self.waveform_frame,
+            on_press=self.on_waveform_click,
+            on_drag=self.on_waveform_motion,
+            on_release=self.on_waveform_release,
+            on_resize=lambda: self.invalidate(LAYER_WAVEFORM),
+            on_zoom=self.on_waveform_wheel,
+        )
         
         # Add horizontal scrollbar for waveform
         self.waveform_scrollbar = ttk.Scale(
@@ -230,7 +364,9 @@ class AudacityInspiredGitaTagger:
         )
         self.waveform_scrollbar.pack(fill=tk.X, padx=5)
         
-        self.canvas.draw()
+        # Performance overlay, placed over the waveform when enabled
+        self.perf_hud = tk.Label(self.waveform_frame, font=("Courier", 8), justify=tk.LEFT,
+                                 anchor=tk.NW, bg='#ffffe0', relief=tk.SOLID, bd=1)
     
     def setup_transport_controls(self):
         """Set up playback transport controls"""
@@ -304,19 +440,23 @@ class AudacityInspiredGitaTagger:
         self.verse_filter_var.trace_add("write", self.filter_audio_files)
         tk.Entry(cv_frame, textvariable=self.verse_filter_var, width=5).pack(side=tk.LEFT, padx=2)
         
-        # Audio files listbox with scrollbar
+        # Tagging coverage filter, from the status index rather than opening files
+        coverage_frame = tk.Frame(self.files_frame)
+        coverage_frame.pack(fill=tk.X, pady=5)
+        
+        tk.Label(coverage_frame, text="Coverage:").pack(side=tk.LEFT, padx=2)
+        self.coverage_var = tk.StringVar(value="All")
+        self.coverage_var.trace_add("write", self.filter_audio_files)
+        ttk.Combobox(coverage_frame, textvariable=self.coverage_var, values=list(COVERAGE_FILTERS),
+                     state="readonly", width=14).pack(side=tk.LEFT, padx=2)
+        
+        # Audio files list with name and duration columns
         listbox_frame = tk.Frame(self.files_frame)
         listbox_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        scrollbar = tk.Scrollbar(listbox_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.audio_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set, 
-                                     selectbackground="#a6a6a6", selectforeground="black",
-                                     activestyle="none")
-        self.audio_listbox.pack(fill=tk.BOTH, expand=True)
-        self.audio_listbox.bind('<<ListboxSelect>>', self.on_audio_select)
-        scrollbar.config(command=self.audio_listbox.yview)
+        # Only the rows on screen exist as widgets, however many files are listed
+        self.audio_list = VirtualFileList(listbox_frame, self.audio_row_values, on_select=self.on_audio_select)
+        self.audio_list.pack(fill=tk.BOTH, expand=True)
         
         # Navigation buttons
         nav_frame = tk.Frame(self.files_frame)
@@ -324,6 +464,7 @@ class AudacityInspiredGitaTagger:
         
         tk.Button(nav_frame, text="Previous", command=self.load_previous_audio).pack(side=tk.LEFT, padx=2)
         tk.Button(nav_frame, text="Next", command=self.load_next_audio).pack(side=tk.LEFT, padx=2)
+        tk.Button(nav_frame, text="Next Untagged", command=self.load_next_untagged_audio).pack(side=tk.LEFT, padx=2)
     
     def setup_tag_panel(self):
         """Set up the word tagging panel"""
@@ -422,6 +563,9 @@ class AudacityInspiredGitaTagger:
         self.root.bind('<Control-o>', lambda e: self.load_audio())
         self.root.bind('<Control-s>', lambda e: self.save_tagged_data())
         
+        # Performance overlay
+        self.root.bind('<F12>', lambda e: self.flip_perf_hud())
+        
         # Playback
         self.root.bind('<space>', lambda e: self.toggle_play())
         self.root.bind('s', lambda e: self.stop_playback())
@@ -431,6 +575,7 @@ class AudacityInspiredGitaTagger:
         self.root.bind('<Left>', lambda e: self.jump_back())
         self.root.bind('<Right>', lambda e: self.jump_forward())
         self.root.bind('0', lambda e: self.reset_zoom())
+        self.root.bind('n', lambda e: self.load_next_untagged_audio())  # Next untagged or partial verse
         self.root.bind('h', lambda e: self.goto_start())  # Home
         self.root.bind('j', lambda e: self.goto_end())    # End (j is next to h)
         
@@ -465,18 +610,32 @@ class AudacityInspiredGitaTagger:
         """Load audio files from the specified directory"""
         self.audio_directory = audio_dir
         try:
-            # Find MP3 files in directory
-            self.audio_files = []
-            for root, dirs, files in os.walk(audio_dir):
-                for file in files:
-                    if file.lower().endswith(('.mp3', '.wav', '.ogg')):
-                        self.audio_files.append(os.path.join(root, file))
-            
-            # Sort files by chapter and verse if possible
-            self.audio_files.sort(key=self.sort_by_chapter_verse)
-            
-            # Update listbox
+            rows = self.corpus_db.audio_files(audio_dir)
+            self.duplicate_of = {}
+            self._duplicate_result = ({}, [])
+            if rows:
+                # Known directory: one query; the watcher catches up with changes made meanwhile
+                self.audio_catalog = AudioCatalog([row[0] for row in rows], keys={row[0]: row[1] for row in rows})
+                self.audio_durations.update((path, duration) for path, _, duration, _ in rows if duration is not None)
+                known_files = {path: signature for path, _, _, signature in rows}
+            else:
+                # Find audio files in directory, sorted by chapter and verse if possible;
+                # their names are parsed once here, not on every filter or lookup
+                self.audio_catalog = AudioCatalog.scan(audio_dir)
+                self.corpus_db.replace_directory(audio_dir, self.audio_catalog.files)
+                known_files = self.audio_catalog.files
+            self.audio_files = self.audio_catalog.files
+            self.file_tag_status = self.read_file_tag_status(audio_dir)
+            self._filter_result = None
+            
+            # Update listbox and start reading durations from file headers
             self.update_audio_listbox()
+            self.start_duration_probe()
+            self.start_directory_watch(audio_dir, known_files)
+            self.start_content_hashing()
+            # Files decoded in earlier sessions are fingerprinted without decoding them again
+            self._duplicate_generation += 1
+            self.start_duplicate_scan([path for path in self.audio_files if self.audio_cache.contains(path)])
             
             self.status_var.set(f"Loaded {len(self.audio_files)} audio files from directory")
             
@@ -487,125 +646,438 @@ class AudacityInspiredGitaTagger:
         except Exception as e:
             self.status_var.set(f"Error loading audio directory: {str(e)}")
     
-    def sort_by_chapter_verse(self, file_path):
-        """Sort key function for audio files based on chapter and verse"""
-        filename = os.path.basename(file_path)
-        match = re.search(r'(\d+)\.(\d+)', filename)
-        if match:
-            chapter = int(match.group(1))
-            verse = int(match.group(2))
-            return (chapter, verse)
-        return (999, 999)  # Default for files that don't match pattern
+    def start_directory_watch(self, audio_dir, known_files):
+        """Follow files added, removed, changed or renamed in the audio directory from now on"""
+        if self.directory_watcher is not None:
+            self.directory_watcher.stop()
+        self.directory_watcher = DirectoryWatcher(self.root, audio_dir, self.apply_directory_changes)
+        self.directory_watcher.start(known_files)
     
-    def update_audio_listbox(self):
-        """Update the audio files listbox with filtered items"""
-        self.audio_listbox.delete(0, tk.END)
-        
-        # Get filter values
-        text_filter = self.filter_var.get().lower()
-        ch_filter = self.ch_filter_var.get()
-        verse_filter = self.verse_filter_var.get()
+    def start_content_hashing(self):
+        """Hash the contents of cataloged files that have no hash yet, in a background thread"""
+        if self._hash_thread is not None and self._hash_thread.is_alive():
+            return  # The running thread picks up new files before it stops
+        self._hash_thread = threading.Thread(target=self.corpus_db.hash_missing, args=(self.audio_directory,),
+                                             name="content-hash", daemon=True)
+        self._hash_thread.start()
+    
+    def apply_directory_changes(self, events):
+        """Apply a batch of watcher events to the catalog and the files list"""
+        added = []
+        changed = []  # added or modified, to be probed and decoded
+        removed = 0
+        for event in events:
+            kind, path = event[0], event[1]
+            if kind == "added":
+                if self.audio_catalog.add(path):
+                    added.append(path)
+                    changed.append(path)
+                self.corpus_db.add_file(self.audio_directory, path)
+            elif kind == "modified":
+                self.audio_durations.pop(path, None)
+                self.corpus_db.add_file(self.audio_directory, path)
+                if path not in changed:
+                    changed.append(path)
+            elif kind == "removed":
+                if self.audio_catalog.remove(path) or self.duplicate_of.pop(path, None):
+                    removed += 1
+                self.corpus_db.remove_file(path)
+                self.audio_durations.pop(path, None)
+                for pending in (added, changed):
+                    if path in pending:
+                        pending.remove(path)
+            elif kind == "moved":
+                new_path = event[2]
+                # A hidden copy shows under its new name until the next duplicate scan
+                self.duplicate_of.pop(path, None)
+                self.audio_catalog.rename(path, new_path)
+                self.corpus_db.rename_file(path, new_path)
+                if path in self.audio_durations:
+                    self.audio_durations[new_path] = self.audio_durations.pop(path)
+                for pending in (added, changed):
+                    if path in pending:
+                        pending[pending.index(path)] = new_path
+                if self.audio_file == path:
+                    # The open recording keeps playing from its decoded signal
+                    self.audio_file = new_path
+        
+        self.file_tag_status = self.read_file_tag_status(self.audio_directory)
+        self._filter_result = None
+        self.update_audio_listbox()
         
-        # Apply filters
-        filtered_files = []
-        for file in self.audio_files:
-            filename = os.path.basename(file)
-            
-            # Apply text filter
-            if text_filter and text_filter not in filename.lower():
-                continue
-                
-            # Apply chapter/verse filter if specified
-            if ch_filter or verse_filter:
-                match = re.search(r'(\d+)\.(\d+)', filename)
-                if match:
-                    chapter = match.group(1)
-                    verse = match.group(2)
-                    
-                    if ch_filter and chapter != ch_filter:
-                        continue
-                    if verse_filter and verse != verse_filter:
-                        continue
-                else:
-                    # If looking for specific chapter/verse but file doesn't match pattern
-                    if ch_filter or verse_filter:
-                        continue
-            
-            filtered_files.append(file)
-            self.audio_listbox.insert(tk.END, os.path.basename(file))
+        # New recordings are probed, decoded and hashed before anyone opens them
+        if changed:
+            self.start_duration_probe(changed)
+            self.prefetcher.warm(changed)
+            self.start_content_hashing()
+        if changed or removed or any(event[0] == "moved" for event in events):
+            self.start_duplicate_scan(changed)
+        
+        changes = []
+        if added:
+            changes.append(f"{len(added)} added")
+        if removed:
+            changes.append(f"{removed} removed")
+        modified = len(changed) - len(added)
+        if modified:
+            changes.append(f"{modified} changed")
+        renamed = sum(1 for event in events if event[0] == "moved")
+        if renamed:
+            changes.append(f"{renamed} renamed")
+        if changes:
+            self.status_var.set(f"Audio directory changed: {', '.join(changes)} "
+                                f"({len(self.audio_files)} audio files)")
+    
+    def update_audio_listbox(self):
+        """Update the audio files list with filtered items"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+            self._filter_job = None
+        with perf.span("update_audio_listbox", files=len(self.audio_files)):
+            self.fill_audio_list()
+    
+    def fill_audio_list(self):
+        """Filter the catalog and hand the result to the files list"""
+        query = (self.filter_var.get().lower(), self.ch_filter_var.get().strip(), self.verse_filter_var.get().strip(),
+                 self.coverage_var.get())
+        text, chapter, verse, coverage = query
+        
+        # A query that only adds characters can only match a subset of the last result
+        within = None
+        if self._filter_result is not None:
+            (last_text, last_chapter, last_verse, last_coverage), last_files = self._filter_result
+            if (last_chapter, last_verse, last_coverage) == (chapter, verse, coverage) and last_text in text:
+                within = last_files
+        
+        # Index lookups on the catalog; no file name is parsed here
+        filtered_files = self.audio_catalog.filter(text, chapter, verse, within=within)
+        statuses = COVERAGE_FILTERS.get(coverage)
+        if statuses is not None:
+            filtered_files = [path for path in filtered_files
+                              if self.file_tag_status.get(path, (None,))[0] in statuses]
+        self._filter_result = (query, filtered_files)
+        self.audio_list.set_rows(filtered_files)
+        self.audio_list.select(self.audio_file)
         
         # Update status with filter results
         if len(filtered_files) < len(self.audio_files):
             self.status_var.set(f"Showing {len(filtered_files)} of {len(self.audio_files)} audio files")
     
     def filter_audio_files(self, *args):
-        """Callback for when filter values change"""
-        if hasattr(self, 'audio_listbox'):
-            self.update_audio_listbox()
+        """Callback for when filter values change; filters once typing pauses"""
+        if not hasattr(self, 'audio_list'):
+            return
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(FILTER_DEBOUNCE_MS, self.update_audio_listbox)
     
     def clear_filter(self):
         """Clear all filters"""
         self.filter_var.set("")
         self.ch_filter_var.set("")
         self.verse_filter_var.set("")
+        self.coverage_var.set("All")
         self.update_audio_listbox()
     
-    def on_audio_select(self, event):
-        """Handle selection of audio file from listbox"""
-        selection = self.audio_listbox.curselection()
-        if selection:
-            index = selection[0]
-            filename = self.audio_listbox.get(index)
-            
-            # Find the full path in our list
-            for file in self.audio_files:
-                if os.path.basename(file) == filename:
-                    self.load_audio_file(file)
-                    break
+    def audio_row_values(self, file_path):
+        """(name, duration) shown for a row of the files list; the name is marked with the verse's tagging status"""
+        status = self.file_tag_status.get(file_path)
+        mark = STATUS_MARKS.get(status[0], "") if status else ""
+        return mark + os.path.basename(file_path), self.format_duration_cell(file_path)
+    
+    def read_file_tag_status(self, audio_dir):
+        """Tagging status of the files of audio_dir, by the verses of the loaded verse file"""
+        if not self.verses_file:
+            return {}
+        return self.corpus_db.file_tag_status(audio_dir, self.verses_file)
+    
+    def refresh_tag_status(self):
+        """Reload the tagging status of the listed files, e.g. after a verse was tagged"""
+        if not self.audio_directory:
+            return
+        self.file_tag_status = self.read_file_tag_status(self.audio_directory)
+        if COVERAGE_FILTERS.get(self.coverage_var.get()) is not None:
+            # A file may have moved in or out of the coverage filter
+            self._filter_result = None
+            self.update_audio_listbox()
+        else:
+            self.audio_list.refresh()
+    
+    def on_audio_select(self, file_path):
+        """Handle selection of audio file from the files list"""
+        # Selecting the open file programmatically is a no-op
+        if file_path != self.audio_file:
+            self.load_audio_file(file_path)
+    
+    def select_audio_in_list(self, file_path):
+        """Select and scroll to a file in the files list if it is shown"""
+        self.audio_list.select(file_path)
+        self.audio_list.see(file_path)
+    
+    # ====== Duration probing functions ======
+    
+    def start_duration_probe(self, files=None):
+        """Read durations of audio files from their headers in a background thread
+        
+        Without files every file of the directory whose duration is not known
+        yet is probed and earlier probes are abandoned; given files (e.g. ones
+        that just appeared) are probed alongside a probe that is already running.
+        """
+        if files is None:
+            self._probe_generation += 1
+            self._probe_running = 0
+            files = [path for path in self.audio_files if path not in self.audio_durations]
+        generation = self._probe_generation
+        
+        def probe_all():
+            for file_path in files:
+                if generation != self._probe_generation:
+                    return  # A newer directory scan took over
+                record = self.corpus_index.get(file_path)
+                if record is not None:
+                    duration = record["duration"]
+                else:
+                    info = probe_audio(file_path)
+                    duration = info.duration if info else None
+                self._probe_queue.put((generation, file_path, duration))
+            self._probe_queue.put((generation, None, None))
+        
+        threading.Thread(target=probe_all, name="duration-probe", daemon=True).start()
+        self._probe_running += 1
+        if not self._probe_polling:
+            self._probe_polling = True
+            self.root.after(100, self.poll_duration_probe)
+    
+    def poll_duration_probe(self):
+        """Fill in the duration column as probe results arrive"""
+        arrived = {}
+        while True:
+            try:
+                generation, file_path, duration = self._probe_queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._probe_generation:
+                continue
+            if file_path is None:
+                self._probe_running -= 1
+                continue
+            if duration is not None:
+                self.audio_durations[file_path] = duration
+                arrived[file_path] = duration
+        
+        # Only rows on screen are drawn, so one refresh covers the whole batch
+        if arrived:
+            self.audio_list.refresh()
+            self.corpus_db.set_durations(arrived)
+        
+        if self._probe_running > 0:
+            self.root.after(100, self.poll_duration_probe)
+        else:
+            self._probe_polling = False
+    
+    # ====== Duplicate recordings ======
+    
+    def start_duplicate_scan(self, fingerprint=()):
+        """Fingerprint the given files in a background thread, then regroup duplicate recordings"""
+        generation = self._duplicate_generation
+        files = list(self.audio_catalog.files) + list(self.duplicate_of)
+        fingerprint = list(fingerprint)
+        
+        def scan():
+            result = None
+            try:
+                for file_path in self.corpus_db.files_without_fingerprint(fingerprint):
+                    try:
+                        duration, print_ = fingerprint_file(file_path, self.audio_cache)
+                    except Exception:
+                        continue  # e.g. removed meanwhile; it is not grouped
+                    self.corpus_db.store_fingerprint(file_path, duration, print_)
+                result = split_duplicates(duplicate_groups(self.corpus_db.fingerprints(files)))
+            finally:
+                self._duplicate_queue.put((generation, result))
+        
+        threading.Thread(target=scan, name="duplicate-scan", daemon=True).start()
+        self._duplicate_scans += 1
+        if self._duplicate_scans == 1:
+            self.root.after(500, self.poll_duplicate_scan)
+    
+    def poll_duplicate_scan(self):
+        """Apply the result of the latest duplicate scan once it is ready"""
+        latest = None
+        while True:
+            try:
+                generation, result = self._duplicate_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._duplicate_scans -= 1
+            if result is not None and generation == self._duplicate_generation:
+                latest = result
+        
+        if latest is not None:
+            self._duplicate_result = latest
+            self.apply_duplicates()
+        if self._duplicate_scans > 0:
+            self.root.after(500, self.poll_duplicate_scan)
+    
+    def toggle_hide_duplicates(self):
+        """Show or hide redundant copies in the files list"""
+        self.apply_duplicates()
+    
+    def apply_duplicates(self):
+        """Hide redundant copies found by the last duplicate scan from the catalog and files list"""
+        redundant, conflicts = self._duplicate_result
+        if not self.hide_duplicates.get():
+            redundant = {}
+        
+        shown = [path for path in self.duplicate_of if path not in redundant and os.path.exists(path)]
+        hidden = [path for path in redundant if path in self.audio_catalog]
+        for path in shown:
+            self.audio_catalog.add(path)
+        for path in hidden:
+            self.audio_catalog.remove(path)
+        self.duplicate_of = {path: canonical for path, canonical in redundant.items()
+                             if path in self.duplicate_of or path in hidden}
+        
+        if shown or hidden:
+            self._filter_result = None
+            self.update_audio_listbox()
+        
+        notes = []
+        if self.duplicate_of:
+            notes.append(f"hiding {len(self.duplicate_of)} duplicate recordings")
+        if conflicts:
+            names = " = ".join(os.path.basename(path) for path in conflicts[0])
+            notes.append(f"{len(conflicts)} recordings appear under more than one verse (e.g. {names})")
+        if notes and (shown or hidden or conflicts):
+            self.status_var.set(f"{len(self.audio_files)} audio files; " + "; ".join(notes))
+    
+    def get_audio_duration(self, file_path):
+        """Return the duration of an audio file from its header, without decoding it"""
+        if file_path not in self.audio_durations:
+            info = probe_audio(file_path)
+            if info is None:
+                return None
+            self.audio_durations[file_path] = info.duration
+        return self.audio_durations[file_path]
+    
+    def format_duration_cell(self, file_path):
+        """Text for the duration column, empty until the file has been probed"""
+        duration = self.audio_durations.get(file_path)
+        if duration is None:
+            return ""
+        return self.format_time(duration, show_ms=False)
+    
+    def find_segments_past_end(self, verse, file_path):
+        """Return labels of segments in verse that end after the audio file does"""
+        if not verse or not file_path:
+            return []
+        duration = self.get_audio_duration(file_path)
+        if duration is None:
+            return []
+        # Header durations can be off by a frame or two
+        tolerance = 0.05
+        return [
+            segment.get('label', '?') for segment in verse.get('segments', [])
+            if segment.get('end') is not None and segment['end'] > duration + tolerance
+        ]
     
     def load_audio_file(self, file_path):
-        """Load an audio file and display its waveform"""
-        try:
-            # Load audio data with librosa
-            self.y, self.sr = librosa.load(file_path, sr=None)
-            self.audio_file = file_path
-            self.audio_duration = len(self.y) / self.sr
+        """Start loading an audio file; the waveform fills in while it decodes"""
+        if not os.path.isfile(file_path):
+            self.status_var.set(f"Error loading audio file: {file_path} not found")
+            messagebox.showerror("Error", f"Could not load audio file: {file_path} not found")
+            return
             
-            # Reset playback state
-            pygame.mixer.music.load(file_path)
-            self.is_playing = False
-            self.current_position = 0
-            self.view_start = 0
+        # Reset playback state; the transport is usable once the first block is decoded
+        self.playback.clear()
+        self.spectrogram.clear()
+        self.overview.clear()
+        self.audio_file = file_path
+        self.y = None
+        self.peaks = None
+        self.audio_duration = 0
+        self.is_playing = False
+        self.play_btn.config(text="▶")
+        self.current_position = 0
+        self.view_start = 0
+        
+        filename = os.path.basename(file_path)
+        header_duration = self.get_audio_duration(file_path)
+        if header_duration is not None:
+            self.file_info_var.set(f"{filename} ({self.format_time(header_duration)}, loading...)")
+        else:
+            self.file_info_var.set(f"{filename} (loading...)")
+        self.status_var.set(f"Loading audio file: {filename}")
+        
+        # Decode in the background; a newer selection cancels this load
+        self.audio_loader.load(
+            file_path, self.on_audio_progress, self.on_audio_loaded, self.on_audio_load_error
+        )
+        
+        # Try to extract chapter/verse from filename and load corresponding data
+        self.extract_chapter_verse_from_filename(filename)
+    
+    def on_audio_progress(self, y, sr, peaks, expected_duration, playback):
+        """Show and play the part of the audio decoded so far"""
+        first_update = self.y is None
+        self.y, self.sr, self.peaks = y, sr, peaks
+        self.audio_duration = len(y) / sr
+        if playback is not None:
+            # Playback started on an earlier part carries on into the new one
+            self.playback.extend_source(*playback)
+        
+        if first_update:
+            self.view_window = min(expected_duration or self.audio_duration, 10)
+            
+        self.overview.set_audio(y, peaks, self.audio_duration)
+        self.invalidate()
+        
+        filename = os.path.basename(self.audio_file)
+        self.status_var.set(
+            f"Loading audio file: {filename} ({self.format_time(self.audio_duration, show_ms=False)}"
+            + (f" of {self.format_time(expected_duration, show_ms=False)})" if expected_duration else ")")
+        )
+    
+    def on_audio_loaded(self, y, sr, peaks, playback):
+        """Finish loading once the whole file is decoded"""
+        first_update = self.y is None
+        self.y, self.sr, self.peaks = y, sr, peaks
+        self.audio_duration = len(self.y) / self.sr
+        self.playback.extend_source(*playback)
+        self.spectrogram.set_source(self.audio_file, y, sr)
+        
+        if first_update:
             self.view_window = min(self.audio_duration, 10)  # Show 10 seconds or full file
             
-            # Update display
-            self.plot_waveform()
-            self.draw_time_scale()
-            
-            # Update file info
-            filename = os.path.basename(file_path)
-            duration_str = self.format_time(self.audio_duration)
-            self.file_info_var.set(f"{filename} ({duration_str})")
-            
-            # Try to extract chapter/verse from filename and load corresponding data
-            self.extract_chapter_verse_from_filename(filename)
-            
-            self.status_var.set(f"Loaded audio file: {filename}")
-            
-        except Exception as e:
-            self.status_var.set(f"Error loading audio file: {str(e)}")
-            messagebox.showerror("Error", f"Could not load audio file: {str(e)}")
+        # Update display; the overview is rendered once for the finished file
+        self.overview.set_audio(y, peaks, self.audio_duration)
+        self.invalidate()
+        
+        # Update file info
+        filename = os.path.basename(self.audio_file)
+        duration_str = self.format_time(self.audio_duration)
+        self.file_info_var.set(f"{filename} ({duration_str})")
+        
+        self.status_var.set(f"Loaded audio file: {filename}")
+        
+        # Start decoding the files the annotator is likely to open next
+        self.prefetch_neighbours()
+    
+    def on_audio_load_error(self, error):
+        """Report a failed background load"""
+        self.playback.clear()  # Playback of the part decoded before the error would wait for the rest
+        self.is_playing = False
+        self.play_btn.config(text="▶")
+        self.status_var.set(f"Error loading audio file: {str(error)}")
+        messagebox.showerror("Error", f"Could not load audio file: {str(error)}")
     
     def extract_chapter_verse_from_filename(self, filename):
         """Extract chapter and verse numbers from filename and load verse data"""
-        match = re.search(r'(\d+)\.(\d+)', filename)
-        if match:
-            chapter = match.group(1)
-            verse = match.group(2)
-            
+        key = parse_audio_key(filename)
+        if key:
             # Update chapter/verse entries
-            self.chapter_var.set(chapter)
-            self.verse_var.set(verse)
+            self.chapter_var.set(str(key.chapter))
+            self.verse_var.set(str(key.verse))
             
             # Try to load verse data
             self.go_to_verse()
@@ -615,40 +1087,56 @@ class AudacityInspiredGitaTagger:
         if not self.audio_file or not self.audio_files:
             return
             
-        current_index = self.audio_files.index(self.audio_file)
-        if current_index > 0:
-            self.load_audio_file(self.audio_files[current_index - 1])
-            
-            # Update selection in listbox
-            self.audio_listbox.selection_clear(0, tk.END)
-            filename = os.path.basename(self.audio_files[current_index - 1])
+        previous_file = self.audio_catalog.neighbour(self.audio_file, -1)
+        if previous_file:
+            self.load_audio_file(previous_file)
             
-            # Find the item in the displayed listbox
-            for i in range(self.audio_listbox.size()):
-                if self.audio_listbox.get(i) == filename:
-                    self.audio_listbox.selection_set(i)
-                    self.audio_listbox.see(i)
-                    break
+            # Update selection in the files list
+            self.select_audio_in_list(previous_file)
     
     def load_next_audio(self):
         """Load the next audio file in the list"""
         if not self.audio_file or not self.audio_files:
             return
             
-        current_index = self.audio_files.index(self.audio_file)
-        if current_index < len(self.audio_files) - 1:
-            self.load_audio_file(self.audio_files[current_index + 1])
-            
-            # Update selection in listbox
-            self.audio_listbox.selection_clear(0, tk.END)
-            filename = os.path.basename(self.audio_files[current_index + 1])
+        next_file = self.audio_catalog.neighbour(self.audio_file, 1)
+        if next_file:
+            self.load_audio_file(next_file)
             
-            # Find the item in the displayed listbox
-            for i in range(self.audio_listbox.size()):
-                if self.audio_listbox.get(i) == filename:
-                    self.audio_listbox.selection_set(i)
-                    self.audio_listbox.see(i)
-                    break
+            # Update selection in the files list
+            self.select_audio_in_list(next_file)
+    
+    def load_next_untagged_audio(self):
+        """Load the next file, in list order, whose verse is untagged or only partly tagged"""
+        if not self.audio_files:
+            return
+        if not self.file_tag_status:
+            self.status_var.set("No tagging status yet; load the Gita data first")
+            return
+        
+        # Other recordings of the open verse (variants, the rest of a combined shloka) are skipped
+        current = set()
+        current_key = self.audio_catalog.keys.get(self.audio_file)
+        if current_key:
+            current.add((current_key.chapter, current_key.verse))
+        if self.verse_data and str(self.verse_data.get('chapter', '')).isdigit():
+            chapter = int(self.verse_data['chapter'])
+            current.update((chapter, number) for number in verse_numbers(self.verse_data.get('shloka', '')))
+        row = self.audio_catalog.row(self.audio_file)
+        start = -1 if row is None else row
+        for offset in range(1, len(self.audio_files) + 1):
+            file_path = self.audio_files[(start + offset) % len(self.audio_files)]
+            status = self.file_tag_status.get(file_path)
+            key = self.audio_catalog.keys.get(file_path)
+            if status is None or status[0] == STATUS_COMPLETE or (key.chapter, key.verse) in current:
+                continue
+            self.load_audio_file(file_path)
+            self.select_audio_in_list(file_path)
+            state, segments, tagged, total = status
+            self.status_var.set(f"Chapter {key.chapter}, Verse {key.verse} is {state}: "
+                                f"{segments} segments, {tagged}/{total} words tagged")
+            return
+        self.status_var.set("Every verse with a recording is completely tagged")
     
     # ====== Gita data management functions ======
     
@@ -662,8 +1150,9 @@ class AudacityInspiredGitaTagger:
     def load_gita_data_file(self, json_file):
         """Load Gita verse data from JSON file"""
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                self.all_verses = json.load(f)
+            # Parsed only when the file changed; otherwise read back with earlier tagging
+            self.all_verses = self.corpus_db.verses(json_file)
+            self.verses_file = json_file
             
             # Create lookup dictionary for quick access by chapter and verse
             self.verse_lookup = {}
@@ -671,7 +1160,11 @@ class AudacityInspiredGitaTagger:
                 if 'chapter' in verse and 'shloka' in verse:
                     key = f"{verse['chapter']}.{verse['shloka']}"
                     self.verse_lookup[key] = i
+                    # Recordings of a combined shloka such as 1.16-18 are named after one of its verses
+                    for number in verse_numbers(verse['shloka']):
+                        self.verse_lookup.setdefault(f"{verse['chapter']}.{number}", i)
             
+            self.refresh_tag_status()
             self.status_var.set(f"Loaded {len(self.all_verses)} verses from Gita JSON")
             
             # If chapter and verse are already set, try to load that verse
@@ -756,6 +1249,10 @@ class AudacityInspiredGitaTagger:
         # Update waveform to show tagged regions for this verse
         self.show_tagged_regions()
     
+    def find_audio_for_verse(self, chapter, verse):
+        """Return the main recording of chapter and verse (a variant if there is none), or None"""
+        return self.audio_catalog.find(chapter, verse)
+    
     def find_corresponding_audio(self):
         """Try to find and load the audio file for the current verse"""
         if not self.audio_files or not self.verse_data:
@@ -768,26 +1265,45 @@ class AudacityInspiredGitaTagger:
             return
             
         # Look for pattern in filenames
-        pattern = f"{chapter}.{verse}"
-        for file in self.audio_files:
-            filename = os.path.basename(file)
-            if pattern in filename:
-                # Only load if different from current file
-                if self.audio_file != file:
-                    self.load_audio_file(file)
-                    
-                    # Update selection in listbox
-                    self.audio_listbox.selection_clear(0, tk.END)
-                    for i in range(self.audio_listbox.size()):
-                        if self.audio_listbox.get(i) == filename:
-                            self.audio_listbox.selection_set(i)
-                            self.audio_listbox.see(i)
-                            break
-                            
-                return
+        file = self.find_audio_for_verse(chapter, verse)
+        if file:
+            # Only load if different from current file
+            if self.audio_file != file:
+                self.load_audio_file(file)
+                
+                # Update selection in the files list
+                self.select_audio_in_list(file)
+                        
+            return
                 
         self.status_var.set(f"No matching audio found for Chapter {chapter}, Verse {verse}")
     
+    def prefetch_neighbours(self):
+        """Queue background decoding of neighbouring files and the next verse's audio"""
+        current_index = self.audio_catalog.row(self.audio_file)
+        if current_index is None:
+            return
+            
+        depth = self.prefetcher.depth
+        
+        # Nearest files first so they are decoded first
+        paths = []
+        for offset in range(1, depth + 1):
+            if current_index + offset < len(self.audio_files):
+                paths.append(self.audio_files[current_index + offset])
+            if current_index - offset >= 0:
+                paths.append(self.audio_files[current_index - offset])
+        
+        # Audio for the verse after the one being displayed
+        next_verse_index = self.current_verse_index + 1
+        if self.all_verses and next_verse_index < len(self.all_verses):
+            next_verse = self.all_verses[next_verse_index]
+            next_file = self.find_audio_for_verse(next_verse.get('chapter'), next_verse.get('shloka'))
+            if next_file:
+                paths.append(next_file)
+        
+        self.prefetcher.prefetch(paths)
+    
     def on_word_select(self, event):
         """Handle selection of a Sanskrit word from the word list"""
         if not self.verse_data:
@@ -842,91 +1358,139 @@ class AudacityInspiredGitaTagger:
                 
                 if start is not None and end is not None:
                     self.current_selection = [start, end]
-                    self.plot_waveform()  # Redraw with selection
+                    self.invalidate(LAYER_SELECTION)
     
     # ====== Waveform display and interaction functions ======
     
-    def plot_waveform(self):
-        """Plot the audio waveform with current view settings"""
+    def invalidate(self, *layers):
+        """Mark display layers dirty (all if none given); they are repainted together on the next idle cycle"""
+        self._dirty_layers.update(layers or ALL_LAYERS)
+        if self._render_pending is None:
+            # Mouse motion arrives much faster than the screen refreshes; hold
+            # the next frame back so a drag renders at most ~60 times a second
+            wait = FRAME_INTERVAL_MS - int((time.monotonic() - self._last_frame_time) * 1000)
+            if wait > 0:
+                self._render_pending = self.root.after(wait, self.render_frame)
+            else:
+                self._render_pending = self.root.after_idle(self.render_frame)
+    
+    def render_frame(self):
+        """Repaint only the layers marked dirty since the last frame"""
+        self._render_pending = None
+        self._last_frame_time = time.monotonic()
+        dirty, self._dirty_layers = self._dirty_layers, set()
         if self.y is None or self.sr is None:
             return
             
-        # Clear previous plot
-        self.ax.clear()
-        
-        # Calculate visible range based on zoom level
-        if self.view_window < self.audio_duration:
-            visible_end = min(self.view_start + self.view_window, self.audio_duration)
-            start_sample = int(self.view_start * self.sr)
-            end_sample = int(visible_end * self.sr)
-            
-            # Plot visible portion of waveform
-            time = np.arange(start_sample, end_sample) / self.sr
-            self.ax.plot(time, self.y[start_sample:end_sample], linewidth=0.5)
+        with perf.span("frame"):
+            self.paint_layers(dirty)
             
-            # Set axis limits
-            self.ax.set_xlim(self.view_start, visible_end)
-        else:
-            # Plot entire waveform
-            time = np.arange(0, len(self.y)) / self.sr
-            self.ax.plot(time, self.y, linewidth=0.5)
+        # Latency from the input event that asked for this frame to the frame being on screen
+        if self._pending_action is not None:
+            name, started = self._pending_action
+            self._pending_action = None
+            perf.record(f"action.{name}", (time.perf_counter() - started) * 1000)
+    
+    def paint_layers(self, dirty):
+        """Update the views for a set of dirty layers"""
+        if LAYER_WAVEFORM in dirty:
+            with perf.span("plot_waveform"):
+                self.plot_waveform()
+            self.overview.set_viewport(*self.visible_range())
+        if LAYER_WAVEFORM in dirty or LAYER_SPECTROGRAM in dirty:
+            # The lane follows every scroll and zoom of the waveform
+            with perf.span("draw_spectrogram"):
+                self.draw_spectrogram()
+        if LAYER_REGIONS in dirty:
+            # Tagged regions are only rebuilt when they changed
+            with perf.span("draw_tagged_regions"):
+                self.draw_tagged_regions()
+        if LAYER_SELECTION in dirty:
+            self.waveform_view.set_selection(*self.current_selection)
+            if self.region_drag:
+                drag = self.region_drag
+                self.waveform_view.set_drag_region(drag['start'], drag['end'], drag['color'])
+            else:
+                self.waveform_view.set_drag_region(None, None)
+        if LAYER_CURSOR in dirty:
+            self.waveform_view.set_cursor(self.current_position, self.is_playing)
+            self.overview.set_cursor(self.current_position, self.is_playing)
+            
+        if LAYER_WAVEFORM in dirty or LAYER_REGIONS in dirty or LAYER_SPECTROGRAM in dirty:
+            with perf.span("canvas.draw"):
+                self.waveform_view.redraw()  # Paints the overlays as well
+        elif LAYER_SELECTION in dirty or LAYER_CURSOR in dirty:
+            with perf.span("canvas.blit"):
+                self.waveform_view.blit_overlays()  # Only the cursor, selection and dragged region
+            
+        if LAYER_TIME_SCALE in dirty:
+            with perf.span("draw_time_scale"):
+                self.draw_time_scale()
+    
+    def mark_action(self, name):
+        """Start timing a user action; it ends when the frame it caused is painted"""
+        if self._pending_action is None:
+            self._pending_action = (name, time.perf_counter())
+    
+    def visible_range(self):
+        """Return the (start, end) seconds shown for the current zoom level"""
+        if self.view_window < self.audio_duration:
+            return self.view_start, min(self.view_start + self.view_window, self.audio_duration)
+        return 0, self.audio_duration
+    
+    def draw_spectrogram(self):
+        """Update the spectrogram lane from cached tiles (the spectrogram layer)"""
+        if not self.show_spectrogram.get():
+            return
+        start, end = self.visible_range()
+        # Missing tiles are computed in the background and trigger another frame
+        image = self.spectrogram.image(start, end, self.waveform_view.pixel_width())
+        self.waveform_view.set_spectrogram(image, start, end)
+    
+    def toggle_spectrogram(self):
+        """Show or hide the spectrogram lane under the waveform"""
+        self.waveform_view.set_spectrogram_visible(self.show_spectrogram.get())
+        self.invalidate(LAYER_WAVEFORM, LAYER_SPECTROGRAM)
+    
+    def plot_waveform(self):
+        """Update the waveform envelope for the current view settings (the waveform layer)"""
+        if self.y is None or self.sr is None:
+            return
             
-            # Set axis limits
-            self.ax.set_xlim(0, self.audio_duration)
+        visible_start, visible_end = self.visible_range()
+        start_sample = int(visible_start * self.sr)
+        end_sample = int(visible_end * self.sr)
+        
+        # Draw from the pyramid level giving about one bucket per pixel
+        width = self.waveform_view.pixel_width()
+        times, mins, maxs, rms = self.peaks.envelope(self.y, start_sample, end_sample, width)
             
         # Set y-axis limit to be symmetric around zero
-        y_max = max(0.05, np.max(np.abs(self.y)) * 1.1)  # Add 10% margin and min value
-        self.ax.set_ylim(-y_max, y_max)
-        
-        # Add labels and grid
-        self.ax.set_xlabel('Time (s)')
-        self.ax.set_ylabel('Amplitude')
-        self.ax.grid(True, alpha=0.3)
-        
-        # Draw selection if exists
-        if self.current_selection[0] is not None and self.current_selection[1] is not None:
-            start, end = self.current_selection
-            if start <= end:  # Valid selection
-                selection_width = end - start
-                rect = patches.Rectangle(
-                    (start, -y_max), selection_width, 2 * y_max,
-                    linewidth=0, facecolor='#4CAF50', alpha=0.2
-                )
-                self.ax.add_patch(rect)
-                
-                # Add vertical lines at selection boundaries
-                self.ax.axvline(x=start, color='#4CAF50', linestyle='--', linewidth=1)
-                self.ax.axvline(x=end, color='#4CAF50', linestyle='--', linewidth=1)
-        
-        # Draw tagged regions
-        self.draw_tagged_regions()
-        
-        # Ensure playback line is on top
-        if hasattr(self, 'playback_line'):
-            self.playback_line = self.ax.axvline(
-                x=self.current_position, color='r', linewidth=1.5, 
-                visible=self.is_playing
-            )
-        
-        # Update scrollbar position
-        if self.audio_duration > 0:
-            scrollbar_pos = (self.view_start / self.audio_duration) * 100
-            self.waveform_scrollbar.set(scrollbar_pos)
+        y_max = max(0.05, self.peaks.peak() * 1.1)  # Add 10% margin and min value
+        self.waveform_view.set_waveform(times, mins, maxs, rms, visible_start, visible_end, y_max)
         
-        # Redraw the canvas
-        self.canvas.draw()
+        # Update scrollbar position (same mapping as on_waveform_scroll)
+        scroll_range = self.audio_duration - self.view_window
+        scrollbar_pos = (self.view_start / scroll_range) * 100 if scroll_range > 0 else 0
+        self._updating_scrollbar = True
+        try:
+            self.waveform_scrollbar.set(scrollbar_pos)
+        finally:
+            self._updating_scrollbar = False
     
-    def on_waveform_click(self, event):
+    def on_waveform_click(self, click_time, shift=False):
         """Handle mouse click on waveform"""
-        if event.inaxes != self.ax or self.y is None:
+        if self.y is None:
             return
             
-        # Get the time position from click
-        click_time = event.xdata
-        
-        if click_time is not None and 0 <= click_time <= self.audio_duration:
+        self.mark_action("press")
+        if 0 <= click_time <= self.audio_duration:
+            # A press on the edge of a tagged region resizes that region
+            if not shift and self.start_region_drag(click_time):
+                return
+                
             # If shift is held, update the selection end point
-            if event.key == 'shift' and self.current_selection[0] is not None:
+            if shift and self.current_selection[0] is not None:
                 self.current_selection[1] = click_time
                 self.status_var.set(f"Selection: {self.format_time(self.current_selection[0])} - {self.format_time(click_time)}")
             else:
@@ -935,18 +1499,20 @@ class AudacityInspiredGitaTagger:
                 self.current_selection[1] = click_time  # Initialize with same point
                 self.status_var.set(f"Selection started at {self.format_time(click_time)}")
             
-            # Update the plot
-            self.plot_waveform()
+            # Update the selection overlay
+            self.invalidate(LAYER_SELECTION)
     
-    def on_waveform_release(self, event):
+    def on_waveform_release(self, release_time):
         """Handle mouse release on waveform"""
-        if event.inaxes != self.ax or self.y is None:
+        if self.y is None:
             return
             
-        # Get the time position from release
-        release_time = event.xdata
-        
-        if release_time is not None and 0 <= release_time <= self.audio_duration:
+        self.mark_action("release")
+        if self.region_drag:
+            self.finish_region_drag(release_time)
+            return
+            
+        if 0 <= release_time <= self.audio_duration:
             if self.current_selection[0] is not None:
                 # Update selection end
                 self.current_selection[1] = release_time
@@ -958,43 +1524,165 @@ class AudacityInspiredGitaTagger:
                 start, end = self.current_selection
                 self.status_var.set(f"Selection: {self.format_time(start)} - {self.format_time(end)} ({self.format_time(end-start)})")
                 
-                # Update the plot
-                self.plot_waveform()
+                # Update the selection overlay
+                self.invalidate(LAYER_SELECTION)
     
-    def on_waveform_motion(self, event):
-        """Handle mouse motion on waveform (for dragging selection)"""
-        if event.inaxes != self.ax or self.y is None:
+    def on_waveform_motion(self, motion_time):
+        """Handle mouse motion on waveform while the button is held (for dragging selection)"""
+        if self.y is None:
             return
             
-        # Only update if mouse button is held down
-        if not hasattr(event, 'button') or event.button != 1:
+        self.mark_action("drag")
+        if self.region_drag:
+            self.move_region_edge(motion_time)
             return
             
-        # Get the time position
-        motion_time = event.xdata
-        
-        if motion_time is not None and 0 <= motion_time <= self.audio_duration:
+        if 0 <= motion_time <= self.audio_duration:
             if self.current_selection[0] is not None:
                 # Update selection end while dragging
                 self.current_selection[1] = motion_time
                 
-                # Update status bar but don't redraw plot on every motion event for performance
+                # Only the overlays are blitted, at most once per frame
+                self.invalidate(LAYER_SELECTION)
+                
                 start, end = self.current_selection
                 dur = abs(end - start)
                 self.status_var.set(f"Dragging: {self.format_time(start)} - {self.format_time(end)} ({self.format_time(dur)})")
     
+    def find_region_edge(self, t):
+        """Return (region, edge) for the tagged region edge within EDGE_GRAB_PIXELS of t, or None"""
+        tolerance = EDGE_GRAB_PIXELS * self.view_window / self.waveform_view.pixel_width()
+        best = None
+        for region in self.region_list:
+            for edge, edge_time in (('start', region[0]), ('end', region[1])):
+                distance = abs(edge_time - t)
+                if distance <= tolerance and (best is None or distance < best[0]):
+                    best = (distance, region, edge)
+        return best[1:] if best else None
+    
+    def start_region_drag(self, t):
+        """Grab the region edge under t, if any; returns True if a drag started"""
+        hit = self.find_region_edge(t)
+        if hit is None:
+            return False
+            
+        (start, end, label, tag, color, source), edge = hit
+        self.region_drag = {
+            'label': label, 'edge': edge, 'source': source,
+            'start': start, 'end': end, 'color': color,
+        }
+        self.status_var.set(f"Resizing '{label}': {self.format_time(start)} - {self.format_time(end)}")
+        
+        # The region is drawn as an overlay while it is dragged
+        self.invalidate(LAYER_REGIONS, LAYER_SELECTION)
+        return True
+    
+    def move_region_edge(self, t):
+        """Move the grabbed edge to t, keeping the region at least MIN_REGION_SECONDS long"""
+        drag = self.region_drag
+        t = max(0.0, min(t, self.audio_duration))
+        if drag['edge'] == 'start':
+            drag['start'] = min(t, drag['end'] - MIN_REGION_SECONDS)
+        else:
+            drag['end'] = max(t, drag['start'] + MIN_REGION_SECONDS)
+            
+        self.status_var.set(
+            f"Resizing '{drag['label']}': {self.format_time(drag['start'])} - {self.format_time(drag['end'])} "
+            f"({self.format_time(drag['end'] - drag['start'])})"
+        )
+        self.invalidate(LAYER_SELECTION)
+    
+    def finish_region_drag(self, t):
+        """Store the new bounds of the dragged region in the verse data"""
+        self.move_region_edge(t)
+        drag, self.region_drag = self.region_drag, None
+        start, end = round(drag['start'], 3), round(drag['end'], 3)
+        
+        source = drag['source']
+        if source[0] == 'segments':
+            segment = self.verse_data['segments'][source[1]]
+            segment['start'] = start
+            segment['end'] = end
+        else:
+            # Legacy synonym timestamps keep the unit they were stored in
+            _, word, in_ms = source
+            scale = 1000 if in_ms else 1
+            self.verse_data['synonyms'][word]['timestamp'].update(start=start * scale, end=end * scale)
+            
+        self.status_var.set(f"'{drag['label']}' now {self.format_time(start)} - {self.format_time(end)}")
+        self.invalidate(LAYER_REGIONS, LAYER_SELECTION)
+        self.record_verse_tagging()
+    
     def on_waveform_scroll(self, value):
         """Handle scrollbar movement for waveform view"""
-        if self.y is None or self.sr is None:
+        if self.y is None or self.sr is None or self._updating_scrollbar:
             return
             
         # Calculate new view start based on scrollbar position
+        self.mark_action("scroll")
         value_float = float(value)
         self.view_start = (value_float / 100) * max(0, self.audio_duration - self.view_window)
         
         # Update waveform
-        self.plot_waveform()
-        self.draw_time_scale()
+        self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
+    
+    def on_overview_navigate(self, t):
+        """Centre the view on a time clicked in the overview strip"""
+        if self.y is None or self.sr is None:
+            return
+        self.mark_action("overview")
+        start, end = self.visible_range()
+        window = end - start
+        self.view_start = max(0, min(t - window / 2, self.audio_duration - window))
+        self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
+    
+    def on_waveform_wheel(self, anchor_time, steps):
+        """Zoom in (steps > 0) or out around the time under the mouse"""
+        self.zoom_at(WHEEL_ZOOM_FACTOR ** steps, anchor_time)
+    
+    def zoom_at(self, factor, anchor_time=None):
+        """Divide the visible window by factor, keeping anchor_time at the same spot on screen
+        
+        The peak pyramid picks the level with about one bucket per pixel (raw
+        samples when zoomed in far enough), so every zoom step costs the same.
+        """
+        if self.y is None or self.sr is None or self.audio_duration <= 0:
+            return
+            
+        start, end = self.visible_range()
+        window = end - start
+        if anchor_time is None:
+            anchor_time = start + window / 2
+        new_window = max(MIN_VIEW_WINDOW, min(window / factor, self.audio_duration))
+        if new_window == window:
+            return
+            
+        # Same fraction of the window left of the anchor before and after
+        self.mark_action("zoom")
+        fraction = (anchor_time - start) / window if window > 0 else 0.5
+        self.view_window = new_window
+        self.view_start = max(0, min(anchor_time - fraction * new_window, self.audio_duration - new_window))
+        self.zoom_level = self.audio_duration / new_window
+        
+        self.status_var.set(f"Zoom: {self.format_time(new_window)} visible")
+        self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
+    
+    def zoom_in(self):
+        """Zoom in around the centre of the view"""
+        self.zoom_at(BUTTON_ZOOM_FACTOR)
+    
+    def zoom_out(self):
+        """Zoom out around the centre of the view"""
+        self.zoom_at(1 / BUTTON_ZOOM_FACTOR)
+    
+    def reset_zoom(self):
+        """Show the whole file"""
+        if self.y is None or self.sr is None:
+            return
+        self.view_start = 0
+        self.view_window = self.audio_duration
+        self.zoom_level = 1.0
+        self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
     
     def draw_time_scale(self):
         """Draw the time scale beneath the waveform"""
@@ -1014,17 +1702,13 @@ class AudacityInspiredGitaTagger:
         visible_end = min(self.view_start + self.view_window, self.audio_duration)
         visible_duration = visible_end - self.view_start
         
-        # Determine appropriate tick interval based on zoom level
-        if visible_duration <= 2:  # Very zoomed in, use 0.1s ticks
-            tick_interval = 0.1
-        elif visible_duration <= 10:  # Zoomed in, use 0.5s ticks
-            tick_interval = 0.5
-        elif visible_duration <= 60:  # Normal view, use 1s ticks
-            tick_interval = 1.0
-        elif visible_duration <= 300:  # Zoomed out, use 5s ticks
-            tick_interval = 5.0
-        else:  # Very zoomed out, use 10s ticks
-            tick_interval = 10.0
+        if visible_duration <= 0:
+            return
+            
+        # Tick interval of 1, 2 or 5 times a power of ten, about TIME_SCALE_TICK_PIXELS apart
+        raw_interval = visible_duration * TIME_SCALE_TICK_PIXELS / width
+        magnitude = 10 ** math.floor(math.log10(raw_interval))
+        tick_interval = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw_interval)
         
         # Calculate first tick position
         first_tick = math.ceil(self.view_start / tick_interval) * tick_interval
@@ -1047,15 +1731,17 @@ class AudacityInspiredGitaTagger:
     
     def draw_tagged_regions(self):
         """Draw colored regions for tagged words on the waveform"""
-        if self.y is None or not self.verse_data:
+        if self.y is None:
+            return
+        if not self.verse_data:
+            self.region_list = []
+            self.waveform_view.set_regions([])
+            self.overview.set_segments([])
             return
             
-        # Clear existing region references
-        self.waveform_patches = []
-        
-        # Get y-axis limits for rectangle height
-        y_lim = self.ax.get_ylim()
-        y_min, y_max = y_lim
+        # (start, end, label, tag, color, source) for each region, where source
+        # locates it in verse_data so dragged edges can be written back
+        regions = []
         
         # Assign different colors to each tag type
         colors = {
@@ -1096,26 +1782,8 @@ class AudacityInspiredGitaTagger:
                     
                     color_index[segment_type] += 1
                     
-                    # Create rectangle for the region
-                    rect = patches.Rectangle(
-                        (start, y_min), end - start, y_max - y_min,
-                        linewidth=0, facecolor=color, alpha=0.3
-                    )
-                    self.ax.add_patch(rect)
-                    self.waveform_patches.append(rect)
-                    
-                    # Add tag/type indicator
-                    text_x = start + (end - start) / 2
-                    text_y = y_max * 0.9
-                    self.ax.text(text_x, text_y, f"[{segment_type}]", 
-                              ha='center', va='bottom', fontsize=6,
-                              bbox=dict(facecolor='white', alpha=0.7, boxstyle='round,pad=0.1'))
-                    
-                    # Add label above the region
-                    text_y = y_max * 0.8
-                    self.ax.text(text_x, text_y, label, 
-                              ha='center', va='bottom', fontsize=8,
-                              bbox=dict(facecolor='white', alpha=0.7, boxstyle='round,pad=0.2'))
+                    # Region with its tag/type indicator and label
+                    regions.append((start, end, label, f"[{segment_type}]", color, ('segments', i)))
         
         # For backwards compatibility, also draw timestamps from synonyms
         # (these will eventually be migrated to segments)
@@ -1127,7 +1795,8 @@ class AudacityInspiredGitaTagger:
                     
                     if start is not None and end is not None and start != end:
                         # Convert to seconds if stored in milliseconds
-                        if start > 1000:  # Assume milliseconds
+                        in_ms = start > 1000  # Assume milliseconds
+                        if in_ms:
                             start = start / 1000
                             end = end / 1000
                             
@@ -1144,31 +1813,20 @@ class AudacityInspiredGitaTagger:
                             color = alt_colors[color_index['word'] % len(alt_colors)]
                         color_index['word'] += 1
                         
-                        # Create rectangle for the region
-                        rect = patches.Rectangle(
-                            (start, y_min), end - start, y_max - y_min,
-                            linewidth=0, facecolor=color, alpha=0.3
-                        )
-                        self.ax.add_patch(rect)
-                        self.waveform_patches.append(rect)
-                        
-                        # Add legacy indicator
-                        text_x = start + (end - start) / 2
-                        text_y = y_max * 0.9
-                        self.ax.text(text_x, text_y, "[legacy]", 
-                                  ha='center', va='bottom', fontsize=6,
-                                  bbox=dict(facecolor='white', alpha=0.7, boxstyle='round,pad=0.1'))
-                        
-                        # Add word label above the region
-                        text_y = y_max * 0.8
-                        self.ax.text(text_x, text_y, word, 
-                                  ha='center', va='bottom', fontsize=8,
-                                  bbox=dict(facecolor='white', alpha=0.7, boxstyle='round,pad=0.2'))
+                        # Region with legacy indicator and word label
+                        regions.append((start, end, word, "[legacy]", color, ('synonyms', word, in_ms)))
+        
+        self.region_list = regions
+        # The view only rebuilds its region artists when this list changes;
+        # a region being resized is shown by the drag overlay instead
+        dragged = self.region_drag['source'] if self.region_drag else None
+        self.waveform_view.set_regions([region[:5] for region in regions if region[5] != dragged])
+        # The overview bitmap is only repainted when the segments change
+        self.overview.set_segments([(start, end, color) for start, end, _, _, color, _ in regions])
     
     def show_tagged_regions(self):
         """Highlight regions in waveform that have been tagged"""
-        if self.y is not None:
-            self.plot_waveform()  # Redraw with tagged regions
+        self.invalidate(LAYER_REGIONS)
     
     def show_all_tags(self):
         """Show a dialog with all tagged words and their timestamps"""
@@ -1282,8 +1940,13 @@ class AudacityInspiredGitaTagger:
             self.status_var.set("No audio file loaded")
             return
             
+        if self.playback.samples is None:
+            self.status_var.set("Audio is still loading")
+            return
+            
         if self.is_playing:
-            pygame.mixer.music.pause()
+            self.playback.pause()
+            self.current_position = self.playback.position()
             self.is_playing = False
             self.play_btn.config(text="▶")
             self.status_var.set("Playback paused")
@@ -1292,26 +1955,21 @@ class AudacityInspiredGitaTagger:
             if self.current_position >= self.audio_duration - 0.1:
                 self.current_position = 0
                 
-            # Store start time for position calculation
-            self._playback_start_time = self.current_position
-                
             # Start playback
-            pygame.mixer.music.play(start=self.current_position)
+            self.playback.play(start=self.current_position)
             self.is_playing = True
             self.play_btn.config(text="⏸")
-            self.status_var.set("Playing audio")
+            self.status_var.set(f"Playing audio (position from the {self.playback.clock})")
             
             # Make playback line visible
-            if hasattr(self, 'playback_line'):
-                self.playback_line.set_visible(True)
-                self.canvas.draw_idle()
+            self.invalidate(LAYER_CURSOR)
     
     def stop_playback(self):
         """Stop audio playback and reset position"""
         if not self.audio_file:
             return
             
-        pygame.mixer.music.stop()
+        self.playback.stop()
         self.is_playing = False
         self.current_position = 0
         self.play_btn.config(text="▶")
@@ -1320,10 +1978,7 @@ class AudacityInspiredGitaTagger:
         self.position_var.set(self.format_time(0))
         
         # Update playback line
-        if hasattr(self, 'playback_line'):
-            self.playback_line.set_xdata([0])
-            self.playback_line.set_visible(False)
-            self.canvas.draw_idle()
+        self.invalidate(LAYER_CURSOR)
             
         self.status_var.set("Playback stopped")
     
@@ -1333,6 +1988,10 @@ class AudacityInspiredGitaTagger:
             self.status_var.set("No audio file loaded")
             return
             
+        if self.playback.samples is None:
+            self.status_var.set("Audio is still loading")
+            return
+            
         if self.current_selection[0] is None or self.current_selection[1] is None:
             self.status_var.set("No region selected")
             return
@@ -1342,44 +2001,17 @@ class AudacityInspiredGitaTagger:
             self.status_var.set("Invalid selection (start >= end)")
             return
             
-        # Store start time for position calculation
-        self._playback_start_time = start
-        
-        # Start playing from selection start
-        pygame.mixer.music.play(start=start)
+        # Play exactly the selected samples; the engine stops at the end
+        self.playback.play(start=start, end=end)
         self.current_position = start
         self.is_playing = True
         self.play_btn.config(text="⏸")
         
         # Make playback line visible
-        if hasattr(self, 'playback_line'):
-            self.playback_line.set_xdata([start])
-            self.playback_line.set_visible(True)
-            self.canvas.draw_idle()
+        self.invalidate(LAYER_CURSOR)
             
-        # Schedule stopping at selection end
-        duration = end - start
-        self.root.after(int(duration * 1000), self.stop_at_selection_end)
-        
         self.status_var.set(f"Playing selection: {self.format_time(start)} - {self.format_time(end)}")
     
-    def stop_at_selection_end(self):
-        """Stop playback when selection end is reached"""
-        if self.is_playing and self.current_selection[1] is not None:
-            end = self.current_selection[1]
-            if abs(self.current_position - end) < 0.1:  # Within 100ms of the end
-                pygame.mixer.music.pause()
-                self.is_playing = False
-                self.play_btn.config(text="▶")
-                self.current_position = end
-                
-                # Update playback line
-                if hasattr(self, 'playback_line'):
-                    self.playback_line.set_xdata([end])
-                    self.canvas.draw_idle()
-                    
-                self.status_var.set("Playback of selection complete")
-    
     def play_tagged_segment(self):
         """Play the audio segment for the selected word"""
         if not self.audio_file or not self.current_word or not self.verse_data:
@@ -1409,7 +2041,7 @@ class AudacityInspiredGitaTagger:
             
         # Update selection to match the word's timestamps
         self.current_selection = [start, end]
-        self.plot_waveform()  # Update display
+        self.invalidate(LAYER_SELECTION)
         
         # Play the segment
         self.play_selection()
@@ -1441,36 +2073,70 @@ class AudacityInspiredGitaTagger:
             
         # Set position and update display
         self.current_position = timestamp
+        self.playback.seek(timestamp)
         
         # Ensure the timestamp is visible in current view
         if timestamp < self.view_start or timestamp > self.view_start + self.view_window:
             self.view_start = max(0, min(timestamp - self.view_window * 0.1, self.audio_duration - self.view_window))
-            self.plot_waveform()
-            self.draw_time_scale()
+            self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
         
         # Update playback line
-        if hasattr(self, 'playback_line'):
-            self.playback_line.set_xdata([self.current_position])
-            self.canvas.draw_idle()
+        self.invalidate(LAYER_CURSOR)
             
         self.status_var.set(f"Jumped to {mark_type} position for '{self.current_word}': {self.format_time(timestamp)}")
     
+    def seek_to(self, seconds):
+        """Move the playhead, scrolling it into view; playback continues from there if it was running"""
+        if not self.audio_file:
+            return
+        seconds = max(0.0, min(seconds, self.audio_duration))
+        self.current_position = seconds
+        self.playback.seek(seconds)
+        self.position_var.set(self.format_time(seconds))
+        
+        if seconds < self.view_start or seconds > self.view_start + self.view_window:
+            self.view_start = max(0, min(seconds - self.view_window * 0.1, self.audio_duration - self.view_window))
+            self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
+        self.invalidate(LAYER_CURSOR)
+    
+    def goto_start(self):
+        """Move the playhead to the beginning of the file"""
+        self.seek_to(0)
+    
+    def goto_end(self):
+        """Move the playhead to the end of the file"""
+        self.seek_to(self.audio_duration)
+    
+    def jump_back(self):
+        """Move the playhead JUMP_SECONDS back"""
+        self.seek_to(self.get_playback_position() - JUMP_SECONDS)
+    
+    def jump_forward(self):
+        """Move the playhead JUMP_SECONDS forward"""
+        self.seek_to(self.get_playback_position() + JUMP_SECONDS)
+    
     # ====== Segment marking functions ======
     
+    def get_playback_position(self):
+        """Read the current position from the playback clock rather than the last UI update"""
+        if self.is_playing:
+            self.current_position = self.playback.position()
+        return self.current_position
+    
     def mark_segment_start(self):
         """Mark the start of a segment at the current position"""
         if self.y is None:
             return
             
-        # Set selection start to current position
-        self.current_selection[0] = self.current_position
+        # Set selection start to the position being heard right now
+        self.current_selection[0] = self.get_playback_position()
         
         # If end is not set or is before start, set it to the same position
         if self.current_selection[1] is None or self.current_selection[1] < self.current_selection[0]:
             self.current_selection[1] = self.current_position
         
-        # Update display
-        self.plot_waveform()
+        # Update the selection overlay
+        self.invalidate(LAYER_SELECTION)
         
         self.status_var.set(f"Marked segment start at {self.format_time(self.current_position)}")
     
@@ -1479,15 +2145,15 @@ class AudacityInspiredGitaTagger:
         if self.y is None:
             return
             
-        # Set selection end to current position
-        self.current_selection[1] = self.current_position
+        # Set selection end to the position being heard right now
+        self.current_selection[1] = self.get_playback_position()
         
         # If start is not set or is after end, set it to the same position
         if self.current_selection[0] is None or self.current_selection[0] > self.current_selection[1]:
             self.current_selection[0] = self.current_position
         
-        # Update display
-        self.plot_waveform()
+        # Update the selection overlay
+        self.invalidate(LAYER_SELECTION)
         
         self.status_var.set(f"Marked segment end at {self.format_time(self.current_position)}")
     
@@ -1495,7 +2161,7 @@ class AudacityInspiredGitaTagger:
         """Clear the current selection"""
         if self.current_selection[0] is not None or self.current_selection[1] is not None:
             self.current_selection = [None, None]
-            self.plot_waveform()
+            self.invalidate(LAYER_SELECTION)
             self.status_var.set("Selection cleared")
     
     def tag_selected_region(self):
@@ -1535,9 +2201,10 @@ class AudacityInspiredGitaTagger:
             self.verse_data['segments'] = []
             
         self.verse_data['segments'].append(segment)
+        self.record_verse_tagging()
         
         # Update display
-        self.plot_waveform()
+        self.invalidate(LAYER_REGIONS)
         
         self.status_var.set(
             f"Tagged '{self.current_word}' ({segment_type}) with {self.format_time(start)} - {self.format_time(end)} " +
@@ -1581,9 +2248,10 @@ class AudacityInspiredGitaTagger:
             self.verse_data['segments'] = []
             
         self.verse_data['segments'].append(segment)
+        self.record_verse_tagging()
         
         # Update display
-        self.plot_waveform()
+        self.invalidate(LAYER_REGIONS)
         
         self.status_var.set(
             f"Tagged '{custom_label}' ({segment_type}) with {self.format_time(start)} - {self.format_time(end)} " +
@@ -1597,41 +2265,71 @@ class AudacityInspiredGitaTagger:
     
     def update_playback_position(self):
         """Update the playback position during audio playback"""
-        # Update if playing and mixer is active
-        if self.is_playing and pygame.mixer.get_init() and pygame.mixer.music.get_busy():
-            # Get position from pygame (returns ms)
-            pos_ms = pygame.mixer.music.get_pos()
-            
-            if pos_ms > 0:  # Valid position
-                # Add to starting position (pos_ms is time since playback started)
-                current_time = self._playback_start_time + (pos_ms / 1000)
-                
-                # Update position
-                self.current_position = current_time
-                
-                # Update position display
-                self.position_var.set(self.format_time(current_time))
-                
-                # Move playback line if visible in current view
-                if self.view_start <= current_time <= self.view_start + self.view_window:
-                    if hasattr(self, 'playback_line'):
-                        self.playback_line.set_xdata([current_time])
-                        self.canvas.draw_idle()  # Only update the line, not the whole plot
-                
-                # Scroll view if playback position is outside visible area
-                if current_time > self.view_start + self.view_window * 0.9:
-                    self.view_start = min(
-                        self.audio_duration - self.view_window,
-                        current_time - self.view_window * 0.1
-                    )
-                    self.plot_waveform()
-                    self.draw_time_scale()
-        
-        # Schedule next update (40ms for ~25 fps)
-        self.root.after(40, self.update_playback_position)
+        if self.is_playing:
+            current_time = self.playback.position()
+            
+            # Update position
+            self.current_position = current_time
+            
+            # Update position display
+            self.position_var.set(self.format_time(current_time))
+            
+            # Move playback line (blitted, not a full redraw)
+            self.invalidate(LAYER_CURSOR)
+            
+            # Scroll view if playback position is outside visible area
+            if current_time > self.view_start + self.view_window * 0.9:
+                self.view_start = min(
+                    self.audio_duration - self.view_window,
+                    current_time - self.view_window * 0.1
+                )
+                self.invalidate(LAYER_WAVEFORM, LAYER_TIME_SCALE)
+            
+            # The engine stops by itself at the end of the file or selection
+            if not self.playback.is_playing():
+                self.is_playing = False
+                self.play_btn.config(text="▶")
+                self.status_var.set("Playback complete")
+        
+        # Schedule next update (16ms for ~60 fps; blitting keeps each frame cheap)
+        self.root.after(16, self.update_playback_position)
+    
+    def record_verse_tagging(self):
+        """Update the current verse's tagging progress in the corpus database; its segments are stored on save"""
+        if not self.verse_data or not self.verses_file:
+            return
+        try:
+            self.corpus_db.record_tag_status(self.verses_file, self.verse_data,
+                                             os.path.basename(self.audio_file) if self.audio_file else "")
+            self.refresh_tag_status()
+        except Exception as e:
+            self.status_var.set(f"Could not record tagging progress: {str(e)}")
     
     # ====== Utility functions ======
     
+    def show_shortcuts(self):
+        """Show the keyboard shortcuts"""
+        messagebox.showinfo("Keyboard Shortcuts", "\n".join([
+            "Space\tPlay / pause",
+            "S\tStop",
+            "P\tPlay selection",
+            f"Left / Right\tJump {JUMP_SECONDS:g} s back / forward",
+            "H / J\tGo to start / end",
+            "B / E\tMark selection start / end",
+            "C\tClear selection",
+            "T\tTag selected region",
+            "N\tNext untagged verse",
+            "+ / - / 0\tZoom in / out / reset",
+            "Ctrl+O\tOpen audio file",
+            "Ctrl+S\tSave tags",
+            "F12\tPerformance overlay",
+        ]))
+    
+    def show_about(self):
+        """Show information about the application"""
+        messagebox.showinfo("About", "Gita Audio Tagger\n\n"
+                            "Tag words and lines of Bhagavad-gita recitations with their time in the recording.")
+    
     def format_time(self, seconds, show_ms=True):
         """Format time in seconds to string display"""
         if seconds is None:
@@ -1647,7 +2345,7 @@ class AudacityInspiredGitaTagger:
             return f"{minutes:02d}:{seconds_remainder:02d}"
     
     def save_tagged_data(self):
-        """Save the updated verse data with tags to a JSON file"""
+        """Save the updated verse data with tags to a JSON file, and its segments back to the verse file"""
         if not self.verse_data or not self.all_verses:
             messagebox.showinfo("No Data", "No verse data to save.")
             return
@@ -1666,6 +2364,15 @@ class AudacityInspiredGitaTagger:
         if not save_file:
             return
             
+        # Check segment timestamps against the file length read from its header
+        past_end = self.find_segments_past_end(self.verse_data, self.audio_file)
+        if past_end and not messagebox.askyesno(
+            "Segments Past End",
+            f"{len(past_end)} segment(s) end after the audio file does "
+            f"({', '.join(past_end[:5])}{', ...' if len(past_end) > 5 else ''}).\n\nSave anyway?"
+        ):
+            return
+            
         try:
             # Migrate any legacy timestamps to segments format
             self.migrate_timestamps_to_segments()
@@ -1694,6 +2401,11 @@ class AudacityInspiredGitaTagger:
             # Save to file
             with open(save_file, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, ensure_ascii=False, indent=4)
+            
+            # The verse file holds the saved segments, so they come back on the next launch
+            self.corpus_db.save_verses(self.verses_file, self.all_verses)
+            self.corpus_db.record_tag_status(self.verses_file, verse, output_data["filename"])
+            self.refresh_tag_status()
                 
             self.status_var.set(f"Tagged data saved to {save_file}")
             
@@ -1701,6 +2413,38 @@ class AudacityInspiredGitaTagger:
             messagebox.showerror("Error", f"Could not save file: {str(e)}")
             self.status_var.set(f"Error saving data: {str(e)}")
     
+    def export_selection_audio(self):
+        """Save the selected region of the audio file as a WAV file"""
+        if not self.audio_file:
+            self.status_var.set("No audio file loaded")
+            return
+            
+        if self.current_selection[0] is None or self.current_selection[1] is None:
+            self.status_var.set("No region selected")
+            return
+            
+        start, end = self.current_selection
+        if start >= end:
+            self.status_var.set("Invalid selection (start >= end)")
+            return
+            
+        save_file = filedialog.asksaveasfilename(
+            title="Export Selection Audio",
+            defaultextension=".wav",
+            filetypes=[("WAV Files", "*.wav")]
+        )
+        
+        if not save_file:
+            return
+            
+        try:
+            # Decodes only the selected window, at the file's native rate
+            export_segment(self.audio_file, start, end, save_file)
+            self.status_var.set(f"Exported {self.format_time(start)} - {self.format_time(end)} to {save_file}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not export selection: {str(e)}")
+            self.status_var.set(f"Error exporting selection: {str(e)}")
+    
     def migrate_timestamps_to_segments(self):
         """Migrate legacy timestamp format to new segments format"""
         for verse_index, verse in enumerate(self.all_verses):
@@ -1745,7 +2489,12 @@ class AudacityInspiredGitaTagger:
             # Update the verse in all_verses
             self.all_verses[verse_index] = verse
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tag words and lines of Gita recitations")
+    parser.add_argument("--renderer", choices=WAVEFORM_RENDERERS, default="matplotlib",
+                        help="waveform renderer; 'canvas' is lighter and skips matplotlib "
+                             "(default: %(default)s)")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = AudacityInspiredGitaTagger(root)
-    app.save_tagged_data()
-    app.save_tagged_data()
\ No newline at end of file
+    app = AudacityInspiredGitaTagger(root, renderer=args.renderer)
+    root.mainloop()
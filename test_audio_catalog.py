@@ -0,0 +1,47 @@
+import pytest
+
+from audio_catalog import AudioCatalog, AudioKey, parse_audio_key, sort_by_chapter_verse
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Bhagavad-gita 1.16#shorts.mp3", AudioKey(1, 16, "shorts")),
+    ("Bhagavad-gita 10.10.mp3", AudioKey(10, 10, "")),
+    ("Bhagavad-gita 7.18#shorts #mindfulness #gita.mp3", AudioKey(7, 18, "shorts")),
+    ("Bhagavad-gita 2.7 # Shorts.mp3", AudioKey(2, 7, "shorts")),
+    ("Bhagavad-gita 18.66 live.mp3", AudioKey(18, 66, "live")),
+    ("/corpus/chapter 3/3.5.wav", AudioKey(3, 5, "")),
+])
+def test_parse_audio_key(name, key):
+    assert parse_audio_key(name) == key
+
+
+@pytest.mark.parametrize("name", ["intro.mp3", "Bhagavad-gita 1.mp3", "Bhagavad-gita.mp3"])
+def test_parse_audio_key_rejects_names_without_a_verse(name):
+    assert parse_audio_key(name) is None
+
+
+def test_whole_numbers_only():
+    # "1.6" never matches inside "1.60" or "11.6"
+    assert parse_audio_key("Bhagavad-gita 1.60.mp3") == AudioKey(1, 60, "")
+    assert parse_audio_key("Bhagavad-gita 11.6.mp3") == AudioKey(11, 6, "")
+
+
+def test_catalog_order_find_and_filter():
+    files = ["Bhagavad-gita 10.10.mp3", "intro.mp3", "Bhagavad-gita 1.16#shorts.mp3",
+             "Bhagavad-gita 1.16.mp3", "Bhagavad-gita 2.1.mp3"]
+    catalog = AudioCatalog(files)
+    assert catalog.files == sorted(files, key=sort_by_chapter_verse)
+    assert catalog.files[:2] == ["Bhagavad-gita 1.16.mp3", "Bhagavad-gita 1.16#shorts.mp3"]
+    assert catalog.files[-1] == "intro.mp3"
+
+    assert catalog.find(1, 16) == "Bhagavad-gita 1.16.mp3"
+    assert catalog.find("1", "16", "shorts") == "Bhagavad-gita 1.16#shorts.mp3"
+    assert catalog.find(1, 17) is None
+    assert catalog.find("x", 1) is None
+
+    assert catalog.filter(chapter="1") == ["Bhagavad-gita 1.16.mp3", "Bhagavad-gita 1.16#shorts.mp3"]
+    assert catalog.filter(verse="10") == ["Bhagavad-gita 10.10.mp3"]
+    assert catalog.filter(text="SHORTS") == ["Bhagavad-gita 1.16#shorts.mp3"]
+    assert catalog.filter(chapter="a") == []
+    assert catalog.neighbour("Bhagavad-gita 1.16.mp3", 1) == "Bhagavad-gita 1.16#shorts.mp3"
+    assert catalog.neighbour("intro.mp3", 1) is None
@@ -0,0 +1,170 @@
+import json
+import os
+
+import pytest
+
+from corpus_db import (
+    STATUS_COMPLETE,
+    STATUS_PARTIAL,
+    STATUS_UNTAGGED,
+    CorpusDatabase,
+    verse_numbers,
+    verse_tag_status,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    corpus_db = CorpusDatabase(str(tmp_path / "corpus.sqlite3"))
+    yield corpus_db
+    corpus_db.close()
+
+
+def write_verses(path, verses, mtime_ns=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(verses, f, ensure_ascii=False)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def verse(shloka, segments=None, **synonyms):
+    data = {"chapter": "1", "shloka": shloka, "synonyms": {word: dict(meaning) for word, meaning in synonyms.items()}}
+    if segments is not None:
+        data["segments"] = segments
+    return data
+
+
+def test_verse_tag_status():
+    assert verse_tag_status(verse("1", a={}, b={})) == (STATUS_UNTAGGED, 0, 0, 2)
+    assert verse_tag_status(verse("1", [{"word_ref": "a"}], a={}, b={})) == (STATUS_PARTIAL, 1, 1, 2)
+    assert verse_tag_status(verse("1", a={"timestamp": 1.5}, b={})) == (STATUS_PARTIAL, 0, 1, 2)
+    assert verse_tag_status(verse("1", [{"label": "a"}, {"word_ref": "b"}], a={}, b={})) == (STATUS_COMPLETE, 2, 2, 2)
+    assert verse_tag_status({"chapter": "1", "shloka": "1", "segments": [{"label": "x"}]})[0] == STATUS_COMPLETE
+    # List-style files store a synonym as a plain meaning string
+    assert verse_tag_status({"synonyms": {"a": "meaning"}}) == (STATUS_UNTAGGED, 0, 0, 1)
+
+
+def test_verses_are_read_back_until_the_file_changes(db, tmp_path):
+    path = tmp_path / "gita.json"
+    write_verses(path, [verse("1", a={}), verse("2", b={})], mtime_ns=1_000_000_000)
+    assert [v["shloka"] for v in db.verses(str(path))] == ["1", "2"]
+
+    # Same size and mtime: served from the database, not parsed again
+    with open(path, "r+", encoding="utf-8") as f:
+        text = f.read()
+        f.seek(0)
+        f.write(text.replace('"2"', '"3"'))
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert [v["shloka"] for v in db.verses(str(path))] == ["1", "2"]
+
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert [v["shloka"] for v in db.verses(str(path))] == ["1", "3"]
+
+
+def test_reimport_keeps_the_segments_edited_in_the_file(db, tmp_path):
+    path = tmp_path / "gita.json"
+    saved = [{"word_ref": "a", "start": 1.0, "end": 2.0}]
+    write_verses(path, [verse("1", a={}), verse("2", b={})], mtime_ns=1_000_000_000)
+    db.verses(str(path))
+    db.save_verses(str(path), [verse("1", saved, a={}), verse("2", b={"timestamp": 3.0})])
+
+    # The file is edited by hand: verse 1 gets other segments, verse 2 loses its timestamp
+    edited = [{"word_ref": "a", "start": 1.5, "end": 2.5}]
+    write_verses(path, [verse("1", edited, a={}), verse("2", b={})], mtime_ns=3_000_000_000)
+    first, second = db.verses(str(path))
+    assert first["segments"] == edited
+    assert second["synonyms"]["b"].get("timestamp") == 3.0  # Filled in: the file has no tagging for it
+
+
+def test_reimport_does_not_mix_timestamps_into_a_tagged_verse(db, tmp_path):
+    path = tmp_path / "gita.json"
+    write_verses(path, [verse("1", a={"timestamp": 1.0}, b={"timestamp": 2.0})], mtime_ns=1_000_000_000)
+    db.verses(str(path))
+
+    write_verses(path, [verse("1", a={"timestamp": 1.25}, b={})], mtime_ns=2_000_000_000)
+    (read,) = db.verses(str(path))
+    assert read["synonyms"] == {"a": {"timestamp": 1.25}, "b": {}}
+
+
+def test_save_verses_writes_the_file(db, tmp_path):
+    path = tmp_path / "gita.json"
+    write_verses(path, [verse("1", a={})], mtime_ns=1_000_000_000)
+    db.verses(str(path))
+
+    segments = [{"word_ref": "a", "start": 0.5, "end": 1.0}]
+    db.save_verses(str(path), [verse("1", segments, a={})])
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)[0]["segments"] == segments
+    assert db.verses(str(path))[0]["segments"] == segments
+    assert db.tag_status(str(path), "1", "1")[0] == STATUS_COMPLETE
+
+
+def test_tag_status_is_kept_per_verse_file(db, tmp_path):
+    gita, tags = tmp_path / "gita.json", tmp_path / "tags.json"
+    write_verses(gita, [verse("1", a={}, b={})])
+    write_verses(tags, [verse("1", [{"word_ref": "a"}], a={})])
+    db.verses(str(gita))
+    db.verses(str(tags))
+    assert db.tag_status(str(gita), "1", "1") == (STATUS_UNTAGGED, 0, 0, 2)
+    assert db.tag_status(str(tags), "1", "1") == (STATUS_COMPLETE, 1, 1, 1)
+
+    db.record_tag_status(str(gita), verse("1", [{"word_ref": "b"}], a={}, b={}), "1.1.mp3")
+    assert db.tag_status(str(gita), "1", "1") == (STATUS_PARTIAL, 1, 1, 2)
+    assert db.tag_status(str(tags), "1", "1") == (STATUS_COMPLETE, 1, 1, 1)
+
+    # Unsaved edits are dropped when the file is opened again
+    db.verses(str(gita))
+    assert db.tag_status(str(gita), "1", "1") == (STATUS_UNTAGGED, 0, 0, 2)
+
+
+def stored_hash(db, path):
+    with db._lock:
+        return db._db.execute("SELECT content_hash FROM audio_files WHERE path = ?", (path,)).fetchone()[0]
+
+
+def test_changed_audio_file_loses_duration_and_hash(db, tmp_path):
+    audio = tmp_path / "1.1.mp3"
+    audio.write_bytes(b"\0" * 100)
+    os.utime(audio, ns=(1_000_000_000, 1_000_000_000))
+    db.add_file(str(tmp_path), str(audio))
+    db.set_durations({str(audio): 12.5})
+    db.hash_missing(str(tmp_path))
+    ((path, key, duration, _),) = db.audio_files(str(tmp_path))
+    assert (key.chapter, key.verse, duration) == (1, 1, 12.5)
+    assert stored_hash(db, path) is not None
+
+    # Rescanning an unchanged file keeps what was computed from it
+    db.replace_directory(str(tmp_path), [str(audio)])
+    assert db.audio_files(str(tmp_path))[0][2] == 12.5
+    assert stored_hash(db, path) is not None
+
+    audio.write_bytes(b"\1" * 200)
+    db.add_file(str(tmp_path), str(audio))
+    ((_, _, duration, signature),) = db.audio_files(str(tmp_path))
+    assert duration is None
+    assert signature[0] == 200
+    assert stored_hash(db, path) is None
+
+
+def test_verse_numbers():
+    assert verse_numbers("16-18") == [16, 17, 18]
+    assert verse_numbers("10") == [10]
+    assert verse_numbers(7) == [7]
+    assert verse_numbers("intro") == []
+    assert verse_numbers("") == []
+
+
+def test_file_tag_status_covers_combined_shlokas(db, tmp_path):
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir()
+    files = [str(audio_dir / name) for name in ("1.16.mp3", "1.17#shorts.mp3", "1.19.mp3", "intro.mp3")]
+    for path in files:
+        open(path, "wb").close()
+    db.replace_directory(str(audio_dir), files)
+
+    gita = tmp_path / "gita.json"
+    write_verses(gita, [verse("16-18", [{"word_ref": "a"}], a={}, b={})])
+    db.verses(str(gita))
+    status = (STATUS_PARTIAL, 1, 1, 2)
+    assert db.file_tag_status(str(audio_dir), str(gita)) == {files[0]: status, files[1]: status}
+    assert db.file_tag_status(str(audio_dir), str(tmp_path / "tags.json")) == {}
@@ -0,0 +1,60 @@
+import numpy as np
+
+from fingerprint import DUPLICATE_SIMILARITY, compute_fingerprint, duplicate_groups, similarity, split_duplicates
+
+SR = 16000
+
+
+def recitation(seed, seconds=20.0):
+    """Tone bursts at random pitches and times, loosely like syllables of a chant"""
+    rng = np.random.default_rng(seed)
+    y = np.zeros(int(seconds * SR), dtype=np.float32)
+    t = np.arange(int(0.25 * SR)) / SR
+    envelope = np.hanning(len(t))
+    for start in rng.integers(0, len(y) - len(t), size=int(seconds * 6)):
+        tone = np.sin(2 * np.pi * rng.uniform(150, 3500) * t) * envelope
+        y[start:start + len(t)] += tone.astype(np.float32)
+    return y + rng.normal(0, 0.01, len(y)).astype(np.float32)
+
+
+def entry(y):
+    return len(y) / SR, compute_fingerprint(y, SR)
+
+
+def test_copies_match_and_other_recordings_do_not():
+    original = recitation(0)
+    # Copy of the same recording: half as loud, with a little noise and starting a quarter second later
+    copy = np.concatenate([np.zeros(4096, dtype=np.float32), 0.5 * original])
+    copy = copy + np.random.default_rng(1).normal(0, 0.002, len(copy)).astype(np.float32)
+    other = recitation(2)
+
+    assert similarity(compute_fingerprint(original, SR), compute_fingerprint(copy, SR)) >= DUPLICATE_SIMILARITY
+    assert similarity(compute_fingerprint(original, SR), compute_fingerprint(other, SR)) < DUPLICATE_SIMILARITY / 2
+
+    groups = duplicate_groups({
+        "Bhagavad-gita 1.1.mp3": entry(original),
+        "Bhagavad-gita 1.1#shorts.mp3": entry(copy),
+        "Bhagavad-gita 1.2.mp3": entry(other),
+        "Bhagavad-gita 1.3.mp3": entry(original[:len(original) // 2]),  # an excerpt is not a copy
+    })
+    assert groups == [["Bhagavad-gita 1.1.mp3", "Bhagavad-gita 1.1#shorts.mp3"]]
+
+
+def test_short_signals_have_an_empty_fingerprint():
+    fingerprint = compute_fingerprint(np.zeros(100, dtype=np.float32), SR)
+    assert fingerprint.shape == (2, 0)
+    assert similarity(fingerprint, compute_fingerprint(recitation(0, 2.0), SR)) == 0.0
+    assert duplicate_groups({"a.mp3": (0.0, fingerprint)}) == []
+
+
+def test_split_duplicates():
+    groups = [
+        ["Bhagavad-gita 1.1.mp3", "Bhagavad-gita 1.1#shorts.mp3", "untitled.mp3"],
+        ["Bhagavad-gita 2.1.mp3", "Bhagavad-gita 2.10.mp3"],
+    ]
+    redundant, conflicts = split_duplicates(groups)
+    assert redundant == {
+        "Bhagavad-gita 1.1#shorts.mp3": "Bhagavad-gita 1.1.mp3",
+        "untitled.mp3": "Bhagavad-gita 1.1.mp3",
+    }
+    assert conflicts == [["Bhagavad-gita 2.1.mp3", "Bhagavad-gita 2.10.mp3"]]
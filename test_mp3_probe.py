@@ -0,0 +1,67 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from mp3_probe import probe_audio, probe_mp3
+
+DURATION_TOLERANCE = 0.1  # seconds; the probe counts the encoder's padding frames, libsndfile does not
+
+CORPUS_FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "BrajaBeats_Gita_MP3", "*.mp3")))
+
+
+def write_mp3(path, sr, channels, seconds=7.0):
+    y = np.random.default_rng(0).uniform(-0.3, 0.3, (int(sr * seconds), channels)).astype(np.float32)
+    try:
+        sf.write(path, y, sr, format="MP3")
+    except (sf.LibsndfileError, ValueError, TypeError):
+        pytest.skip("libsndfile cannot write MP3")
+    return path
+
+
+def assert_matches_sf_info(info, path):
+    expected = sf.info(path)
+    assert info is not None
+    assert info.sample_rate == expected.samplerate
+    assert info.channels == expected.channels
+    assert info.duration == pytest.approx(expected.duration, abs=DURATION_TOLERANCE)
+
+
+@pytest.mark.parametrize("sr, channels", [(44100, 2), (22050, 1), (16000, 1)])
+def test_probe_mp3_matches_sf_info(tmp_path, sr, channels):
+    path = write_mp3(str(tmp_path / "verse.mp3"), sr, channels)
+    assert_matches_sf_info(probe_mp3(path), path)
+
+
+def test_probe_mp3_skips_id3v2_tag(tmp_path):
+    path = write_mp3(str(tmp_path / "verse.mp3"), 44100, 2)
+    with open(path, "rb") as f:
+        audio = f.read()
+    tag_size = 2000
+    syncsafe = bytes((tag_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    tagged = str(tmp_path / "tagged.mp3")
+    with open(tagged, "wb") as f:
+        f.write(b"ID3\x03\x00\x00" + syncsafe + b"\x00" * tag_size + audio)
+    assert probe_mp3(tagged).duration == pytest.approx(probe_mp3(path).duration, abs=1e-6)
+
+
+def test_probe_mp3_rejects_other_data(tmp_path):
+    path = tmp_path / "noise.mp3"
+    path.write_bytes(bytes(10000))
+    assert probe_mp3(str(path)) is None
+    assert probe_audio(str(path)) is None
+
+
+def test_probe_audio_reads_other_formats_from_their_header(tmp_path):
+    path = str(tmp_path / "verse.wav")
+    sf.write(path, np.zeros((22050, 2), dtype=np.float32), 22050)
+    info = probe_audio(path)
+    assert (info.duration, info.sample_rate, info.channels) == (1.0, 22050, 2)
+
+
+@pytest.mark.skipif(not CORPUS_FILES, reason="corpus recordings not present")
+@pytest.mark.parametrize("path", CORPUS_FILES[::40])
+def test_probe_mp3_matches_sf_info_on_corpus(path):
+    assert_matches_sf_info(probe_mp3(path), path)
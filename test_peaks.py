@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from peaks import BASE_BLOCK, MIN_TOP_BUCKETS, PeakPyramid, PeakPyramidBuilder
+
+
+def signal(num_samples, seed=0):
+    return np.random.default_rng(seed).uniform(-1.0, 1.0, num_samples).astype(np.float32)
+
+
+def assert_same_pyramid(a, b):
+    assert (a.sr, a.num_samples, a.block_sizes) == (b.sr, b.num_samples, b.block_sizes)
+    for level in range(len(a.block_sizes)):
+        np.testing.assert_array_equal(a.mins[level], b.mins[level])
+        np.testing.assert_array_equal(a.maxs[level], b.maxs[level])
+        np.testing.assert_allclose(a.rms[level], b.rms[level], rtol=1e-6)
+
+
+@pytest.mark.parametrize("num_samples", [0, 1, BASE_BLOCK - 1, BASE_BLOCK, 1_000_003])
+def test_builder_fed_in_blocks_matches_build(num_samples):
+    y = signal(num_samples)
+    builder = PeakPyramidBuilder(16000)
+    # Block sizes that never line up with the bucket size
+    edges = np.cumsum(np.random.default_rng(1).integers(1, 5000, size=num_samples // 1000 + 2))
+    for block in np.split(y, edges[edges < num_samples]):
+        builder.add(block)
+    assert_same_pyramid(builder.build(), PeakPyramid.build(y, 16000))
+
+
+def test_build_summarises_each_bucket():
+    y = signal(BASE_BLOCK * MIN_TOP_BUCKETS * 2 + 100)
+    pyramid = PeakPyramid.build(y, 16000)
+
+    full = len(y) // BASE_BLOCK * BASE_BLOCK
+    buckets = y[:full].reshape(-1, BASE_BLOCK)
+    tail = y[full:]
+    np.testing.assert_array_equal(pyramid.mins[0], np.append(buckets.min(axis=1), tail.min()))
+    np.testing.assert_array_equal(pyramid.maxs[0], np.append(buckets.max(axis=1), tail.max()))
+    np.testing.assert_allclose(pyramid.rms[0][:-1], np.sqrt((buckets.astype(np.float64) ** 2).mean(axis=1)),
+                               rtol=1e-6)
+
+    # Each coarser level halves the one below it
+    assert pyramid.block_sizes[:2] == [BASE_BLOCK, 2 * BASE_BLOCK]
+    np.testing.assert_array_equal(pyramid.mins[1][:10], pyramid.mins[0][:20].reshape(-1, 2).min(axis=1))
+    assert len(pyramid.mins[-1]) < MIN_TOP_BUCKETS
+    assert pyramid.peak() == pytest.approx(np.abs(y).max())
+
+
+def test_save_and_load_round_trip(tmp_path):
+    pyramid = PeakPyramid.build(signal(300_000), 22050)
+    path = str(tmp_path / "peaks.npz")
+    pyramid.save(path)
+    assert_same_pyramid(PeakPyramid.load(path), pyramid)
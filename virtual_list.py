@@ -0,0 +1,214 @@
+import tkinter as tk
+
+ROW_HEIGHT = 20  # pixels per row
+DURATION_WIDTH = 70  # pixels of the right-aligned duration column
+PADDING = 4
+BACKGROUND_COLOR = '#ffffff'
+TEXT_COLOR = '#000000'
+SELECTED_BACKGROUND = '#0078d7'
+SELECTED_TEXT_COLOR = '#ffffff'
+HEADER_BACKGROUND = '#e8e8e8'
+WHEEL_ROWS = 3  # rows scrolled per mouse wheel notch
+
+
+class VirtualFileList:
+    """Two-column file list (name, duration) that only draws the rows on screen
+
+    Rows are file paths; row_values(path) returns the (name, duration)
+    strings of a row and is only called for rows that are visible. A fixed
+    pool of canvas items, one set per visible row, is moved and relabelled
+    as the list scrolls, so setting a list of ten thousand files costs the
+    same as setting ten.
+
+    Selection is single-row; on_select(path) is called when the user picks
+    a row with the mouse or the arrow keys, never for select().
+    """
+
+    def __init__(self, master, row_values, on_select=None, row_height=ROW_HEIGHT):
+        self.row_values = row_values
+        self.on_select = on_select
+        self.row_height = row_height
+
+        self.frame = tk.Frame(master)
+        self.widget = self.frame
+        header = tk.Frame(self.frame, background=HEADER_BACKGROUND)
+        header.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(header, text="File", anchor=tk.W, background=HEADER_BACKGROUND).pack(side=tk.LEFT, padx=PADDING)
+        tk.Label(header, text="Duration", anchor=tk.E, background=HEADER_BACKGROUND).pack(side=tk.RIGHT, padx=PADDING)
+
+        self.scrollbar = tk.Scrollbar(self.frame, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(self.frame, background=BACKGROUND_COLOR, highlightthickness=0,
+                                width=290, takefocus=True)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        self._rows = []  # paths in display order
+        self._row_of = {}  # path -> position in _rows
+        self._selected = None
+        self._offset = 0  # pixels scrolled past the top of the first row
+        self._slots = []  # (background, name, duration background, duration) item ids per visible row
+
+        c = self.canvas
+        c.bind('<Configure>', self._on_configure)
+        c.bind('<ButtonPress-1>', self._on_click)
+        c.bind('<MouseWheel>', self._on_wheel)
+        c.bind('<Button-4>', lambda event: self._scroll_rows(-WHEEL_ROWS))
+        c.bind('<Button-5>', lambda event: self._scroll_rows(WHEEL_ROWS))
+        c.bind('<Up>', lambda event: self._step(-1))
+        c.bind('<Down>', lambda event: self._step(1))
+        c.bind('<Prior>', lambda event: self._step(-self._visible_rows()))
+        c.bind('<Next>', lambda event: self._step(self._visible_rows()))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, path):
+        return path in self._row_of
+
+    def set_rows(self, paths):
+        """Show paths, keeping the selection and scroll position where possible"""
+        self._rows = list(paths)
+        self._row_of = {path: row for row, path in enumerate(self._rows)}
+        if self._selected not in self._row_of:
+            self._selected = None
+        self._offset = min(self._offset, self._max_offset())
+        self._render()
+
+    def refresh(self):
+        """Fetch the values of the visible rows again"""
+        self._render()
+
+    def refresh_row(self, path):
+        """Fetch the values of one row again if it is visible"""
+        row = self._row_of.get(path)
+        first = self._offset // self.row_height
+        if row is not None and first <= row < first + len(self._slots):
+            self._render()
+
+    def selection(self):
+        """Selected path, or None"""
+        return self._selected
+
+    def select(self, path):
+        """Select path without calling on_select; None or a path not shown clears the selection"""
+        self._selected = path if path in self._row_of else None
+        self._render()
+
+    def see(self, path):
+        """Scroll the least distance that makes the row of path fully visible"""
+        row = self._row_of.get(path)
+        if row is None:
+            return
+        top = row * self.row_height
+        height = max(self.row_height, self.canvas.winfo_height())
+        if top < self._offset:
+            self._offset = top
+        elif top + self.row_height > self._offset + height:
+            self._offset = top + self.row_height - height
+        self._offset = max(0, min(self._offset, self._max_offset()))
+        self._render()
+
+    def yview(self, *args):
+        """Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units' | 'pages')"""
+        if not args:
+            return
+        if args[0] == tk.MOVETO:
+            offset = int(float(args[1]) * len(self._rows) * self.row_height)
+        elif args[0] == tk.SCROLL:
+            step = self.row_height if args[2] == tk.UNITS else max(self.row_height, self.canvas.winfo_height())
+            offset = self._offset + int(args[1]) * step
+        else:
+            return
+        self._offset = max(0, min(offset, self._max_offset()))
+        self._render()
+
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def _max_offset(self):
+        return max(0, len(self._rows) * self.row_height - self.canvas.winfo_height())
+
+    def _ensure_slots(self):
+        # One more than fits, for the partially visible row at the bottom
+        needed = self.canvas.winfo_height() // self.row_height + 2
+        c = self.canvas
+        while len(self._slots) < needed:
+            self._slots.append((
+                c.create_rectangle(0, 0, 0, 0, width=0, state=tk.HIDDEN),
+                c.create_text(0, 0, anchor=tk.W, state=tk.HIDDEN),
+                # Covers the end of a long name so it never runs into the duration
+                c.create_rectangle(0, 0, 0, 0, width=0, state=tk.HIDDEN),
+                c.create_text(0, 0, anchor=tk.E, state=tk.HIDDEN),
+            ))
+
+    def _render(self):
+        self._ensure_slots()
+        width = self.canvas.winfo_width()
+        first = self._offset // self.row_height
+        for i, (background, name, duration_background, duration) in enumerate(self._slots):
+            row = first + i
+            if row >= len(self._rows):
+                for item in (background, name, duration_background, duration):
+                    self.canvas.itemconfigure(item, state=tk.HIDDEN)
+                continue
+
+            path = self._rows[row]
+            name_text, duration_text = self.row_values(path)
+            selected = path == self._selected
+            fill = SELECTED_BACKGROUND if selected else BACKGROUND_COLOR
+            text_fill = SELECTED_TEXT_COLOR if selected else TEXT_COLOR
+            top = row * self.row_height - self._offset
+            middle = top + self.row_height / 2
+            c = self.canvas
+            c.coords(background, 0, top, width, top + self.row_height)
+            c.coords(name, PADDING, middle)
+            c.coords(duration_background, width - DURATION_WIDTH, top, width, top + self.row_height)
+            c.coords(duration, width - PADDING, middle)
+            c.itemconfigure(background, fill=fill, state=tk.NORMAL)
+            c.itemconfigure(name, text=name_text, fill=text_fill, state=tk.NORMAL)
+            c.itemconfigure(duration_background, fill=fill, state=tk.NORMAL)
+            c.itemconfigure(duration, text=duration_text, fill=text_fill, state=tk.NORMAL)
+
+        total = len(self._rows) * self.row_height
+        if total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self.canvas.winfo_height()) / total))
+
+    def _on_configure(self, event):
+        self._offset = min(self._offset, self._max_offset())
+        self._render()
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = (self._offset + event.y) // self.row_height
+        if 0 <= row < len(self._rows):
+            self._pick(self._rows[row])
+
+    def _step(self, rows):
+        if not self._rows:
+            return
+        row = self._row_of.get(self._selected)
+        row = 0 if row is None else max(0, min(len(self._rows) - 1, row + rows))
+        self._pick(self._rows[row])
+
+    def _pick(self, path):
+        changed = path != self._selected
+        self.select(path)
+        self.see(path)
+        if changed and self.on_select:
+            self.on_select(path)
+
+    def _on_wheel(self, event):
+        if not event.delta:
+            return
+        # Windows reports multiples of 120 per notch, macOS small counts
+        notches = event.delta / 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self._scroll_rows(-int(round(notches * WHEEL_ROWS)))
+
+    def _scroll_rows(self, rows):
+        self._offset = max(0, min(self._offset + rows * self.row_height, self._max_offset()))
+        self._render()
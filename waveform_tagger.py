@@ -1,29 +1,45 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext
 import json
-import pygame
 import os
-import re
 import numpy as np
-import librosa
 import time
 import math
 
+from audio_cache import DecodedAudioCache
+from audio_catalog import AUDIO_EXTENSIONS, AudioCatalog, parse_audio_key
+from audio_loader import AsyncAudioLoader
+from audio_playback import PlaybackEngine
+from overview_strip import OverviewStrip
+from perf_trace import perf
+
+# Sample rate of the mono signal used for analysis (playback uses the native rate)
+ANALYSIS_SR = 16000
+
+# Segment colours in the overview strip, by tag type
+SEGMENT_COLORS = {'word': '#FFD700', 'line': '#87CEEB'}
+
 class GitaWaveformTagger:
     def __init__(self, root):
         self.root = root
         self.root.title("Gita Audio Tagger")
         self.root.geometry("1400x900")
         
-        # Initialize pygame for audio playback
-        pygame.init()
-        pygame.mixer.init()
+        # Playback straight from the decoded signal
+        self.playback = PlaybackEngine()
+        
+        # Decoded PCM cache shared with the other tagger
+        self.audio_cache = DecodedAudioCache(analysis_sr=ANALYSIS_SR)
+        self.audio_loader = AsyncAudioLoader(self.root, self.audio_cache)
+        
+        # Slow spans (e.g. decoding) and latency percentiles go to a rotating log
+        perf.enable_log()
         
         # Initialize variables
         self.audio_file = None
         self.verse_data = None
-        self.y = None  # Audio time series
-        self.sr = None  # Sample rate
+        self.y = None  # Analysis-rate audio time series
+        self.sr = None  # Analysis sample rate
         self.segments = []  # List of (start, end, label, tag_type) tuples
         self.current_selection = None  # Currently selected segment (start, end)
         self.selected_segment_index = None
@@ -37,6 +53,8 @@ class GitaWaveformTagger:
         self.verse = None
         self.current_playback_position = 0  # Current playback position in seconds
         self.audio_duration = 0  # Duration of audio in seconds
+        self.audio_catalog = None  # AudioCatalog of BrajaBeats_Gita_MP3, scanned on first use
+        self._updating_slider = False
         
         # Set up the UI
         self.setup_ui()
@@ -132,6 +150,10 @@ class GitaWaveformTagger:
         self.duration_var = tk.StringVar(value="0:00.000")
         tk.Label(position_frame, textvariable=self.duration_var, width=10).pack(side=tk.LEFT, padx=5)
         
+        # Whole-file overview with the tagged segments; clicking it seeks
+        self.overview = OverviewStrip(slider_frame, on_navigate=self.on_overview_navigate)
+        self.overview.widget.pack(fill=tk.X, padx=10, pady=(5, 0))
+        
         # Main audio position slider
         self.position_slider = ttk.Scale(
             slider_frame, 
@@ -155,6 +177,7 @@ class GitaWaveformTagger:
         
     def show_start_slider(self):
         """Show the segment start slider"""
+        self.get_playback_position()
         if not self.start_frame_visible:
             self.start_frame.pack(fill=tk.X, padx=5, pady=5)
             self.start_frame_visible = True
@@ -194,6 +217,7 @@ class GitaWaveformTagger:
     
     def show_end_slider(self):
         """Show the segment end slider"""
+        self.get_playback_position()
         if not self.end_frame_visible:
             self.end_frame.pack(fill=tk.X, padx=5, pady=5)
             self.end_frame_visible = True
@@ -231,8 +255,15 @@ class GitaWaveformTagger:
             self.segment_end = self.current_playback_position
             self.update_selection()
     
+    def get_playback_position(self):
+        """Read the current position from the playback clock rather than the last UI update"""
+        if self.is_playing:
+            self.current_playback_position = self.playback.position()
+        return self.current_playback_position
+    
     def set_start_to_current(self):
         """Set segment start to current playback position"""
+        self.get_playback_position()
         self.segment_start = self.current_playback_position
         self.start_slider.set(self.current_playback_position)
         self.start_pos_var.set(self.format_time(self.current_playback_position))
@@ -241,6 +272,7 @@ class GitaWaveformTagger:
     
     def set_end_to_current(self):
         """Set segment end to current playback position"""
+        self.get_playback_position()
         self.segment_end = self.current_playback_position
         self.end_slider.set(self.current_playback_position)
         self.end_pos_var.set(self.format_time(self.current_playback_position))
@@ -279,9 +311,15 @@ class GitaWaveformTagger:
         
         self.update_selection()
     
+    def on_overview_navigate(self, position_sec):
+        """Seek to a time clicked in the overview strip"""
+        if self.y is None or self.audio_duration == 0:
+            return
+        self.position_slider.set((position_sec / self.audio_duration) * 100)
+    
     def on_position_slider_change(self, value):
         """Handle changes to the main position slider"""
-        if not self.audio_file or self.audio_duration == 0:
+        if not self.audio_file or self.audio_duration == 0 or self._updating_slider:
             return
             
         # Convert slider value (0-100) to position in seconds
@@ -292,10 +330,9 @@ class GitaWaveformTagger:
         self.current_playback_position = position_sec
         self.position_var.set(self.format_time(position_sec))
         
-        # If audio is playing, restart from new position
-        if self.is_playing:
-            pygame.mixer.music.play(start=position_sec)
-            self._playback_start = position_sec
+        # Seeking is instant; playback continues from the new position
+        self.playback.seek(position_sec)
+        self.overview.set_cursor(position_sec)
         
         # Draw time markers
         self.draw_time_markers()
@@ -489,45 +526,75 @@ class GitaWaveformTagger:
     
     def load_audio_file(self, audio_file):
         """Load the specified audio file"""
-        self.audio_file = audio_file
-        self.status_var.set(f"Loading audio: {os.path.basename(audio_file)}")
-        self.root.update()
+        file_name = os.path.basename(audio_file)
+        self.status_var.set(f"Loading audio: {file_name}")
         
-        try:
-            # Load audio data using librosa
-            self.y, self.sr = librosa.load(audio_file, sr=None)
-            self.audio_duration = librosa.get_duration(y=self.y, sr=self.sr)
-            
-            # Update audio info
-            file_name = os.path.basename(audio_file)
-            duration_str = time.strftime("%M:%S", time.gmtime(self.audio_duration))
-            self.audio_info_var.set(f"File: {file_name} | Duration: {duration_str}")
-            self.duration_var.set(self.format_time(self.audio_duration))
-            
-            # Reset position
-            self.current_playback_position = 0
-            self.position_var.set(self.format_time(0))
-            self.position_slider.set(0)
-            
-            # Clear segments
-            self.segments = []
-            self.update_segments_tree()
-            self.status_var.set("loading...")
-            # Load audio for playback
-            # start time 
-            print("started")
-            pygame.mixer.music.load(audio_file)
-          
-            # Draw time markers
-            self.draw_time_markers()
-            print("done"  )
-            self.status_var.set(f"Loaded audio: {file_name}")
-            
-            # Try to extract chapter and verse from filename
-            self.extract_from_audio_filename()
+        if not os.path.isfile(audio_file):
+            self.status_var.set(f"Error loading audio: {audio_file} not found")
+            return
             
-        except Exception as e:
-            self.status_var.set(f"Error loading audio: {str(e)}")
+        # Playback becomes available once the first block is decoded
+        self.playback.clear()
+        self.audio_file = audio_file
+        self.is_playing = False
+        self.y = None
+        self.audio_duration = 0
+        self.overview.clear()
+        self.audio_info_var.set(f"File: {file_name} | Loading...")
+        
+        # Reset position
+        self.current_playback_position = 0
+        self.position_var.set(self.format_time(0))
+        self.position_slider.set(0)
+        
+        # Clear segments
+        self.segments = []
+        self.update_segments_tree()
+        
+        # Decode in the background; a newer selection cancels this load
+        self.audio_loader.load(
+            audio_file, self.on_audio_progress, self.on_audio_loaded, self.on_audio_load_error
+        )
+        
+        # Try to extract chapter and verse from filename
+        self.extract_from_audio_filename()
+    
+    def on_audio_progress(self, y, sr, peaks, expected_duration, playback):
+        """Make the part of the audio decoded so far available"""
+        self.y, self.sr = y, sr
+        self.audio_duration = len(y) / sr
+        if playback is not None:
+            self.playback.extend_source(*playback)
+        self.duration_var.set(self.format_time(self.audio_duration))
+        self.overview.set_audio(y, peaks, self.audio_duration)
+        self.draw_time_markers()
+        
+        file_name = os.path.basename(self.audio_file)
+        self.status_var.set(f"Loading audio: {file_name} ({self.format_time(self.audio_duration, show_ms=False)})")
+    
+    def on_audio_loaded(self, y, sr, peaks, playback):
+        """Finish loading once the whole file is decoded"""
+        self.y, self.sr = y, sr
+        self.audio_duration = len(self.y) / self.sr
+        self.playback.extend_source(*playback)
+        self.overview.set_audio(y, peaks, self.audio_duration)
+        self.overview.set_cursor(self.current_playback_position)
+        
+        # Update audio info
+        file_name = os.path.basename(self.audio_file)
+        duration_str = time.strftime("%M:%S", time.gmtime(self.audio_duration))
+        self.audio_info_var.set(f"File: {file_name} | Duration: {duration_str}")
+        self.duration_var.set(self.format_time(self.audio_duration))
+        
+        # Draw time markers
+        self.draw_time_markers()
+        self.status_var.set(f"Loaded audio: {file_name}")
+    
+    def on_audio_load_error(self, error):
+        """Report a failed background load"""
+        self.playback.clear()  # Playback of the part decoded before the error would wait for the rest
+        self.is_playing = False
+        self.status_var.set(f"Error loading audio: {str(error)}")
     
     # Add a new method to list audio directory files
     def list_audio_directory(self):
@@ -542,19 +609,16 @@ class GitaWaveformTagger:
             # Get all files in the directory
             all_files = os.listdir(audio_dir)
             
-            # Filter for audio files
-            audio_files = []
-            for filename in all_files:
-                if filename.lower().endswith(('.mp3', '.wav', '.ogg')):
-                    full_path = os.path.join(audio_dir, filename)
-                    audio_files.append(full_path)
+            # Filter for audio files; the catalog parses and sorts them by chapter.verse once
+            catalog = AudioCatalog(
+                os.path.join(audio_dir, filename) for filename in all_files
+                if filename.lower().endswith(AUDIO_EXTENSIONS)
+            )
+            audio_files = catalog.files
             
             if not audio_files:
                 self.status_var.set(f"No audio files found in {audio_dir}")
                 return
-                
-            # Sort files by chapter.verse for Gita files
-            audio_files.sort(key=self.sort_by_chapter_verse)
             
             # Show a dialog to select a file from the list
             dialog = tk.Toplevel(self.root)
@@ -584,35 +648,17 @@ class GitaWaveformTagger:
             verse_filter_entry = tk.Entry(ch_verse_frame, textvariable=verse_filter_var, width=5)
             verse_filter_entry.pack(side=tk.LEFT, padx=5)
             
+            # Paths currently listed, in listbox order
+            shown = list(audio_files)
+            
             # Function to apply filter
             def apply_filter(*args):
-                filter_text = filter_var.get().lower()
-                ch_filter = ch_filter_var.get()
-                verse_filter = verse_filter_var.get()
-                
+                shown[:] = catalog.filter(
+                    filter_var.get(), ch_filter_var.get().strip(), verse_filter_var.get().strip()
+                )
                 listbox.delete(0, tk.END)
-                for file_path in audio_files:
-                    filename = os.path.basename(file_path)
-                    
-                    # Apply text filter
-                    if filter_text and filter_text not in filename.lower():
-                        continue
-                    
-                    # Apply chapter/verse filter
-                    if ch_filter or verse_filter:
-                        match = re.search(r'(\d+)\.(\d+)', filename)
-                        if match:
-                            chapter, verse = match.groups()
-                            if ch_filter and chapter != ch_filter:
-                                continue
-                            if verse_filter and verse != verse_filter:
-                                continue
-                        else:
-                            # Skip if not matching pattern
-                            if ch_filter or verse_filter:
-                                continue
-                    
-                    listbox.insert(tk.END, filename)
+                for file_path in shown:
+                    listbox.insert(tk.END, os.path.basename(file_path))
             
             filter_var.trace("w", apply_filter)
             ch_filter_var.trace("w", apply_filter)
@@ -633,14 +679,8 @@ class GitaWaveformTagger:
             def on_select(event=None):
                 selection = listbox.curselection()
                 if selection:
-                    index = selection[0]
-                    filename = listbox.get(index)
-                    # Find the full path
-                    for file_path in audio_files:
-                        if os.path.basename(file_path) == filename:
-                            self.load_audio_file(file_path)
-                            dialog.destroy()
-                            break
+                    self.load_audio_file(shown[selection[0]])
+                    dialog.destroy()
             
             # Fill listbox with file names (not full paths)
             for file_path in audio_files:
@@ -667,16 +707,6 @@ class GitaWaveformTagger:
         except Exception as e:
             self.status_var.set(f"Error loading audio directory: {str(e)}")
     
-    def sort_by_chapter_verse(self, file_path):
-        """Sort key for audio files based on chapter and verse numbers"""
-        filename = os.path.basename(file_path)
-        match = re.search(r'(\d+)\.(\d+)', filename)
-        if match:
-            chapter = int(match.group(1))
-            verse = int(match.group(2))
-            return (chapter, verse)
-        return (999, 999)  # Default for files that don't match pattern
-    
     def mark_segment_start(self):
         """Mark the current playback position as the start of a segment"""
         if self.y is None or self.audio_duration == 0:
@@ -697,36 +727,36 @@ class GitaWaveformTagger:
     
     def update_position(self):
         """Update the position indicator during playback"""
-        if self.is_playing and pygame.mixer.music.get_busy():
-            pos_ms = pygame.mixer.music.get_pos()
-            pos_sec = pos_ms / 1000.0
-            
-            # If we're playing a selection, adjust the position relative to selection start
-            if hasattr(self, '_playback_start'):
-                pos_sec += self._playback_start
-            
-            # Limit to audio duration
-            pos_sec = min(pos_sec, self.audio_duration)
-            
-            # Store current playback position
-            self.current_playback_position = pos_sec
-            
-            # Update position display
-            self.position_var.set(self.format_time(pos_sec))
+        if not self.is_playing:
+            return
             
-            # Update slider position without triggering the callback
-            slider_pos = (pos_sec / self.audio_duration) * 100 if self.audio_duration > 0 else 0
+        pos_sec = self.playback.position()
+        
+        # Store current playback position
+        self.current_playback_position = pos_sec
+        
+        # Update position display
+        self.position_var.set(self.format_time(pos_sec))
+        
+        # Update slider position without triggering the callback
+        slider_pos = (pos_sec / self.audio_duration) * 100 if self.audio_duration > 0 else 0
+        self._updating_slider = True
+        try:
             self.position_slider.set(slider_pos)
-            
-            # Check if we need to stop at end of selection
-            if self.current_selection and pos_sec >= self.current_selection[1]:
-                pygame.mixer.music.stop()
-                self.is_playing = False
-                self.status_var.set("Playback of selection complete")
-                return
-            
-            # Schedule next update
-            self.root.after(50, self.update_position)
+        finally:
+            self._updating_slider = False
+        
+        # Only the overview's cursor item moves; its bitmap stays as it is
+        self.overview.set_cursor(pos_sec)
+        
+        # The engine stops by itself at the end of the file or selection
+        if not self.playback.is_playing():
+            self.is_playing = False
+            self.status_var.set("Playback complete")
+            return
+        
+        # Schedule next update
+        self.root.after(50, self.update_position)
     
     def toggle_play(self):
         """Toggle play/pause of the entire audio file"""
@@ -734,17 +764,23 @@ class GitaWaveformTagger:
             self.status_var.set("No audio file loaded")
             return
             
+        if self.playback.samples is None:
+            self.status_var.set("Audio is still loading")
+            return
+            
         if self.is_playing:
-            pygame.mixer.music.pause()
+            self.playback.pause()
+            self.current_playback_position = self.playback.position()
             self.is_playing = False
             self.status_var.set("Playback paused")
         else:
             # Start from current position
-            pygame.mixer.music.play(start=self.current_playback_position)
-            self._playback_start = self.current_playback_position
+            if not self.playback.play(start=self.current_playback_position):
+                self.status_var.set("At end of audio")
+                return
             
             self.is_playing = True
-            self.status_var.set("Playing audio")
+            self.status_var.set(f"Playing audio (position from the {self.playback.clock})")
             
             # Start position update loop
             self.update_position()
@@ -755,30 +791,30 @@ class GitaWaveformTagger:
             self.status_var.set("No audio file loaded")
             return
             
+        if self.playback.samples is None:
+            self.status_var.set("Audio is still loading")
+            return
+            
         if self.current_selection is None:
             self.status_var.set("No selection to play")
             return
             
         start, end = self.current_selection
         
-        # Store the start time for position calculation
-        self._playback_start = start
-        
-        # Load audio
-        pygame.mixer.music.load(self.audio_file)
-        
-        # Start playback from selection start
-        pygame.mixer.music.play(start=start)
+        # Play exactly the selected samples; the engine stops at the end
+        was_playing = self.is_playing
+        self.playback.play(start=start, end=end)
         
         self.is_playing = True
         self.status_var.set(f"Playing selection: {self.format_time(start)} - {self.format_time(end)}")
         
         # Start position update loop
-        self.update_position()
+        if not was_playing:
+            self.update_position()
     
     def stop_playback(self):
         """Stop audio playback"""
-        pygame.mixer.music.stop()
+        self.playback.pause()
         self.is_playing = False
         self.status_var.set("Playback stopped")
     
@@ -854,6 +890,11 @@ class GitaWaveformTagger:
         for item in self.segments_tree.get_children():
             self.segments_tree.delete(item)
             
+        self.overview.set_segments([
+            (start, end, SEGMENT_COLORS.get(tag_type, SEGMENT_COLORS['word']))
+            for start, end, _, tag_type in self.segments
+        ])
+            
         # Add all segments
         for i, (start, end, label, tag_type) in enumerate(self.segments):
             duration = end - start
@@ -909,7 +950,7 @@ class GitaWaveformTagger:
             return
             
         # Calculate new position (1 second back)
-        new_pos = max(0, self.current_playback_position - 1.0)
+        new_pos = max(0, self.get_playback_position() - 1.0)
         
         # Update position
         self.current_playback_position = new_pos
@@ -918,10 +959,8 @@ class GitaWaveformTagger:
         # Update slider
         self.position_slider.set((new_pos / self.audio_duration) * 100)
         
-        # If playing, jump to new position
-        if self.is_playing:
-            pygame.mixer.music.play(start=new_pos)
-            self._playback_start = new_pos
+        # Seeking is instant; playback continues from the new position
+        self.playback.seek(new_pos)
             
         self.status_var.set(f"Jumped to {self.format_time(new_pos)}")
     
@@ -931,7 +970,7 @@ class GitaWaveformTagger:
             return
             
         # Calculate new position (1 second forward)
-        new_pos = min(self.audio_duration, self.current_playback_position + 1.0)
+        new_pos = min(self.audio_duration, self.get_playback_position() + 1.0)
         
         # Update position
         self.current_playback_position = new_pos
@@ -940,10 +979,8 @@ class GitaWaveformTagger:
         # Update slider
         self.position_slider.set((new_pos / self.audio_duration) * 100)
         
-        # If playing, jump to new position
-        if self.is_playing:
-            pygame.mixer.music.play(start=new_pos)
-            self._playback_start = new_pos
+        # Seeking is instant; playback continues from the new position
+        self.playback.seek(new_pos)
             
         self.status_var.set(f"Jumped to {self.format_time(new_pos)}")
     
@@ -1072,15 +1109,17 @@ class GitaWaveformTagger:
         if not self.chapter or not self.verse:
             return
             
-        pattern = f"{self.chapter}.{self.verse}"
         braja_dir = os.path.join(os.getcwd(), "BrajaBeats_Gita_MP3")
-        
-        if os.path.exists(braja_dir) and os.path.isdir(braja_dir):
-            for filename in os.listdir(braja_dir):
-                if pattern in filename and filename.lower().endswith(('.mp3', '.wav', '.ogg')):
-                    audio_path = os.path.join(braja_dir, filename)
-                    self.load_audio_file(audio_path)
-                    return
+        if self.audio_catalog is None:
+            if not os.path.isdir(braja_dir):
+                return
+            self.audio_catalog = AudioCatalog.scan(braja_dir)
+            
+        # Exact chapter and verse, so 1.6 never picks up 1.60
+        audio_path = self.audio_catalog.find(self.chapter, self.verse)
+        if audio_path and audio_path != self.audio_file:
+            # Only load if different from current file
+            self.load_audio_file(audio_path)
     
     def go_to_verse(self):
         """Go to specific chapter and verse"""
@@ -1119,10 +1158,10 @@ class GitaWaveformTagger:
             return
             
         filename = os.path.basename(self.audio_file)
-        match = re.search(r'Bhagavad-gita\s+(\d+)\.(\d+)', filename)
-        if match:
-            chapter = match.group(1)
-            verse = match.group(2)
+        key = parse_audio_key(filename)
+        if key:
+            chapter = str(key.chapter)
+            verse = str(key.verse)
             
             self.chapter_var.set(chapter)
             self.verse_var.set(verse)
@@ -0,0 +1,267 @@
+import tkinter as tk
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.gridspec import GridSpec
+import matplotlib.patches as patches
+
+WAVEFORM_COLOR = '#1f77b4'
+RMS_COLOR = '#6baed6'
+SELECTION_COLOR = '#4CAF50'
+CURSOR_COLOR = 'r'
+SPECTROGRAM_CMAP = 'magma'
+
+
+def _band(times, lower, upper):
+    """Polygon vertices of the area between two curves"""
+    if len(times) == 0:
+        return np.zeros((0, 2))
+    return np.column_stack([
+        np.concatenate([times, times[::-1]]),
+        np.concatenate([upper, lower[::-1]]),
+    ])
+
+
+class MatplotlibWaveformView:
+    """Waveform, tagged regions, selection and playback cursor in a matplotlib figure
+
+    Retained mode: every artist is created once and updated in place, and
+    region artists are only rebuilt when the regions change. The selection
+    and cursor are animated artists blitted over a cached background, so
+    moving them never re-renders the waveform.
+
+    Mouse input is reported in seconds through on_press(time, shift),
+    on_drag(time) and on_release(time); on_resize() is called when the
+    plotting area changes size, and on_zoom(time, steps) for mouse wheel
+    steps (positive to zoom in) over the plot.
+    """
+
+    def __init__(self, master, on_press=None, on_drag=None, on_release=None, on_resize=None, on_zoom=None):
+        self.on_press = on_press
+        self.on_drag = on_drag
+        self.on_release = on_release
+        self.on_resize = on_resize
+        self.on_zoom = on_zoom
+
+        self.fig = Figure(figsize=(14, 4), dpi=100)
+        # One row for the waveform alone, two when the spectrogram lane is shown
+        self._single_grid = GridSpec(1, 1, figure=self.fig)
+        self._lane_grid = GridSpec(2, 1, figure=self.fig, height_ratios=[3, 1], hspace=0.05)
+        self.ax = self.fig.add_subplot(self._single_grid[0])
+        self.spec_ax = None  # created the first time the lane is shown
+        self.spec_image = None
+        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(fill=tk.BOTH, expand=True)
+
+        # Configure axes for waveform display
+        self.ax.set_xlabel('Time (s)')
+        self.ax.set_ylabel('Amplitude')
+        self.ax.grid(True, alpha=0.3)
+
+        # Placeholder text
+        self.placeholder = self.ax.text(
+            0.5, 0.5, 'No audio loaded',
+            ha='center', va='center', transform=self.ax.transAxes,
+            fontsize=14, alpha=0.7
+        )
+
+        # Waveform: min/max envelope with RMS inside, or raw samples when zoomed in
+        self.envelope = PolyCollection([], facecolors=WAVEFORM_COLOR, linewidths=0)
+        self.rms_band = PolyCollection([], facecolors=RMS_COLOR, linewidths=0)
+        self.ax.add_collection(self.envelope)
+        self.ax.add_collection(self.rms_band)
+        self.sample_line, = self.ax.plot([], [], color=WAVEFORM_COLOR, linewidth=0.5)
+
+        # Tagged regions, rebuilt only when they change
+        self._regions = []
+        self._region_artists = []
+
+        # Spanning the axes height in axes coordinates keeps overlays independent of the y-limits
+        span = self.ax.get_xaxis_transform()
+        # Tagged region whose edge is being dragged; hidden from the region artists meanwhile
+        self.drag_rect = patches.Rectangle(
+            (0, 0), 0, 1, transform=span,
+            linewidth=1.5, facecolor='none', alpha=0.6, visible=False, animated=True
+        )
+        self.ax.add_patch(self.drag_rect)
+        self.selection_rect = patches.Rectangle(
+            (0, 0), 0, 1, transform=span,
+            linewidth=0, facecolor=SELECTION_COLOR, alpha=0.2, visible=False, animated=True
+        )
+        self.ax.add_patch(self.selection_rect)
+        self.selection_start_line = self.ax.axvline(
+            x=0, color=SELECTION_COLOR, linestyle='--', linewidth=1, visible=False, animated=True
+        )
+        self.selection_end_line = self.ax.axvline(
+            x=0, color=SELECTION_COLOR, linestyle='--', linewidth=1, visible=False, animated=True
+        )
+        self.cursor_line = self.ax.axvline(x=0, color=CURSOR_COLOR, linewidth=1.5, visible=False, animated=True)
+        self._overlays = (self.drag_rect, self.selection_rect, self.selection_start_line,
+                          self.selection_end_line, self.cursor_line)
+
+        # Background bitmap the overlays are blitted onto, captured after each full draw
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('button_press_event', self._on_press)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+        self.canvas.mpl_connect('resize_event', self._on_resize)
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+
+        self.canvas.draw()
+
+    def pixel_width(self):
+        """Width of the plotting area in pixels"""
+        return max(1, int(self.ax.bbox.width))
+
+    def set_waveform(self, times, mins, maxs, rms, start, end, y_max):
+        """Show an envelope from PeakPyramid.envelope over the time range [start, end]"""
+        self.placeholder.set_visible(False)
+        if rms is None:
+            # Zoomed in to individual samples
+            self.sample_line.set_data(times, mins)
+            self.sample_line.set_visible(True)
+            self.envelope.set_verts([])
+            self.rms_band.set_verts([])
+        else:
+            self.sample_line.set_visible(False)
+            self.envelope.set_verts([_band(times, mins, maxs)])
+            self.rms_band.set_verts([_band(times, -rms, rms)])
+        self.ax.set_xlim(start, end)
+        self.ax.set_ylim(-y_max, y_max)
+
+    def set_regions(self, regions):
+        """Show tagged regions given as (start, end, label, tag, color) tuples"""
+        regions = list(regions)
+        if regions == self._regions:
+            return
+        self._regions = regions
+
+        for artist in self._region_artists:
+            artist.remove()
+        self._region_artists = []
+
+        span = self.ax.get_xaxis_transform()
+        for start, end, label, tag, color in regions:
+            rect = patches.Rectangle(
+                (start, 0), end - start, 1, transform=span,
+                linewidth=0, facecolor=color, alpha=0.3
+            )
+            self.ax.add_patch(rect)
+            text_x = start + (end - start) / 2
+            tag_text = self.ax.text(
+                text_x, 0.95, tag, transform=span, clip_on=True,
+                ha='center', va='bottom', fontsize=6,
+                bbox=dict(facecolor='white', alpha=0.7, boxstyle='round,pad=0.1')
+            )
+            label_text = self.ax.text(
+                text_x, 0.9, label, transform=span, clip_on=True,
+                ha='center', va='bottom', fontsize=8,
+                bbox=dict(facecolor='white', alpha=0.7, boxstyle='round,pad=0.2')
+            )
+            self._region_artists.extend([rect, tag_text, label_text])
+
+    def set_spectrogram_visible(self, visible):
+        """Show or hide the spectrogram lane under the waveform"""
+        if visible and self.spec_ax is None:
+            self.spec_ax = self.fig.add_subplot(self._lane_grid[1], sharex=self.ax)
+            self.spec_image = self.spec_ax.imshow(
+                np.zeros((1, 1), dtype=np.uint8), origin='lower', aspect='auto',
+                cmap=SPECTROGRAM_CMAP, vmin=0, vmax=255, interpolation='nearest', extent=(0, 1, 0, 1)
+            )
+            self.spec_ax.set_yticks([])
+            self.spec_ax.set_ylabel('Mel')
+            self.spec_ax.set_xlabel('Time (s)')
+        if self.spec_ax is not None:
+            self.spec_ax.set_visible(visible)
+
+        # The time axis is labelled on whichever axes is at the bottom
+        self.ax.set_subplotspec(self._lane_grid[0] if visible else self._single_grid[0])
+        self.ax.set_xlabel('' if visible else 'Time (s)')
+        self.ax.tick_params(labelbottom=not visible)
+
+    def set_spectrogram(self, image, start, end):
+        """Show a uint8 (mels, columns) spectrogram image over [start, end]; None blanks the lane"""
+        if self.spec_image is None:
+            return
+        if image is None:
+            self.spec_image.set_visible(False)
+            return
+        self.spec_image.set_data(image)
+        self.spec_image.set_extent((start, end, 0, 1))
+        self.spec_image.set_visible(True)
+        self.ax.set_xlim(start, end)  # imshow may have autoscaled the shared x-axis
+
+    def set_selection(self, start, end):
+        """Move the selection overlay; None for either end hides it"""
+        visible = start is not None and end is not None
+        if visible:
+            start, end = min(start, end), max(start, end)
+            self.selection_rect.set_x(start)
+            self.selection_rect.set_width(end - start)
+            self.selection_start_line.set_xdata([start])
+            self.selection_end_line.set_xdata([end])
+        for artist in (self.selection_rect, self.selection_start_line, self.selection_end_line):
+            artist.set_visible(visible)
+
+    def set_drag_region(self, start, end, color=None):
+        """Move the overlay of a region being resized; None for either end hides it"""
+        visible = start is not None and end is not None
+        if visible:
+            self.drag_rect.set_x(min(start, end))
+            self.drag_rect.set_width(abs(end - start))
+            self.drag_rect.set_facecolor(color)
+            self.drag_rect.set_edgecolor(color)
+        self.drag_rect.set_visible(visible)
+
+    def set_cursor(self, position, visible=True):
+        """Move the playback cursor"""
+        self.cursor_line.set_xdata([position])
+        self.cursor_line.set_visible(visible)
+
+    def redraw(self):
+        """Render the whole figure"""
+        self.canvas.draw()
+
+    def blit_overlays(self):
+        """Redraw only the selection, dragged region and cursor over the cached waveform"""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_overlays()
+        self.canvas.blit(self.ax.bbox)
+
+    def _draw_overlays(self):
+        for artist in self._overlays:
+            self.ax.draw_artist(artist)
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_overlays()
+
+    def _on_resize(self, event):
+        if self.on_resize:
+            self.on_resize()
+
+    def _on_press(self, event):
+        if event.inaxes == self.ax and event.xdata is not None and self.on_press:
+            self.on_press(event.xdata, event.key == 'shift')
+
+    def _on_release(self, event):
+        if event.inaxes == self.ax and event.xdata is not None and self.on_release:
+            self.on_release(event.xdata)
+
+    def _on_motion(self, event):
+        # Only while the left button is held down
+        if event.button != 1:
+            return
+        if event.inaxes == self.ax and event.xdata is not None and self.on_drag:
+            self.on_drag(event.xdata)
+
+    def _on_scroll(self, event):
+        if event.inaxes in (self.ax, self.spec_ax) and event.xdata is not None and self.on_zoom:
+            self.on_zoom(event.xdata, event.step)